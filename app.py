@@ -11,16 +11,36 @@ def create_app():
     # Configure uploads
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload
     
+    # Per-stage timing, Server-Timing headers and the /metrics endpoint
+    from utils.metrics import init_app as init_metrics
+    init_metrics(app)
+    
+    # Bounded executor pools answer 429 with Retry-After when their queue is full
+    from utils.executors import init_app as init_executors
+    init_executors(app)
+    
     # Register blueprints
     from routes.summarizer_api import summarizer_api
     from routes.ocr_api import ocr_api
     from routes.stt_api import stt_api
     from routes.upload import upload_routes
+    from routes.admin_api import admin_api
     
     app.register_blueprint(summarizer_api, url_prefix='/api/summarizer')
     app.register_blueprint(ocr_api, url_prefix='/api/ocr')
     app.register_blueprint(stt_api, url_prefix='/api/stt')
     app.register_blueprint(upload_routes, url_prefix='/api/upload')
+    app.register_blueprint(admin_api, url_prefix='/api/admin')
+    
+    # Models load lazily; WARM_UP loads them in the background, tracked by /health/ready
+    from utils.warmup import init_app as init_warmup
+    init_warmup(app)
+    
+    # The job manager starts on the first job request; JOB_RESUME_ON_START starts it now
+    # to resume jobs left queued or orphaned by a previous worker
+    from utils.jobs import JOB_RESUME_ON_START, get_manager
+    if JOB_RESUME_ON_START:
+        get_manager()
     
     @app.route('/')
     def home():
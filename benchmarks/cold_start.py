@@ -0,0 +1,132 @@
+"""
+Measure cold start: time from process launch to the first response of each request kind.
+
+Usage:
+    python -m benchmarks.cold_start --requests home,upload_types,extractive,abstractive
+    python -m benchmarks.cold_start --requests abstractive --warm-up all --bart-model tiny
+
+Every request kind runs in a fresh process that imports the app, calls
+create_app and sends the request twice through Flask's test client. The
+report splits the first response into import, create_app, optional
+warm-up (waiting for /health/ready) and the request itself, and lists which
+heavy modules the process had imported by then.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import corpora
+
+HEAVY_MODULES = ['torch', 'transformers', 'cv2', 'fitz', 'networkx', 'speech_recognition', 'docx']
+
+# name -> (method, path, JSON body)
+REQUESTS = {
+    'home': ('GET', '/', None),
+    'upload_types': ('GET', '/api/upload/types', None),
+    'extractive': ('POST', '/api/summarizer/summarize-text',
+                   {'text': corpora.make_text(40), 'engine': 'extractive'}),
+    'overview': ('POST', '/api/summarizer/overview', {'text': corpora.make_text(40)}),
+    'abstractive': ('POST', '/api/summarizer/summarize-text', {'text': corpora.make_text(40), 'length': 'short'}),
+}
+
+
+def run_worker(name, launched, ready_timeout, output):
+    """Start the app in this process and time its first two responses to one request kind."""
+    start = time.perf_counter()
+    import app as app_module
+    imported = time.perf_counter()
+    flask_app = app_module.create_app()
+    created = time.perf_counter()
+
+    client = flask_app.test_client()
+    if os.environ.get('WARM_UP'):
+        deadline = time.perf_counter() + ready_timeout
+        while client.get('/health/ready').status_code != 200 and time.perf_counter() < deadline:
+            time.sleep(0.05)
+    ready = time.perf_counter()
+
+    method, path, body = REQUESTS[name]
+    timings = []
+    for _ in range(2):
+        request_start = time.perf_counter()
+        response = client.open(path, method=method, json=body)
+        timings.append(time.perf_counter() - request_start)
+        if len(timings) == 1:
+            first_response_at = time.time()
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'request': name,
+            'status': response.status_code,
+            'warm_up': os.environ.get('WARM_UP', ''),
+            'import_s': imported - start,
+            'create_app_s': created - imported,
+            'ready_wait_s': ready - created,
+            'first_request_s': timings[0],
+            'second_request_s': timings[1],
+            # Includes interpreter start-up, measured from the parent's launch
+            'time_to_first_response_s': first_response_at - launched,
+            'heavy_modules': [module for module in HEAVY_MODULES if module in sys.modules],
+            # ru_maxrss is reported in KiB on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }, f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', default='home,upload_types,extractive', help='comma-separated request kinds')
+    parser.add_argument('--warm-up', default='', help='WARM_UP setting for the app, e.g. all or abstractive,ocr')
+    parser.add_argument('--bart-model', help="BART checkpoint for abstractive requests; 'tiny' builds an offline one")
+    parser.add_argument('--ready-timeout', type=float, default=300.0)
+    parser.add_argument('--output', default='cold_start_results.json')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--launched', type=float, help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker, args.launched, args.ready_timeout, args.result)
+        return 0
+
+    names = [name for name in args.requests.split(',') if name]
+    unknown = set(names) - set(REQUESTS)
+    if unknown:
+        parser.error(f"unknown requests: {', '.join(sorted(unknown))}")
+
+    env = dict(os.environ, WARM_UP=args.warm_up)
+    if args.bart_model == 'tiny':
+        from benchmarks.tiny_bart import build_tiny_bart
+        env['SUMMARIZER_MODEL'] = build_tiny_bart(os.path.join(tempfile.gettempdir(), 'tiny-bart'))
+    elif args.bart_model:
+        env['SUMMARIZER_MODEL'] = args.bart_model
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for name in names:
+            result_path = os.path.join(temp_dir, f"{name}.json")
+            command = [sys.executable, '-m', 'benchmarks.cold_start', '--worker', name,
+                       '--launched', repr(time.time()), '--result', result_path,
+                       '--ready-timeout', str(args.ready_timeout)]
+            subprocess.run(command, check=True, env=env)
+            with open(result_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            results.append(result)
+            print(f"{name:14s} status {result['status']}  first response after {result['time_to_first_response_s']:7.2f} s "
+                  f"(import {result['import_s']:.2f}, create_app {result['create_app_s']:.2f}, "
+                  f"warm-up {result['ready_wait_s']:.2f}, request {result['first_request_s']:.2f})  "
+                  f"second request {result['second_request_s']:.3f} s  "
+                  f"loaded: {', '.join(result['heavy_modules']) or '-'}", flush=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""Deterministic synthetic inputs for the benchmarks."""
+import random
+
+SUBJECTS = ["The cell membrane", "Photosynthesis", "The Calvin cycle", "Mitochondria", "The enzyme",
+            "Osmosis", "The nervous system", "Natural selection", "The experiment", "Gene expression",
+            "The lecture", "Thermodynamics", "The algorithm", "Supply and demand", "The treaty"]
+VERBS = ["regulates", "converts", "depends on", "produces", "transports", "describes", "limits",
+         "increases", "explains", "requires", "controls", "measures"]
+OBJECTS = ["chemical energy", "the concentration gradient", "carbon dioxide", "protein synthesis",
+           "the membrane potential", "glucose molecules", "market equilibrium", "heat transfer",
+           "the final exam", "water balance", "population growth", "the reaction rate", "sorting time"]
+QUALIFIERS = ["in most organisms", "under normal conditions", "during the second phase",
+              "according to the textbook", "at higher temperatures", "in the long run", "", "", ""]
+
+
+def make_sentences(count, seed=0):
+    """Return count reproducible note-like sentences."""
+    rng = random.Random(seed)
+    sentences = []
+    for _ in range(count):
+        parts = [rng.choice(SUBJECTS), rng.choice(VERBS), rng.choice(OBJECTS), rng.choice(QUALIFIERS)]
+        sentences.append(" ".join(part for part in parts if part) + ".")
+    return sentences
+
+
+def make_text(sentence_count, seed=0):
+    """Return reproducible note text with sentence_count sentences."""
+    return " ".join(make_sentences(sentence_count, seed))
+
+
+def make_note_image(lines, seed=0, width=1275):
+    """Render lines of synthetic notes onto a white grayscale page image."""
+    import cv2
+    import numpy as np
+
+    height = max(200, 90 + lines * 75)
+    image = np.full((height, width), 255, dtype=np.uint8)
+    for line, sentence in enumerate(make_sentences(lines, seed)):
+        cv2.putText(image, sentence[:60], (60, 90 + line * 75), cv2.FONT_HERSHEY_SIMPLEX, 1.1, 0, 2)
+    return image
+
+
+def make_scanned_pdf(pages, lines_per_page=20, seed=0):
+    """Build a PDF whose pages are images of text, with no text layer."""
+    import cv2
+    import fitz
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        ok, png = cv2.imencode('.png', make_note_image(lines_per_page, seed + page_num, width=1275))
+        page = doc.new_page(width=612, height=792)
+        page.insert_image(page.rect, stream=png.tobytes())
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def make_text_pdf(pages, lines_per_page=40, seed=0):
+    """Build a PDF with a regular text layer."""
+    import fitz
+
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((50, 60), "\n".join(make_sentences(lines_per_page, seed + page_num)), fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
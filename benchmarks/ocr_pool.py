@@ -0,0 +1,68 @@
+"""
+Images/second of pooled Tesseract OCR versus a fresh tesseract subprocess per call.
+
+Usage: python -m benchmarks.ocr_pool --images 32 --lines 20
+
+Runs the same synthetic note images through:
+  - the previous path: full-image threshold and pytesseract.image_to_string,
+    one call at a time
+  - the same per-call subprocess, run from OCR_WORKERS threads
+  - the persistent pool on the full image (no region detection)
+  - the persistent pool with downsampling, deskew and region detection
+The pool only keeps language data loaded when tesserocr is installed.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytesseract
+
+from benchmarks.corpora import make_note_image
+from utils import ocr
+
+
+def per_call(image):
+    return pytesseract.image_to_string(ocr.preprocess_image(image))
+
+
+def pooled(image, roi):
+    processed, regions = ocr.prepare_image(image, roi=roi)
+    return ocr.recognize_regions(processed, regions)
+
+
+def time_call(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=32)
+    parser.add_argument('--lines', type=int, default=20, help='text lines per image')
+    args = parser.parse_args()
+
+    images = [make_note_image(args.lines, seed) for seed in range(args.images)]
+    # Start the workers (and load language data) before timing
+    ocr.get_pool().recognize(ocr.preprocess_image(images[0]))
+
+    def threaded_per_call():
+        with ThreadPoolExecutor(max_workers=ocr.OCR_WORKERS) as executor:
+            list(executor.map(per_call, images))
+
+    def pool(roi):
+        return lambda: [result() for result in [pooled(image, roi) for image in images]]
+
+    results = {
+        'per-call subprocess, serial': time_call(lambda: [per_call(image) for image in images]),
+        f'per-call subprocess, {ocr.OCR_WORKERS} threads': time_call(threaded_per_call),
+        f'pool ({ocr.OCR_WORKERS} workers), full image': time_call(pool(False)),
+        f'pool ({ocr.OCR_WORKERS} workers), regions': time_call(pool(True)),
+    }
+    print(f"engine: {'tesserocr (persistent)' if ocr.HAS_TESSEROCR else 'pytesseract (subprocess per call)'}")
+    for name, seconds in results.items():
+        print(f"{name:45s} {seconds:8.2f}s  {args.images / seconds:6.2f} images/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Pages/second of the per-page PDF pipeline versus the previous serial path.
+
+Usage: python -m benchmarks.pdf_ocr --pages 16
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import fitz
+import pytesseract
+
+from benchmarks.corpora import make_scanned_pdf
+from utils import ocr
+
+
+def serial_baseline(pdf_bytes, lang='eng'):
+    """The previous path: rasterize every page to a PNG on disk and OCR it sequentially."""
+    text = ""
+    with tempfile.TemporaryDirectory() as temp_dir, fitz.open(stream=pdf_bytes, filetype='pdf') as doc:
+        for page_num in range(len(doc)):
+            img_path = os.path.join(temp_dir, f"temp_page_{page_num}.png")
+            doc[page_num].get_pixmap().save(img_path)
+            text += pytesseract.image_to_string(ocr.preprocess_image(img_path), lang=lang)
+            os.remove(img_path)
+    return text
+
+
+def pipeline(pdf_bytes, parallel):
+    with fitz.open(stream=pdf_bytes, filetype='pdf') as doc:
+        return "".join(ocr.extract_pdf_pages(doc, parallel=parallel))
+
+
+def time_call(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=16)
+    args = parser.parse_args()
+
+    pdf_bytes = make_scanned_pdf(args.pages)
+    # Start the OCR workers before timing so their start-up is not attributed to the first run
+    ocr.get_pool()
+
+    results = {
+        'serial (disk round-trip)': time_call(serial_baseline, pdf_bytes),
+        'pipeline, in-memory, serial': time_call(pipeline, pdf_bytes, False),
+        f'pipeline, in-memory, {ocr.OCR_WORKERS} pool workers': time_call(pipeline, pdf_bytes, True),
+    }
+    for name, seconds in results.items():
+        print(f"{name:40s} {seconds:8.2f}s  {args.pages / seconds:6.2f} pages/s")
+
+
+if __name__ == '__main__':
+    main()
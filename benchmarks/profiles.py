@@ -0,0 +1,121 @@
+"""
+Compare summarizer inference profiles: latency, peak RSS and ROUGE against fp32.
+
+Usage:
+    python -m benchmarks.profiles --profiles fp32,int8 --corpus notes_dir/ --report profiles.md
+
+Each profile runs in its own process so peak RSS is measured per profile.
+The corpus is a directory of .txt files; without one, synthetic notes are
+used. ROUGE compares each profile's summaries with the fp32 summaries, so
+it measures how far a cheaper profile drifts from the baseline model.
+"""
+import argparse
+import glob
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import corpora
+from benchmarks.rouge import rouge
+
+
+def load_corpus(directory, size):
+    if directory:
+        documents = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.txt')))[:size]:
+            with open(path, 'r', encoding='utf-8') as f:
+                documents.append(f.read())
+        return documents
+    return [corpora.make_text(40, seed) for seed in range(size)]
+
+
+def run_worker(profile, corpus_dir, size, length, output):
+    """Load one profile in this process and time summarizing the corpus."""
+    os.environ['SUMMARIZER_PROFILE'] = profile
+    start = time.perf_counter()
+    from utils import summarizer
+    summarizer.get_model()
+    load_seconds = time.perf_counter() - start
+    import torch
+
+    documents = load_corpus(corpus_dir, size)
+    summaries, latencies = [], []
+    for document in documents:
+        start = time.perf_counter()
+        summaries.append(summarizer.summarize(document, length))
+        latencies.append(time.perf_counter() - start)
+
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'profile': profile,
+            'model_id': summarizer.MODEL_ID,
+            'threads': torch.get_num_threads(),
+            'load_s': load_seconds,
+            'latency_median_s': statistics.median(latencies),
+            'latency_mean_s': statistics.mean(latencies),
+            # ru_maxrss is reported in KiB on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'summaries': summaries,
+        }, f)
+
+
+def render_report(results):
+    baseline = next((r for r in results if r['profile'] == 'fp32'), None)
+    lines = ["| profile | load s | median latency s | peak RSS MB | ROUGE-1 | ROUGE-2 | ROUGE-L |",
+             "|---|---|---|---|---|---|---|"]
+    for result in results:
+        scores = {'rouge1': float('nan'), 'rouge2': float('nan'), 'rougeL': float('nan')}
+        if baseline:
+            pairs = [rouge(c, r) for c, r in zip(result['summaries'], baseline['summaries'])]
+            scores = {k: statistics.mean(p[k] for p in pairs) for k in scores}
+        result['rouge_vs_fp32'] = scores
+        lines.append(f"| {result['profile']} | {result['load_s']:.1f} | {result['latency_median_s']:.3f} | "
+                     f"{result['peak_rss_mb']:.0f} | {scores['rouge1']:.3f} | {scores['rouge2']:.3f} | "
+                     f"{scores['rougeL']:.3f} |")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--profiles', default='fp32,int8')
+    parser.add_argument('--corpus', help='directory of .txt documents')
+    parser.add_argument('--size', type=int, default=20, help='number of documents to summarize')
+    parser.add_argument('--length', default='medium')
+    parser.add_argument('--report', default='profiles_report.md')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker, args.corpus, args.size, args.length, args.output)
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for profile in args.profiles.split(','):
+            output = os.path.join(temp_dir, f"{profile}.json")
+            command = [sys.executable, '-m', 'benchmarks.profiles', '--worker', profile, '--output', output,
+                       '--size', str(args.size), '--length', args.length]
+            if args.corpus:
+                command += ['--corpus', args.corpus]
+            print(f"Running profile {profile}...", flush=True)
+            subprocess.run(command, check=True)
+            with open(output, 'r', encoding='utf-8') as f:
+                results.append(json.load(f))
+
+    report = render_report(results)
+    with open(args.report, 'w', encoding='utf-8') as f:
+        f.write(report)
+    with open(os.path.splitext(args.report)[0] + '.json', 'w', encoding='utf-8') as f:
+        json.dump([{k: v for k, v in r.items() if k != 'summaries'} for r in results], f, indent=2)
+    print(report)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
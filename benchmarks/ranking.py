@@ -0,0 +1,96 @@
+"""
+Check the factored PageRank used for extractive ranking against the dense similarity matrix.
+
+Usage:
+    python -m benchmarks.ranking --sizes 500,2000,5000 --corpus notes_dir/
+
+For each size the same sentences are ranked both ways. The report shows the
+largest score difference, Spearman correlation, overlap of the top 30% of
+sentences (what a medium summary keeps), and time and peak traced memory of
+each path. The corpus is a directory of .txt files whose sentences are
+concatenated; without one, synthetic notes are used.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from benchmarks import corpora
+
+
+def load_sentences(directory, size):
+    if not directory:
+        return corpora.make_sentences(size)
+    from nltk.tokenize import sent_tokenize
+    sentences = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.txt'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            sentences.extend(sent_tokenize(f.read()))
+        if len(sentences) >= size:
+            break
+    return sentences[:size]
+
+
+def measure(fn):
+    """Return (result, seconds, peak traced MB) of one call."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak / (1024 * 1024)
+
+
+def compare(sentences):
+    import numpy as np
+    from scipy.stats import spearmanr
+    from models.summarizer import Summarizer
+    from models.textrank import build_term_matrix, cosine_similarity_matrix, factored_pagerank, pagerank
+
+    summarizer = Summarizer()
+    term_matrix, _ = build_term_matrix([summarizer._tokenize_sentence(sentence) for sentence in sentences])
+    dense, dense_s, dense_mb = measure(lambda: pagerank(cosine_similarity_matrix(term_matrix)))
+    factored, factored_s, factored_mb = measure(lambda: factored_pagerank(term_matrix))
+
+    top = max(1, int(len(sentences) * 0.3))
+    overlap = len(set(np.argsort(-dense, kind="stable")[:top]) & set(np.argsort(-factored, kind="stable")[:top]))
+    return {
+        'sentences': len(sentences),
+        'max_abs_diff': float(np.abs(dense - factored).max()),
+        'spearman': float(spearmanr(dense, factored)[0]),
+        'top30_overlap': overlap / top,
+        'dense_s': dense_s,
+        'dense_peak_mb': dense_mb,
+        'factored_s': factored_s,
+        'factored_peak_mb': factored_mb,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='500,2000,5000', help='comma-separated sentence counts')
+    parser.add_argument('--corpus', help='directory of .txt documents')
+    parser.add_argument('--output', default='ranking_results.json')
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(',') if size):
+        result = compare(load_sentences(args.corpus, size))
+        results.append(result)
+        print(f"{result['sentences']:6d} sentences  max diff {result['max_abs_diff']:.2e}  "
+              f"spearman {result['spearman']:.4f}  top30 {result['top30_overlap']:.3f}  "
+              f"dense {result['dense_s'] * 1000:8.1f} ms {result['dense_peak_mb']:8.1f} MB  "
+              f"factored {result['factored_s'] * 1000:8.1f} ms {result['factored_peak_mb']:8.1f} MB", flush=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
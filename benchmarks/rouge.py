@@ -0,0 +1,41 @@
+"""Minimal ROUGE-1/2/L F1 so the comparison report has no extra dependencies."""
+import re
+from collections import Counter
+
+
+def _tokens(text):
+    return re.findall(r"\w+", text.lower())
+
+
+def _f1(overlap, candidate_total, reference_total):
+    if not overlap or not candidate_total or not reference_total:
+        return 0.0
+    precision = overlap / candidate_total
+    recall = overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    cand = Counter(zip(*[_tokens(candidate)[i:] for i in range(n)]))
+    ref = Counter(zip(*[_tokens(reference)[i:] for i in range(n)]))
+    return _f1(sum((cand & ref).values()), sum(cand.values()), sum(ref.values()))
+
+
+def rouge_l(candidate, reference):
+    cand, ref = _tokens(candidate), _tokens(reference)
+    # Longest common subsequence, one row at a time
+    previous = [0] * (len(ref) + 1)
+    for token in cand:
+        current = [0]
+        for j, ref_token in enumerate(ref):
+            current.append(previous[j] + 1 if token == ref_token else max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(cand), len(ref))
+
+
+def rouge(candidate, reference):
+    return {
+        'rouge1': rouge_n(candidate, reference, 1),
+        'rouge2': rouge_n(candidate, reference, 2),
+        'rougeL': rouge_l(candidate, reference),
+    }
@@ -0,0 +1,215 @@
+"""
+Micro-benchmarks for the summarization, mindmap and OCR hot paths.
+
+Usage:
+    python -m benchmarks                                  # run every stage
+    python -m benchmarks --stages extractive,mindmap      # run selected stages
+    python -m benchmarks --output results.json --baseline baseline.json --threshold 0.25
+
+Each stage is timed over increasing input sizes and reported with its
+scaling exponent between consecutive sizes (1.0 is linear, 2.0 quadratic).
+With --baseline, median times are compared to a stored results file and the
+run exits with status 1 if any stage regressed by more than --threshold.
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks import corpora
+
+
+def _extractive(size):
+    from models.summarizer import Summarizer
+    summarizer = Summarizer()
+    text = corpora.make_text(size)
+    return lambda: summarizer.summarize(text, "medium", "paragraph")
+
+
+def _extractive_edit(size):
+    from models.summarizer import Summarizer
+    summarizer = Summarizer()
+    sentences = corpora.make_sentences(size)
+    versions = [" ".join(sentences), " ".join(sentences[:-1] + ["The final remark was revised after review."])]
+    summarizer.summarize(versions[0], "medium", "paragraph", document_id="bench")
+    edits = itertools.count()
+    # Alternate between two versions differing in one sentence, as repeated small edits would
+    return lambda: summarizer.summarize(versions[next(edits) % 2], "medium", "paragraph", document_id="bench")
+
+
+def _extractive_large(size):
+    from models.summarizer import Summarizer
+    summarizer = Summarizer()
+    text = corpora.make_text(size)
+    return lambda: summarizer.summarize(text, "short", "paragraph")
+
+
+def _mindmap_model(size):
+    from models.min_map import MindMapGenerator
+    generator = MindMapGenerator()
+    text = corpora.make_text(size)
+    return lambda: generator.generate_mindmap(text, "json")
+
+
+def _overview(size):
+    from models.summarizer import overview_in_process
+    text = corpora.make_text(size)
+    return lambda: overview_in_process(text, "medium")
+
+
+def _mindmap_utils(size):
+    from utils.mindmap import generate_mindmap
+    text = corpora.make_text(size)
+    return lambda: generate_mindmap(text)
+
+
+def _ocr_preprocess(size):
+    from utils.ocr import preprocess_image
+    image = corpora.make_note_image(size)
+    return lambda: preprocess_image(image)
+
+
+def _bart(size):
+    from utils import summarizer
+    text = corpora.make_text(size)
+    return lambda: summarizer.summarize(text, "short", "paragraph")
+
+
+def _bart_document(size):
+    from utils import summarizer
+    text = corpora.make_text(size)
+    return lambda: summarizer.summarize_document(text, "short", "paragraph")
+
+
+def _bart_precompress(size):
+    from utils import summarizer
+    from utils.pipeline import condense_text
+    text = corpora.make_text(size)
+    return lambda: summarizer.summarize_document(condense_text(text)[0], "short", "paragraph")
+
+
+# name -> (input sizes, setup(size) returning the callable to time, unit of size)
+STAGES = {
+    'extractive': ([10, 100, 1000, 3000], _extractive, 'sentences'),
+    'extractive_edit': ([10, 100, 1000, 3000], _extractive_edit, 'sentences'),
+    'extractive_large': ([5000, 20000, 50000], _extractive_large, 'sentences'),
+    'mindmap_model': ([10, 100, 1000, 10000], _mindmap_model, 'sentences'),
+    'mindmap_utils': ([10, 100, 1000, 10000], _mindmap_utils, 'sentences'),
+    'overview': ([10, 100, 1000, 10000], _overview, 'sentences'),
+    'ocr_preprocess': ([5, 20, 80], _ocr_preprocess, 'text lines'),
+    'bart': ([10, 50, 200], _bart, 'sentences'),
+    'bart_document': ([50, 200, 800], _bart_document, 'sentences'),
+    'bart_precompress': ([50, 200, 800], _bart_precompress, 'sentences'),
+}
+
+
+def time_stage(fn, repeat):
+    """Run fn once to warm up, then repeat times; return timing statistics in seconds."""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {'min_s': min(samples), 'median_s': statistics.median(samples)}
+
+
+def scaling_exponents(points):
+    """Empirical exponent k in t ~ n^k between consecutive sizes."""
+    exponents = []
+    for a, b in zip(points, points[1:]):
+        if a['median_s'] > 0 and b['median_s'] > 0:
+            exponents.append(round(math.log(b['median_s'] / a['median_s']) / math.log(b['size'] / a['size']), 2))
+    return exponents
+
+
+def run(stage_names, repeat, max_size=None):
+    results = {}
+    for name in stage_names:
+        sizes, setup, unit = STAGES[name]
+        points = []
+        try:
+            for size in sizes:
+                if max_size and size > max_size:
+                    continue
+                point = {'size': size, **time_stage(setup(size), repeat)}
+                points.append(point)
+                print(f"{name:16s} {size:6d} {unit:10s} median {point['median_s'] * 1000:10.2f} ms", flush=True)
+        except ImportError as e:
+            print(f"{name:16s} skipped: {e}")
+            results[name] = {'skipped': str(e)}
+            continue
+        results[name] = {'unit': unit, 'points': points, 'scaling': scaling_exponents(points)}
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (stage, size, ratio) for every point slower than baseline by more than threshold."""
+    regressions = []
+    for name, stage in results.items():
+        previous = {p['size']: p for p in baseline.get('results', {}).get(name, {}).get('points', [])}
+        for point in stage.get('points', []):
+            base = previous.get(point['size'])
+            if base and base['median_s'] > 0:
+                ratio = point['median_s'] / base['median_s']
+                if ratio > 1 + threshold:
+                    regressions.append((name, point['size'], ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--stages', default=','.join(STAGES), help='comma-separated stage names')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-size', type=int, help='skip input sizes above this')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--baseline', help='results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, 0.25 = 25%%')
+    parser.add_argument('--bart-model', help='BART checkpoint for the bart stage (default: tiny offline model)')
+    args = parser.parse_args(argv)
+
+    # utils.summarizer reads SUMMARIZER_MODEL at import time, so set it before any stage runs
+    if 'SUMMARIZER_MODEL' not in os.environ:
+        if args.bart_model:
+            os.environ['SUMMARIZER_MODEL'] = args.bart_model
+        elif any(name.startswith('bart') for name in args.stages.split(',')):
+            from benchmarks.tiny_bart import build_tiny_bart
+            os.environ['SUMMARIZER_MODEL'] = build_tiny_bart(os.path.join(tempfile.gettempdir(), 'tiny-bart'))
+
+    stage_names = [name for name in args.stages.split(',') if name]
+    unknown = set(stage_names) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    output = {
+        'meta': {
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'bart_model': os.environ.get('SUMMARIZER_MODEL'),
+            'repeat': args.repeat,
+        },
+        'results': run(stage_names, args.repeat, args.max_size),
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(output['results'], json.load(f), args.threshold)
+        for name, size, ratio in regressions:
+            print(f"REGRESSION {name} at {size}: {ratio:.2f}x baseline")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
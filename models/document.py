@@ -0,0 +1,131 @@
+from nltk.tag.perceptron import PerceptronTagger
+from nltk.tokenize import sent_tokenize, word_tokenize
+import numpy as np
+import threading
+from collections import OrderedDict
+from scipy import sparse
+from typing import Dict, List, Optional, Set
+
+from utils import nltk_data
+
+# Words whose POS tag is remembered across documents, least recently used dropped first
+POS_CACHE_WORDS = 50000
+
+_pos_cache: "OrderedDict[str, str]" = OrderedDict()
+_pos_lock = threading.Lock()
+_tagger: Optional[PerceptronTagger] = None
+
+
+def word_tags(words: List[str]) -> Dict[str, str]:
+    """
+    POS tag of each word, tagged on its own so a word always gets the same tag.
+
+    Tags are kept in a bounded LRU shared across documents; only words not
+    in it are tagged.
+    """
+    global _tagger
+    tags = {}
+    with _pos_lock:
+        unseen = []
+        for word in words:
+            if word in _pos_cache:
+                _pos_cache.move_to_end(word)
+                tags[word] = _pos_cache[word]
+            else:
+                unseen.append(word)
+        if unseen:
+            if _tagger is None:
+                nltk_data.require('averaged_perceptron_tagger')
+                _tagger = PerceptronTagger()
+            # One call for all of them; each word is still its own sentence, so its tag
+            # does not depend on which other words happened to be uncached
+            for word, ((_, tag),) in zip(unseen, _tagger.tag_sents([[word] for word in unseen])):
+                tags[word] = _pos_cache[word] = tag
+            while len(_pos_cache) > POS_CACHE_WORDS:
+                _pos_cache.popitem(last=False)
+    return tags
+
+
+class AnalyzedDocument:
+    """
+    Sentences and tokens of a text from a single tokenization pass, in flat arrays.
+
+    Every alphanumeric token is stored lowercased as an id into ``terms``;
+    sentence i owns ``token_ids[offsets[i]:offsets[i + 1]]``. Stopwords are
+    kept in the token stream and marked per term, so consumers that need them
+    (or not) share one pass. The extractive summarizer and the mind map
+    generator both consume this object, so a text summarized and mapped in
+    one request is tokenized once.
+    """
+
+    def __init__(self, sentences: List[str], terms: List[str], token_ids: np.ndarray, offsets: np.ndarray,
+                 stopword: np.ndarray):
+        self.sentences = sentences
+        self.terms = terms
+        self.vocabulary = {term: i for i, term in enumerate(terms)}
+        self.token_ids = token_ids
+        self.offsets = offsets
+        self.stopword = stopword
+        self._content = ~stopword[token_ids]
+        # Occurrences of each term outside stopwords, indexed by term id
+        self.term_freq = np.bincount(token_ids[self._content], minlength=len(terms))
+        self._term_matrix: Optional[sparse.csr_matrix] = None
+        self._pos_tags: Optional[Dict[str, str]] = None
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def sentence_tokens(self, i: int) -> List[str]:
+        """Content words of sentence i, in order."""
+        start, end = self.offsets[i], self.offsets[i + 1]
+        ids = self.token_ids[start:end][self._content[start:end]]
+        return [self.terms[term_id] for term_id in ids]
+
+    def term_matrix(self) -> sparse.csr_matrix:
+        """Binary sentence x term matrix of content words, built on first use."""
+        if self._term_matrix is None:
+            rows = np.repeat(np.arange(len(self.sentences)), np.diff(self.offsets))[self._content]
+            # A term counts once per sentence, matching build_term_matrix
+            keys = np.unique(rows * len(self.terms) + self.token_ids[self._content])
+            self._term_matrix = sparse.csr_matrix(
+                (np.ones(len(keys)), (keys // len(self.terms), keys % len(self.terms))),
+                shape=(len(self.sentences), len(self.terms)))
+        return self._term_matrix
+
+    def content_terms(self) -> np.ndarray:
+        """Ids of terms occurring outside stopwords, in first-appearance order."""
+        return np.flatnonzero(self.term_freq)
+
+    def pos_tags(self) -> Dict[str, str]:
+        """POS tag of every content term, tagging only words not seen in recent documents."""
+        if self._pos_tags is None:
+            self._pos_tags = word_tags([self.terms[term_id] for term_id in self.content_terms()])
+        return self._pos_tags
+
+    def concept_matrix(self, concepts: List[str]) -> sparse.csc_matrix:
+        """Binary sparse sentence x concept matrix; concepts not in the text get empty columns."""
+        present = [i for i, concept in enumerate(concepts) if concept in self.vocabulary]
+        selector = sparse.csr_matrix(
+            (np.ones(len(present)), ([self.vocabulary[concepts[i]] for i in present], present)),
+            shape=(len(self.terms), len(concepts)))
+        matrix = (self.term_matrix() @ selector).tocsc()
+        matrix.sort_indices()
+        return matrix
+
+
+def analyze(text: str, stop_words: Set[str]) -> AnalyzedDocument:
+    """Split text into sentences and tokenize each once into an AnalyzedDocument."""
+    nltk_data.require('punkt')
+    sentences = sent_tokenize(text)
+    vocabulary: Dict[str, int] = {}
+    token_ids: List[int] = []
+    offsets = [0]
+    for sentence in sentences:
+        token_ids.extend(vocabulary.setdefault(word.lower(), len(vocabulary))
+                         for word in word_tokenize(sentence) if word.isalnum())
+        offsets.append(len(token_ids))
+
+    terms = list(vocabulary)
+    stopword = np.array([term in stop_words for term in terms], dtype=bool)
+    return AnalyzedDocument(sentences, terms, np.array(token_ids, dtype=np.int32),
+                            np.array(offsets, dtype=np.int64), stopword)
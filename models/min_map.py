@@ -1,71 +1,122 @@
-import nltk
-from nltk.tokenize import sent_tokenize, word_tokenize
+import json
 from nltk.corpus import stopwords
-from nltk import pos_tag
-from collections import Counter
-import networkx as nx
-from typing import Dict, List, Tuple, Any
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
 
-# Download necessary NLTK data
-nltk.download('averaged_perceptron_tagger', quiet=True)
+from models.document import AnalyzedDocument, analyze
+from utils import nltk_data
+from utils.metrics import stage
 
 class MindMapGenerator:
     def __init__(self):
+        nltk_data.require('punkt', 'stopwords', 'averaged_perceptron_tagger')
         self.stop_words = set(stopwords.words('english'))
-        
-    def extract_key_concepts(self, text: str, max_concepts: int = 7) -> List[str]:
-        """Extract key concepts from text."""
-        # Tokenize and filter words
-        words = word_tokenize(text.lower())
-        filtered_words = [word for word in words if word.isalnum() and word not in self.stop_words]
-        
-        # Get word frequency
-        word_freq = Counter(filtered_words)
-        
-        # Get part-of-speech tags
-        pos_tags = pos_tag(list(word_freq.keys()))
+    
+    def index_text(self, text: str) -> AnalyzedDocument:
+        """Tokenize text once into sentences of lowercase content words."""
+        return analyze(text, self.stop_words)
+    
+    def _key_concepts(self, index: AnalyzedDocument, max_concepts: int) -> List[str]:
+        tags = index.pos_tags()
         
         # Extract nouns which are likely to be concepts
-        nouns = [(word, word_freq[word]) for word, tag in pos_tags if tag.startswith('NN')]
+        nouns = [(index.terms[term_id], int(index.term_freq[term_id])) for term_id in index.content_terms()
+                 if tags[index.terms[term_id]].startswith('NN')]
         
-        # Sort by frequency and take top N
-        top_concepts = [word for word, _ in sorted(nouns, key=lambda x: x[1], reverse=True)[:max_concepts]]
+        # Sort by frequency and take top N; ties keep first-appearance order
+        return [word for word, _ in sorted(nouns, key=lambda x: x[1], reverse=True)[:max_concepts]]
+    
+    def _weighted_relationships(self, index: AnalyzedDocument, concepts: List[str]) -> Dict[str, List[Tuple[str, int]]]:
+        """
+        Co-occurrence edges between concepts, weighted by the number of shared sentences.
         
-        return top_concepts
+        Each concept's neighbours are ordered by the first sentence they share,
+        then by concept order.
+        """
+        matrix = index.concept_matrix(concepts)
+        # Shared sentence counts of every concept pair in one sparse product
+        cooccurrence = np.rint((matrix.T @ matrix).toarray()).astype(np.int64)
+        np.fill_diagonal(cooccurrence, 0)
+        # Sentences containing each concept, ascending
+        sentences = [matrix.indices[matrix.indptr[i]:matrix.indptr[i + 1]] for i in range(len(concepts))]
         
+        relationships = {}
+        for i, concept in enumerate(concepts):
+            neighbours = np.flatnonzero(cooccurrence[i]).tolist()
+            first_shared = {j: np.intersect1d(sentences[i], sentences[j], assume_unique=True)[0] for j in neighbours}
+            neighbours.sort(key=lambda j: (first_shared[j], j))
+            relationships[concept] = [(concepts[j], int(cooccurrence[i, j])) for j in neighbours]
+        return relationships
+    
+    def extract_key_concepts(self, text: str, max_concepts: int = 7) -> List[str]:
+        """Extract key concepts from text."""
+        return self._key_concepts(self.index_text(text), max_concepts)
+    
     def extract_relationships(self, text: str, concepts: List[str]) -> Dict[str, List[str]]:
         """Extract relationships between concepts."""
-        sentences = sent_tokenize(text)
-        relationships = {concept: [] for concept in concepts}
-        
-        for sentence in sentences:
-            sentence_lower = sentence.lower()
-            # Check which concepts appear in this sentence
-            present_concepts = [concept for concept in concepts if concept in sentence_lower]
-            
-            # If multiple concepts appear in the same sentence, they might be related
-            if len(present_concepts) > 1:
-                for i, concept1 in enumerate(present_concepts):
-                    for concept2 in present_concepts[i+1:]:
-                        if concept2 not in relationships[concept1]:
-                            relationships[concept1].append(concept2)
-                        if concept1 not in relationships[concept2]:
-                            relationships[concept2].append(concept1)
-        
-        return relationships
+        weighted = self._weighted_relationships(self.index_text(text), concepts)
+        return {concept: [related for related, _ in edges] for concept, edges in weighted.items()}
     
-    def generate_mindmap(self, text: str, format_type: str = "text") -> str:
-        """Generate a mind map from text."""
-        # Extract concepts
-        concepts = self.extract_key_concepts(text)
+    def _concept_map(self, text: str, max_concepts: int,
+                     document: Optional[AnalyzedDocument]) -> Optional[Tuple[List[str], Dict[str, List[Tuple[str, int]]], str]]:
+        """Key concepts, their weighted relationships and the main concept; None when no concepts are found."""
+        # Tokenize once (unless the caller already has) and extract concepts
+        with stage('mindmap.concepts', chars=len(text)) as info:
+            index = document if document is not None else self.index_text(text)
+            info['sentences'] = len(index)
+            concepts = self._key_concepts(index, max_concepts)
         if not concepts:
-            return "Could not generate mind map: no key concepts found."
+            return None
         
-        # Extract relationships
-        relationships = self.extract_relationships(text, concepts)
+        # Extract weighted relationships
+        with stage('mindmap.relationships', concepts=len(concepts)):
+            weighted = self._weighted_relationships(index, concepts)
         
         # Select main concept (most connected)
-        main_concept = max(concepts, key=lambda c: len(relationships[c]))
+        main_concept = max(concepts, key=lambda c: len(weighted[c]))
+        return concepts, weighted, main_concept
+    
+    def _mindmap_data(self, concepts: List[str], weighted: Dict[str, List[Tuple[str, int]]],
+                      main_concept: str) -> Dict[str, Any]:
+        # JSON structure for use with visualization libraries
+        mindmap_data = {
+            "central": main_concept.capitalize(),
+            "branches": []
+        }
+        central_weights = dict(weighted[main_concept])
+        
+        for concept in concepts:
+            if concept != main_concept:
+                branch = {
+                    "name": concept.capitalize(),
+                    "weight": central_weights.get(concept, 0),
+                    "sub_branches": []
+                }
+                
+                for related, weight in weighted[concept]:
+                    if related != main_concept:
+                        branch["sub_branches"].append({
+                            "name": related.capitalize(),
+                            "weight": weight
+                        })
+                
+                mindmap_data["branches"].append(branch)
+        return mindmap_data
+    
+    def mindmap_data(self, text: str, max_concepts: int = 7,
+                     document: Optional[AnalyzedDocument] = None) -> Optional[Dict[str, Any]]:
+        """Mind map as a {central, branches} dict; None when no key concepts are found."""
+        concept_map = self._concept_map(text, max_concepts, document)
+        return self._mindmap_data(*concept_map) if concept_map is not None else None
+    
+    def generate_mindmap(self, text: str, format_type: str = "text", max_concepts: int = 7,
+                         document: Optional[AnalyzedDocument] = None) -> str:
+        """Generate a mind map from text, or from its AnalyzedDocument when one is passed."""
+        concept_map = self._concept_map(text, max_concepts, document)
+        if concept_map is None:
+            return "Could not generate mind map: no key concepts found."
+        concepts, weighted, main_concept = concept_map
+        relationships = {concept: [related for related, _ in edges] for concept, edges in weighted.items()}
         
         # Generate mind map based on format type
         if format_type == "text":
@@ -79,35 +130,13 @@ class MindMapGenerator:
                     
                     # Add sub-branches (related concepts)
                     for j, related in enumerate(relationships[concept]):
-                        if related != main_concept and related in concepts:
+                        if related != main_concept:
                             mindmap += f"  Sub-branch {i}.{j}: {related.capitalize()}\n"
             
             return mindmap
             
         elif format_type == "json":
-            # JSON structure for use with visualization libraries
-            mindmap_data = {
-                "central": main_concept.capitalize(),
-                "branches": []
-            }
-            
-            for concept in concepts:
-                if concept != main_concept:
-                    branch = {
-                        "name": concept.capitalize(),
-                        "sub_branches": []
-                    }
-                    
-                    for related in relationships[concept]:
-                        if related != main_concept and related in concepts:
-                            branch["sub_branches"].append({
-                                "name": related.capitalize()
-                            })
-                    
-                    mindmap_data["branches"].append(branch)
-            
-            import json
-            return json.dumps(mindmap_data, indent=2)
+            return json.dumps(self._mindmap_data(concepts, weighted, main_concept), indent=2)
             
         else:
             return "Unsupported mind map format type."
\ No newline at end of file
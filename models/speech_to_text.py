@@ -1,71 +1,564 @@
-import speech_recognition as sr
-from pydub import AudioSegment
+import io
+import logging
 import os
+import shutil
+import subprocess
 import tempfile
-from typing import Optional
+import threading
+import time
+import wave
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
-class SpeechToText:
+from utils.lazy import LazyModule
+
+# SpeechRecognition loads on the first transcription, not with the app
+sr = LazyModule('speech_recognition')
+
+# Segments are cut at the first silent window after MIN_SEGMENT_SECONDS and
+# forcibly at MAX_SEGMENT_SECONDS, which also keeps them under the ~60 s limit
+# of the Google Web Speech API
+MIN_SEGMENT_SECONDS = 5.0
+MAX_SEGMENT_SECONDS = 30.0
+SILENCE_WINDOW_MS = 50
+# Windows quieter than this (RMS relative to full scale) count as silence
+SILENCE_DBFS = -40.0
+STT_BACKEND = os.environ.get('STT_BACKEND', 'google')
+STT_WORKERS = int(os.environ.get('STT_WORKERS', 4))
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+# Audio is decoded to 16 kHz mono 16-bit PCM, what speech recognizers expect
+SAMPLE_RATE = 16000
+# Voiced windows are widened by this much on both sides to keep word onsets and tails
+VAD_HANGOVER_MS = 300
+# Windows converted to float per step when detecting speech in a buffer (1024 windows of 50 ms is ~51 s)
+VAD_BLOCK_WINDOWS = 1024
+# Decoded PCM is read and silence-trimmed this many seconds at a time (320 KB at 16 kHz)
+PCM_BLOCK_SECONDS = 10
+# Compressed input is written to ffmpeg in chunks of this size
+PIPE_CHUNK_BYTES = 64 * 1024
+# Containers that need a seekable input (the index may sit at the end of the file)
+_SEEKABLE_FORMATS = {'m4a', 'mp4', 'mov'}
+
+_SAMPLE_DTYPES = {1: np.uint8, 2: np.int16, 4: np.int32}
+
+logger = logging.getLogger(__name__)
+
+
+class RecognizerBackend:
+    """Turns one audio segment into text; subclasses wrap a recognition service."""
+    
+    def recognize(self, audio: 'sr.AudioData') -> str:
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognizerBackend):
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+    
+    def recognize(self, audio: 'sr.AudioData') -> str:
+        return self.recognizer.recognize_google(audio)
+
+
+class SphinxBackend(RecognizerBackend):
+    """Offline CMU Sphinx recognition (requires pocketsphinx)."""
+    
     def __init__(self):
         self.recognizer = sr.Recognizer()
     
-    def convert_audio_to_wav(self, audio_path: str) -> Optional[str]:
-        """Convert audio file to WAV format for processing."""
+    def recognize(self, audio: 'sr.AudioData') -> str:
+        return self.recognizer.recognize_sphinx(audio)
+
+
+class OfflineStubBackend(RecognizerBackend):
+    """Deterministic stand-in that needs no network or models, for tests and benchmarks."""
+    
+    def recognize(self, audio: 'sr.AudioData') -> str:
+        seconds = len(audio.frame_data) / (audio.sample_rate * audio.sample_width)
+        return f"[{seconds:.1f}s of speech]"
+
+
+BACKENDS = {
+    'google': GoogleBackend,
+    'sphinx': SphinxBackend,
+    'offline': OfflineStubBackend,
+}
+
+
+def get_backend(name: Optional[str] = None) -> RecognizerBackend:
+    """Instantiate a recognizer backend by name (defaults to STT_BACKEND)."""
+    return BACKENDS[name or STT_BACKEND]()
+
+
+def _iter_source_chunks(source: Union[str, bytes, BinaryIO], chunk_bytes: int = PIPE_CHUNK_BYTES) -> Iterator[bytes]:
+    """Yield the bytes of a path, bytes-like object or binary file object in chunks."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_bytes):
+            yield view[start:start + chunk_bytes]
+        return
+    stream = open(source, 'rb') if isinstance(source, str) else source
+    try:
+        for chunk in iter(lambda: stream.read(chunk_bytes), b''):
+            yield chunk
+    finally:
+        if isinstance(source, str):
+            stream.close()
+
+
+def _feed(pipe: BinaryIO, source: Union[str, bytes, BinaryIO]) -> None:
+    """Write source to ffmpeg's stdin; runs on its own thread so stdout is drained meanwhile."""
+    try:
+        for chunk in _iter_source_chunks(source):
+            pipe.write(chunk)
+    except (BrokenPipeError, ValueError):
+        # ffmpeg exited early (bad input) or the reader was closed; its exit status reports why
+        pass
+    finally:
         try:
-            # Create temp file for WAV output
-            temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
-            temp_wav_path = temp_file.name
+            pipe.close()
+        except BrokenPipeError:
+            pass
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    """Read size bytes from a pipe, or fewer at end of stream."""
+    chunks = []
+    while size > 0:
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class _LinearResampler:
+    """Linear interpolation from rate_in to rate_out over consecutive blocks of one stream."""
+    
+    def __init__(self, rate_in: int, rate_out: int):
+        self.step = rate_in / rate_out
+        self.position = 0.0     # next output sample, in input samples from the start of the stream
+        self.offset = 0         # input index of self.previous
+        self.previous: Optional[float] = None
+    
+    def __call__(self, samples: np.ndarray) -> np.ndarray:
+        if self.previous is None:
+            buffer, base = samples, 0
+        else:
+            buffer, base = np.concatenate(([self.previous], samples)), self.offset
+        last = base + len(buffer) - 1
+        count = int((last - self.position) // self.step) + 1 if len(buffer) and self.position <= last else 0
+        positions = self.position + self.step * np.arange(count) - base
+        self.position += count * self.step
+        if len(buffer):
+            self.previous, self.offset = buffer[-1], last
+        return np.interp(positions, np.arange(len(buffer)), buffer)
+
+
+def _open_wav(source: Union[str, bytes, BinaryIO]) -> Optional[wave.Wave_read]:
+    """Open PCM WAV input for streaming, or return None (rewinding file objects) if it is anything else."""
+    handle = io.BytesIO(source) if isinstance(source, (bytes, bytearray, memoryview)) else source
+    try:
+        wav = wave.open(handle, 'rb')
+    except (wave.Error, EOFError):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return None
+    if wav.getsampwidth() not in _SAMPLE_DTYPES:
+        wav.close()
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return None
+    return wav
+
+
+def _iter_wav_pcm(wav: wave.Wave_read, block_samples: int) -> Iterator[np.ndarray]:
+    """Read a WAV window by window, mixing to mono and resampling to SAMPLE_RATE as it goes."""
+    sample_rate = wav.getframerate()
+    sample_width = wav.getsampwidth()
+    channels = wav.getnchannels()
+    frame_bytes = sample_width * channels
+    frames_per_block = max(1, int(block_samples * sample_rate / SAMPLE_RATE))
+    resample = _LinearResampler(sample_rate, SAMPLE_RATE) if sample_rate != SAMPLE_RATE else None
+    with wav:
+        while True:
+            frames = wav.readframes(frames_per_block)
+            frames = frames[:len(frames) - len(frames) % frame_bytes]
+            if not frames:
+                break
+            samples = np.frombuffer(frames, dtype=_SAMPLE_DTYPES[sample_width]).astype(np.float32)
+            if sample_width == 1:
+                samples -= 128
+            samples = samples.reshape(-1, channels).mean(axis=1) / float(2 ** (8 * sample_width - 1))
+            if resample is not None:
+                samples = resample(samples)
+            yield np.clip(samples * 32768, -32768, 32767).astype(np.int16)
+
+
+def _iter_ffmpeg_pcm(source: Union[str, bytes, BinaryIO], file_extension: str,
+                     block_samples: int) -> Iterator[np.ndarray]:
+    """Pipe source through ffmpeg and read its PCM output block_samples at a time."""
+    command = [FFMPEG_BINARY, '-nostdin', '-loglevel', 'error', '-i', 'pipe:0',
+               '-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1']
+    temp_file = None
+    feed = True
+    if file_extension in _SEEKABLE_FORMATS:
+        # ffmpeg can only read these from a seekable file; uploads are spooled to disk chunk by chunk
+        if not isinstance(source, str):
+            temp_file = tempfile.NamedTemporaryFile(suffix=f'.{file_extension}')
+            for chunk in _iter_source_chunks(source):
+                temp_file.write(chunk)
+            temp_file.flush()
+        command[command.index('pipe:0')] = temp_file.name if temp_file else source
+        feed = False
+    
+    stderr = tempfile.TemporaryFile()
+    try:
+        try:
+            process = subprocess.Popen(command, stdin=subprocess.PIPE if feed else subprocess.DEVNULL,
+                                       stdout=subprocess.PIPE, stderr=stderr)
+        except FileNotFoundError:
+            raise RuntimeError(f"ffmpeg is required to decode .{file_extension} audio")
+        feeder = None
+        if feed:
+            feeder = threading.Thread(target=_feed, args=(process.stdin, source), daemon=True)
+            feeder.start()
+        try:
+            while True:
+                data = _read_exactly(process.stdout, block_samples * 2)
+                if len(data) < 2:
+                    break
+                yield np.frombuffer(data[:len(data) - len(data) % 2], dtype=np.int16)
+            if process.wait() != 0:
+                stderr.seek(0)
+                message = stderr.read().decode('utf-8', 'replace').strip()
+                raise RuntimeError(f"Could not decode audio: {message}")
+        finally:
+            # Also reached when the consumer stops early: don't leave ffmpeg running
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            if feeder is not None:
+                feeder.join()
+    finally:
+        stderr.close()
+        if temp_file is not None:
             temp_file.close()
-            
-            # Get file extension
-            _, file_extension = os.path.splitext(audio_path)
-            file_extension = file_extension.lower()
-            
-            # Convert based on file type
-            if file_extension == '.mp3':
-                sound = AudioSegment.from_mp3(audio_path)
-            elif file_extension == '.wav':
-                return audio_path  # Already WAV format
-            elif file_extension == '.ogg':
-                sound = AudioSegment.from_ogg(audio_path)
-            elif file_extension in ['.m4a', '.mp4']:
-                sound = AudioSegment.from_file(audio_path, format='m4a')
-            else:
-                print(f"Unsupported audio format: {file_extension}")
-                return None
-                
-            # Export as WAV
-            sound.export(temp_wav_path, format="wav")
-            return temp_wav_path
-            
-        except Exception as e:
-            print(f"Error converting audio: {e}")
-            return None
+
+
+def iter_pcm(source: Union[str, bytes, BinaryIO], file_extension: Optional[str] = None,
+             block_samples: int = int(PCM_BLOCK_SECONDS * SAMPLE_RATE)) -> Iterator[np.ndarray]:
+    """
+    Decode any ffmpeg-readable audio into 16 kHz mono int16 blocks of block_samples.
+    
+    The input is piped to ffmpeg's stdin while its output is read, so
+    neither the upload nor the decoded PCM is ever held whole, except for
+    MP4-family containers, which ffmpeg can only read from a seekable file.
+    PCM WAV at SAMPLE_RATE, or any PCM WAV when ffmpeg is not installed,
+    is read in-process window by window.
+    """
+    if isinstance(source, str):
+        file_extension = file_extension or os.path.splitext(source)[1]
+    file_extension = (file_extension or 'wav').lower().lstrip('.')
+    
+    if file_extension == 'wav':
+        wav = _open_wav(source)
+        if wav is not None:
+            if wav.getframerate() == SAMPLE_RATE or shutil.which(FFMPEG_BINARY) is None:
+                yield from _iter_wav_pcm(wav, block_samples)
+                return
+            # ffmpeg resamples with proper filtering; rewind for it
+            wav.close()
+            if hasattr(source, 'seek'):
+                source.seek(0)
+    yield from _iter_ffmpeg_pcm(source, file_extension, block_samples)
+
+
+def iter_voiced(blocks: Iterable[np.ndarray], sample_rate: int = SAMPLE_RATE,
+                threshold_dbfs: float = SILENCE_DBFS, window_ms: int = SILENCE_WINDOW_MS,
+                hangover_ms: int = VAD_HANGOVER_MS) -> Iterator[Optional[Tuple[int, np.ndarray]]]:
+    """
+    Find speech in a stream of PCM blocks with an energy detector.
+    
+    Each block is framed into windows whose RMS level is compared to
+    threshold_dbfs; voiced windows are widened by hangover_ms on both sides
+    so word onsets and tails are kept. Only the windows still inside the
+    hangover of an undecided one are held back, so memory stays flat
+    however long the stream is.
+    
+    Yields:
+        (start_sample, audio) fragments of voiced audio in order, and None
+        after the last fragment of each voiced span
+    """
+    window = max(1, sample_rate * window_ms // 1000)
+    pad = hangover_ms // window_ms
+    # RMS above the threshold, expressed on the sum of squares of a (zero-padded) window
+    threshold = window * (32768.0 * 10 ** (threshold_dbfs / 20)) ** 2
+    kernel = np.ones(2 * pad + 1, dtype=np.int32)
+    
+    undecided = np.zeros(0, dtype=np.int16)     # samples from window `decided` on
+    loud = np.zeros(0, dtype=bool)              # loudness of windows loud_start..computed-1
+    loud_start = decided = computed = 0
+    in_span = False
+    
+    def settle(upto):
+        nonlocal undecided, loud, loud_start, decided, in_span
+        if upto <= decided:
+            return
+        count = upto - decided
+        # A window is voiced if any window within pad of it is loud; windows outside the stream are silent
+        around = np.zeros(count + 2 * pad, dtype=np.int32)
+        first, last = max(decided - pad, loud_start), min(upto + pad, computed)
+        around[first - (decided - pad):last - (decided - pad)] = loud[first - loud_start:last - loud_start]
+        voiced = np.convolve(around, kernel, mode='valid') > 0
+        edges = np.diff(np.concatenate(([0], voiced.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        if in_span and not (len(starts) and starts[0] == 0):
+            in_span = False
+            yield None
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            yield (decided + start) * window, undecided[start * window:end * window]
+            in_span = end == count
+            if not in_span:
+                yield None
+        undecided = undecided[count * window:]
+        decided = upto
+        drop = max(decided - pad - loud_start, 0)
+        loud, loud_start = loud[drop:], loud_start + drop
+    
+    for block in blocks:
+        if not len(block):
+            continue
+        undecided = np.concatenate((undecided, block)) if len(undecided) else block
+        available = decided + len(undecided) // window
+        if available > computed:
+            frames = undecided[(computed - decided) * window:(available - decided) * window]
+            frames = frames.reshape(-1, window).astype(np.float32)
+            loud = np.concatenate((loud, np.einsum('ij,ij->i', frames, frames) > threshold))
+            computed = available
+        yield from settle(computed - pad)
+    
+    tail = undecided[(computed - decided) * window:].astype(np.float32)
+    if len(tail):
+        loud = np.append(loud, np.dot(tail, tail) > threshold)
+        computed += 1
+    yield from settle(computed)
+    if in_span:
+        yield None
+
+
+def voiced_spans(samples: np.ndarray, sample_rate: int = SAMPLE_RATE,
+                 threshold_dbfs: float = SILENCE_DBFS, window_ms: int = SILENCE_WINDOW_MS,
+                 hangover_ms: int = VAD_HANGOVER_MS) -> List[Tuple[int, int]]:
+    """
+    Find speech in a PCM buffer (see iter_voiced).
+    
+    The buffer is fed to the detector VAD_BLOCK_WINDOWS windows at a time,
+    so it is never converted to float whole.
+    
+    Returns:
+        (start_sample, end_sample) of each voiced span, in order
+    """
+    step = VAD_BLOCK_WINDOWS * max(1, sample_rate * window_ms // 1000)
+    blocks = (samples[start:start + step] for start in range(0, len(samples), step))
+    spans = []
+    span_start = span_end = None
+    for fragment in iter_voiced(blocks, sample_rate, threshold_dbfs, window_ms, hangover_ms):
+        if fragment is None:
+            spans.append((span_start, span_end))
+            span_start = None
+            continue
+        start, audio = fragment
+        if span_start is None:
+            span_start = start
+        span_end = start + len(audio)
+    return spans
+
+
+def _iter_pieces(fragments: Iterable[Optional[Tuple[int, np.ndarray]]],
+                 max_samples: int) -> Iterator[Tuple[int, np.ndarray]]:
+    """Join voiced fragments back into spans, cutting every max_samples from the start of a span."""
+    span_start = 0
+    parts: List[np.ndarray] = []
+    length = 0
+    for fragment in fragments:
+        if fragment is None:
+            if length:
+                yield span_start, np.concatenate(parts)
+            parts, length = [], 0
+            continue
+        start, audio = fragment
+        if not length:
+            span_start = start
+        parts.append(audio)
+        length += len(audio)
+        while length >= max_samples:
+            audio = np.concatenate(parts)
+            yield span_start, audio[:max_samples]
+            span_start += max_samples
+            parts, length = [audio[max_samples:]], length - max_samples
+    if length:
+        yield span_start, np.concatenate(parts)
+
+
+def iter_speech_segments(fragments: Iterable[Optional[Tuple[int, np.ndarray]]], sample_rate: int = SAMPLE_RATE,
+                         min_seconds: float = MIN_SEGMENT_SECONDS,
+                         max_seconds: float = MAX_SEGMENT_SECONDS) -> Iterator[Tuple[float, float, 'sr.AudioData']]:
+    """
+    Group voiced fragments (see iter_voiced) into recognition segments, leaving the silence between them out.
+    
+    A segment is closed at the first gap after min_seconds of speech or
+    before it would exceed max_seconds; longer spans are cut at max_seconds.
+    Segments are yielded as soon as they are closed.
+    
+    Yields:
+        (start_seconds, end_seconds, audio) on the original timeline
+    """
+    max_samples = int(max_seconds * sample_rate)
+    segment: List[Tuple[int, np.ndarray]] = []
+    length = 0
+    for start, audio in _iter_pieces(fragments, max_samples):
+        if segment and length + len(audio) > max_samples:
+            yield _speech_segment(segment, sample_rate)
+            segment, length = [], 0
+        segment.append((start, audio))
+        length += len(audio)
+        if length >= min_seconds * sample_rate:
+            yield _speech_segment(segment, sample_rate)
+            segment, length = [], 0
+    if segment:
+        yield _speech_segment(segment, sample_rate)
+
+
+def _speech_segment(pieces: List[Tuple[int, np.ndarray]], sample_rate: int) -> Tuple[float, float, 'sr.AudioData']:
+    audio = np.concatenate([audio for _, audio in pieces])
+    start, end = pieces[0][0], pieces[-1][0] + len(pieces[-1][1])
+    return start / sample_rate, end / sample_rate, sr.AudioData(audio.astype(np.int16).tobytes(), sample_rate, 2)
+
+
+class SpeechToText:
+    def __init__(self, backend: Optional[RecognizerBackend] = None):
+        self.recognizer = sr.Recognizer()
+        self.backend = backend
+    
+    def iter_voiced(self, source: Union[str, bytes, BinaryIO], file_extension: Optional[str] = None,
+                    stats: Optional[Dict[str, Any]] = None) -> Iterator[Optional[Tuple[int, np.ndarray]]]:
+        """
+        Decode audio block by block and yield its voiced fragments (see iter_voiced).
+        
+        When given, stats is filled once the stream ends with the input
+        bytes, decoded PCM bytes, decoded and voiced seconds, and decode and
+        VAD milliseconds.
+        """
+        counts = {'samples': 0, 'decode': 0.0}
+        
+        def timed_blocks():
+            blocks = iter_pcm(source, file_extension)
+            while True:
+                start = time.perf_counter()
+                block = next(blocks, None)
+                counts['decode'] += time.perf_counter() - start
+                if block is None:
+                    return
+                counts['samples'] += len(block)
+                yield block
+        
+        fragments = iter_voiced(timed_blocks())
+        speech = 0
+        busy = 0.0
+        while True:
+            start = time.perf_counter()
+            fragment = next(fragments, False)
+            busy += time.perf_counter() - start
+            if fragment is False:
+                break
+            if fragment is not None:
+                speech += len(fragment[1])
+            yield fragment
+        
+        if stats is not None:
+            samples = counts['samples']
+            stats.update({
+                'input_bytes': os.path.getsize(source) if isinstance(source, str) else
+                               len(source) if isinstance(source, (bytes, bytearray)) else None,
+                'pcm_bytes': samples * 2,
+                'audio_seconds': round(samples / SAMPLE_RATE, 2),
+                'speech_seconds': round(speech / SAMPLE_RATE, 2),
+                'dropped_seconds': round((samples - speech) / SAMPLE_RATE, 2),
+                'decode_ms': round(counts['decode'] * 1000, 1),
+                'vad_ms': round((busy - counts['decode']) * 1000, 1),
+            })
+    
+    def voiced_audio(self, source: Union[str, bytes, BinaryIO], file_extension: Optional[str] = None,
+                     stats: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Decode audio and return only its voiced parts as one 16 kHz mono int16 buffer."""
+        fragments = [fragment[1] for fragment in self.iter_voiced(source, file_extension, stats)
+                     if fragment is not None]
+        return np.concatenate(fragments) if fragments else np.zeros(0, dtype=np.int16)
     
     def process_audio(self, audio_path: str) -> str:
         """Process audio file and convert speech to text."""
         try:
-            # Convert to WAV if needed
-            wav_path = self.convert_audio_to_wav(audio_path)
-            if not wav_path:
-                return "Error processing audio file."
+            # Decode block by block and send only the voiced parts
+            audio = self.voiced_audio(audio_path)
+            if not len(audio):
+                return "Speech recognition could not understand the audio."
+            audio_data = sr.AudioData(audio.tobytes(), SAMPLE_RATE, 2)
             
-            # Process WAV file
-            with sr.AudioFile(wav_path) as source:
-                audio_data = self.recognizer.record(source)
-                
-                # Use Google's speech recognition
-                text = self.recognizer.recognize_google(audio_data)
-                
-                # Clean up temp file if we created one
-                if wav_path != audio_path:
-                    os.unlink(wav_path)
-                    
-                return text
+            # Use Google's speech recognition
+            return self.recognizer.recognize_google(audio_data)
                 
         except sr.UnknownValueError:
             return "Speech recognition could not understand the audio."
         except sr.RequestError as e:
             return f"Could not request results from speech recognition service: {e}"
         except Exception as e:
-            print(f"Error processing audio: {e}")
-            return "Error processing audio file."
\ No newline at end of file
+            logger.exception("Error processing audio: %s", e)
+            return "Error processing audio file."
+    
+    def _recognize_segment(self, backend: RecognizerBackend, index: int, start: float, end: float,
+                           audio: 'sr.AudioData') -> Dict[str, Any]:
+        segment = {'index': index, 'start': round(start, 2), 'end': round(end, 2), 'text': ''}
+        try:
+            segment['text'] = backend.recognize(audio)
+        except sr.UnknownValueError:
+            pass
+        except sr.RequestError as e:
+            segment['error'] = f"Could not request results from speech recognition service: {e}"
+        return segment
+    
+    def transcribe_chunked(self, source: Union[str, bytes, BinaryIO], file_extension: Optional[str] = None,
+                           max_workers: int = STT_WORKERS,
+                           stats: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Transcribe audio segment by segment, yielding each segment as soon as it and all earlier ones are done.
+        
+        Audio is decoded and silence-trimmed block by block while earlier
+        segments are recognized (see iter_voiced), so memory stays flat
+        however long the recording is. Segments are recognized concurrently,
+        with at most twice max_workers segments in flight.
+        
+        Yields:
+            dicts with the segment index, start and end time in seconds and text
+        """
+        backend = self.backend or get_backend()
+        segments = iter_speech_segments(self.iter_voiced(source, file_extension, stats))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = []
+            for index, (start, end, audio) in enumerate(segments):
+                pending.append(executor.submit(self._recognize_segment, backend, index, start, end, audio))
+                while len(pending) >= 2 * max_workers or (pending and pending[0].done()):
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
+    
+    def process_audio_chunked(self, source: Union[str, bytes, BinaryIO],
+                              file_extension: Optional[str] = None) -> Dict[str, Any]:
+        """Transcribe audio in segments and stitch the result into one transcript with timestamps and decode stats."""
+        stats: Dict[str, Any] = {}
+        segments = list(self.transcribe_chunked(source, file_extension, stats=stats))
+        text = " ".join(segment['text'] for segment in segments if segment['text'])
+        return {'text': text, 'segments': segments, 'stats': stats}
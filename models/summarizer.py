@@ -1,24 +1,57 @@
-import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.cluster.util import cosine_distance
 import numpy as np
-import networkx as nx
-from typing import List, Optional
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-# Download necessary NLTK data
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
+from models.document import AnalyzedDocument, analyze
+from models.min_map import MindMapGenerator
+from models.textrank import IncrementalGraph, build_term_matrix, factored_pagerank
+from utils import nltk_data
+from utils.metrics import stage
+
+# Documents with a document_id up to this many sentences are diffed against their previous
+# version (difflib, quadratic in the worst case) and re-ranked incrementally; larger ones are
+# re-ranked from scratch
+INCREMENTAL_MAX_SENTENCES = int(os.environ.get('EXTRACTIVE_INCREMENTAL_MAX_SENTENCES', 1000))
+# Total bytes of ranking state kept across documents; least recently used documents are
+# dropped beyond it. A document holds its sentences, its vocabulary, its sparse term rows
+# (16 bytes per distinct content word per sentence) and its scores; IncrementalGraph.nbytes
+# estimates all of them.
+INCREMENTAL_MAX_BYTES = int(os.environ.get('EXTRACTIVE_INCREMENTAL_MAX_BYTES', 256 * 1024 * 1024))
 
 class Summarizer:
-    def __init__(self):
+    def __init__(self, engine: str = "vectorized", max_documents: int = 128,
+                 incremental_max_sentences: int = INCREMENTAL_MAX_SENTENCES,
+                 incremental_max_bytes: int = INCREMENTAL_MAX_BYTES):
+        # "vectorized" uses the sparse matrix engine, "reference" the original pairwise path
+        nltk_data.require('punkt', 'stopwords')
         self.stop_words = set(stopwords.words('english'))
+        self.engine = engine
+        self.incremental_max_sentences = incremental_max_sentences
+        # Ranking state of recently summarized documents, by document id, for incremental updates
+        self.max_documents = max_documents
+        self.incremental_max_bytes = incremental_max_bytes
+        self._graphs: "OrderedDict[str, IncrementalGraph]" = OrderedDict()
+        self._graph_bytes = 0
+        self._graphs_lock = threading.Lock()
+    
+    def analyze(self, text: str) -> AnalyzedDocument:
+        """Tokenize text once for summaries and mind maps of it."""
+        return analyze(text, self.stop_words)
     
     def _preprocess_text(self, text: str) -> List[str]:
         """Split text into sentences and clean them."""
         sentences = sent_tokenize(text)
         return sentences
     
+    def _tokenize_sentence(self, sentence: str) -> List[str]:
+        """Lowercase alphanumeric tokens of a sentence without stopwords."""
+        return [word.lower() for word in word_tokenize(sentence) if word.isalnum() and word.lower() not in self.stop_words]
+    
     def _sentence_similarity(self, sent1: str, sent2: str) -> float:
         """Calculate similarity between two sentences using cosine similarity."""
         words1 = [word.lower() for word in word_tokenize(sent1) if word.isalnum() and word.lower() not in self.stop_words]
@@ -46,7 +79,79 @@ class Summarizer:
                 
         return similarity_matrix
     
-    def summarize(self, text: str, length: str = "medium", output_format: str = "paragraph") -> str:
+    def _rank_sentences_reference(self, sentences: List[str]) -> np.ndarray:
+        """Score sentences with the original pairwise similarity and networkx PageRank."""
+        # Only this engine needs networkx, so it is not imported with the module
+        import networkx as nx
+        similarity_matrix = self._build_similarity_matrix(sentences)
+        nx_graph = nx.from_numpy_array(similarity_matrix)
+        scores = nx.pagerank(nx_graph)
+        return np.array([scores[i] for i in range(len(sentences))])
+    
+    def _rank_sentences(self, sentences: List[str], document_id: Optional[str] = None,
+                        document: Optional[AnalyzedDocument] = None) -> np.ndarray:
+        """Score sentences with one tokenization pass and PageRank on the factored cosine graph."""
+        if self.engine == "reference":
+            return self._rank_sentences_reference(sentences)
+        if document_id is not None and len(sentences) <= self.incremental_max_sentences:
+            return self._rank_sentences_incremental(sentences, document_id)
+        if document is not None:
+            return factored_pagerank(document.term_matrix())
+        term_matrix, _ = build_term_matrix([self._tokenize_sentence(sentence) for sentence in sentences])
+        return factored_pagerank(term_matrix)
+    
+    def _rank_sentences_incremental(self, sentences: List[str], document_id: str) -> np.ndarray:
+        """Score sentences by updating the document's previous graph with only the edited sentences."""
+        with self._graphs_lock:
+            # Taken out while updating so concurrent edits of one document never share a graph
+            graph = self._graphs.pop(document_id, None)
+            if graph is None:
+                graph = IncrementalGraph()
+            else:
+                self._graph_bytes -= graph.nbytes
+        scores = graph.update(sentences, self._tokenize_sentence)
+        with self._graphs_lock:
+            self._graphs[document_id] = graph
+            self._graph_bytes += graph.nbytes
+            while self._graphs and (len(self._graphs) > self.max_documents
+                                    or self._graph_bytes > self.incremental_max_bytes):
+                self._graph_bytes -= self._graphs.popitem(last=False)[1].nbytes
+        return scores
+    
+    def condense(self, text: str, token_budget: int, count_tokens: Callable[[List[str]], List[int]],
+                 document_id: Optional[str] = None) -> Tuple[str, int, int]:
+        """
+        Keep the highest-ranked sentences, in original order, that fit within a token budget.
+        
+        Args:
+            text: Input text to condense
+            token_budget: Maximum total tokens of the kept sentences
+            count_tokens: Returns the token count of each sentence in a list
+            document_id: Reuse ranking work from this document's previous version
+            
+        Returns:
+            Condensed text, number of sentences kept and total number of sentences
+        """
+        sentences = self._preprocess_text(text)
+        counts = count_tokens(sentences)
+        if sum(counts) <= token_budget:
+            return text, len(sentences), len(sentences)
+        
+        with stage('extractive.rank', sentences=len(sentences)):
+            scores = self._rank_sentences(sentences, document_id)
+        
+        # Greedily take sentences by score, skipping any that would overflow the budget
+        selected = []
+        used = 0
+        for i in np.argsort(-scores, kind="stable"):
+            if used + counts[i] <= token_budget:
+                selected.append(i)
+                used += counts[i]
+        selected.sort()
+        return " ".join(sentences[i] for i in selected), len(selected), len(sentences)
+    
+    def summarize(self, text: str, length: str = "medium", output_format: str = "paragraph",
+                  document_id: Optional[str] = None, document: Optional[AnalyzedDocument] = None) -> str:
         """
         Generate a summary of the text.
         
@@ -54,30 +159,36 @@ class Summarizer:
             text: Input text to summarize
             length: Length of summary (short, medium, large)
             output_format: Format of the output (paragraph, bullets, mindmap)
+            document_id: Id of a document summarized before; only sentences
+                edited since then are re-scored
+            document: The text's AnalyzedDocument, when the caller already tokenized it
             
         Returns:
             Summarized text in the requested format
         """
+        return self.summarize_formats(text, length, [output_format], document_id, document)[output_format]
+    
+    def summarize_formats(self, text: str, length: str = "medium", output_formats: Sequence[str] = ("paragraph",),
+                          document_id: Optional[str] = None,
+                          document: Optional[AnalyzedDocument] = None) -> Dict[str, str]:
+        """Rank the sentences once and render the same selection in each of the given formats."""
         # Handle empty text
         if not text.strip():
-            return "No text provided for summarization."
+            return {output_format: "No text provided for summarization." for output_format in output_formats}
         
         # Preprocess text
-        sentences = self._preprocess_text(text)
+        sentences = document.sentences if document is not None else self._preprocess_text(text)
         
         # If text is very short, return the original
         if len(sentences) <= 3:
-            return text
-        
-        # Build similarity matrix
-        similarity_matrix = self._build_similarity_matrix(sentences)
+            return {output_format: text for output_format in output_formats}
         
         # Rank sentences using PageRank algorithm
-        nx_graph = nx.from_numpy_array(similarity_matrix)
-        scores = nx.pagerank(nx_graph)
+        with stage('extractive.rank', sentences=len(sentences)):
+            scores = self._rank_sentences(sentences, document_id, document)
         
-        # Sort sentences by score
-        ranked_sentences = sorted(((scores[i], sentence) for i, sentence in enumerate(sentences)), reverse=True)
+        # Sort sentence indices by score
+        ranked_sentences = sorted(((scores[i], sentence, i) for i, sentence in enumerate(sentences)), reverse=True)
         
         # Determine number of sentences to include based on length
         if length == "short":
@@ -90,11 +201,13 @@ class Summarizer:
         num_sentences = min(num_sentences, len(sentences))
         
         # Get top sentences, but preserve original order
-        selected_indices = [i for i, (score, _) in enumerate(ranked_sentences[:num_sentences])]
+        selected_indices = [i for _, _, i in ranked_sentences[:num_sentences]]
         selected_indices.sort()
         summary_sentences = [sentences[i] for i in selected_indices]
-        
-        # Format output
+        return {output_format: self._format(summary_sentences, output_format) for output_format in output_formats}
+    
+    def _format(self, summary_sentences: List[str], output_format: str) -> str:
+        """Render selected sentences as a paragraph, bullets or a sentence mind map."""
         if output_format == "paragraph":
             return " ".join(summary_sentences)
         elif output_format == "bullets":
@@ -111,4 +224,42 @@ class Summarizer:
             
             return mindmap
         else:
-            return " ".join(summary_sentences)
\ No newline at end of file
+            return " ".join(summary_sentences)
+
+
+_process_summarizer: Optional[Summarizer] = None
+_process_generator: Optional[MindMapGenerator] = None
+
+
+def process_summarizer() -> Summarizer:
+    """Summarizer shared by the calling process, created on first use."""
+    global _process_summarizer
+    if _process_summarizer is None:
+        _process_summarizer = Summarizer()
+    return _process_summarizer
+
+
+def summarize_in_process(text: str, length: str = "medium", output_format: str = "paragraph") -> str:
+    """Summarize with a Summarizer shared by the calling process; picklable entry point for worker pools."""
+    return process_summarizer().summarize(text, length, output_format)
+
+
+def overview_in_process(text: str, length: str = "medium", max_concepts: int = 7) -> Dict[str, Any]:
+    """
+    Paragraph summary, bullet summary and JSON mind map of one text from a single analysis pass.
+    
+    Picklable entry point for worker pools; uses the Summarizer and
+    MindMapGenerator shared by the calling process.
+    """
+    global _process_generator
+    summarizer = process_summarizer()
+    if _process_generator is None:
+        _process_generator = MindMapGenerator()
+    document = summarizer.analyze(text)
+    summaries = summarizer.summarize_formats(text, length, ("paragraph", "bullets"), document=document)
+    return {
+        'summary': summaries['paragraph'],
+        'bullets': summaries['bullets'],
+        'mindmap': _process_generator.mindmap_data(text, max_concepts, document),
+        'sentences': len(document),
+    }
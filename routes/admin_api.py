@@ -0,0 +1,41 @@
+from flask import Blueprint, request, jsonify
+import hmac
+import os
+from utils.cache import caches
+from utils.executors import pools
+
+admin_api = Blueprint('admin_api', __name__)
+
+
+@admin_api.before_request
+def check_admin_token():
+    """Require the X-Admin-Token header; without ADMIN_TOKEN configured the admin API is disabled."""
+    token = os.environ.get('ADMIN_TOKEN')
+    if not token:
+        return jsonify({'error': 'Admin API disabled: ADMIN_TOKEN is not set'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), token):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+
+@admin_api.route('/cache', methods=['GET'])
+def cache_stats():
+    """Return hit/miss/eviction counters for every cache."""
+    return jsonify({name: cache.stats() for name, cache in caches.items()})
+
+
+@admin_api.route('/cache', methods=['DELETE'])
+@admin_api.route('/cache/<name>', methods=['DELETE'])
+def purge_cache(name=None):
+    """Purge one cache by name, or all caches."""
+    if name is not None and name not in caches:
+        return jsonify({'error': f'Unknown cache: {name}'}), 404
+    
+    targets = [name] if name else list(caches)
+    removed = {target: caches[target].purge() for target in targets}
+    return jsonify({'purged': removed})
+
+
+@admin_api.route('/pools', methods=['GET'])
+def pool_stats():
+    """Return concurrency, queue depth and average slot time of every executor pool."""
+    return jsonify({name: pool.stats() for name, pool in pools.items()})
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from utils import ocr
+from utils import executors, ocr
 
 ocr_api = Blueprint('ocr_api', __name__)
 
@@ -9,8 +9,8 @@ def ocr_image():
         return jsonify({'error': 'No file provided'}), 400
     
     file = request.files['file']
-    text = ocr.process_image(file)
-    return jsonify({'text': text})
+    # text plus the cascade's overall confidence and per-stage confidence and timing
+    return jsonify(executors.run('ocr', ocr.process_image_details, file.read()))
 
 @ocr_api.route('/ocr/pdf', methods=['POST'])
 def ocr_pdf():
@@ -18,5 +18,5 @@ def ocr_pdf():
         return jsonify({'error': 'No file provided'}), 400
     
     file = request.files['file']
-    text = ocr.process_pdf(file)
+    text = executors.run('ocr', ocr.process_pdf, file.read())
     return jsonify({'text': text})
@@ -1,5 +1,7 @@
-from flask import Blueprint, request, jsonify
-from utils import speech_processor
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from werkzeug.utils import secure_filename
+from utils import executors, speech_processor
+from utils.sse import sse_event
 
 stt_api = Blueprint('stt_api', __name__)
 
@@ -9,8 +11,34 @@ def process_audio():
         return jsonify({'error': 'No audio file provided'}), 400
 
     audio_file = request.files['file']
+    filename = secure_filename(audio_file.filename or '')
+    file_ext = filename.rsplit('.', 1)[1].lower() if '.' in filename else 'wav'
+    
+    # chunked=true streams timestamped segments as Server-Sent Events while they are recognized
+    if request.form.get('chunked', '').lower() in ('1', 'true', 'yes'):
+        def generate():
+            segments = []
+            stats = {}
+            try:
+                for segment in speech_processor.stream_audio(audio_file.stream, file_ext, stats):
+                    segments.append(segment)
+                    yield sse_event('segment', segment)
+            except Exception as e:
+                # Headers are already sent; report decode or recognition failures in-band
+                yield sse_event('error', {'error': str(e)})
+                return
+            text = " ".join(segment['text'] for segment in segments if segment['text'])
+            yield sse_event('done', {'text': text, 'segments': segments, 'stats': stats})
+        
+        return Response(stream_with_context(executors.hold('speech', generate())), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    
     try:
-        text = speech_processor.process_audio(audio_file)
-        return jsonify({'text': text})
+        # stats: decoded vs voiced seconds, decoded PCM bytes and decode/VAD time
+        stats = {}
+        text = executors.run('speech', speech_processor.process_audio, audio_file.read(), file_ext, stats)
+        return jsonify({'text': text, 'stats': stats})
+    except executors.PoolBusy:
+        raise
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1,15 +1,24 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
+import json
 import os
+import time
+from routes.upload import save_upload, upload_path
+from utils.ALLOWED_EXTENSIONS import ALLOWED_EXTENSIONS
+from utils.pipeline import cached_summary, extractive_summary, overview, summarize_items, summarize_upload
+import utils.executors as executors
+import utils.jobs as jobs
 import utils.summarizer as summarizer
-import utils.mindmap as mindmap_generator
-import utils.ocr as ocr_processor
-import utils.speech_processor as speech_processor
-import utils.ALLOWED_EXTENSIONS as ALLOWED_EXTENSIONS
-import tempfile
+from utils.sse import sse_event
+from utils.metrics import stage
 
 summarizer_api = Blueprint('summarizer_api', __name__)
 
+# /summarize-batch rejects requests with more items than this
+BATCH_MAX_ITEMS = int(os.environ.get('SUMMARIZE_BATCH_MAX_ITEMS', 64))
+# How often /jobs/<id>/events checks the shared job store
+JOB_EVENTS_POLL_SECONDS = 0.5
+
 
 def allowed_file(filename, file_types):
     """Check if file extension is allowed."""
@@ -19,6 +28,23 @@ def allowed_file(filename, file_types):
     
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in extensions
 
+
+def _deadline(value):
+    """Parse an optional deadline_ms parameter; invalid or non-positive values mean no deadline."""
+    try:
+        deadline = float(value)
+    except (TypeError, ValueError):
+        return None
+    return deadline if deadline > 0 else None
+
+
+def _flag(value):
+    """Parse an optional boolean parameter from JSON or form data; None when absent."""
+    if value is None or isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
 @summarizer_api.route('/summarize-text', methods=['POST'])
 def summarize_text():
     """Endpoint to summarize text input."""
@@ -31,12 +57,79 @@ def summarize_text():
     length = data.get('length', 'medium')  # short, medium, large
     output_format = data.get('format', 'paragraph')  # paragraph, bullets, mindmap
     
-    if output_format == 'mindmap':
-        result = mindmap_generator.generate_mindmap(text)
-    else:
-        result = summarizer.summarize(text, length, output_format)
+    # Clients opt into streaming with "stream": true or an event-stream Accept header
+    wants_stream = data.get('stream') or request.accept_mimetypes.best == 'text/event-stream'
+    if wants_stream and output_format != 'mindmap':
+        events = (sse_event(event, payload) for event, payload in
+                  summarizer.stream_summary(text, length, output_format))
+        events = executors.hold('abstractive', events)
+        return Response(stream_with_context(events), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    
+    # Id of an earlier version of this note; only edited sentences are re-ranked
+    document_id = data.get('document_id')
+    if data.get('engine') == 'extractive':
+        with stage('summarize.extractive'):
+            summary = extractive_summary(text, length, output_format, document_id)
+        return jsonify({'summary': summary, 'strategy': 'extractive'})
+    
+    deadline_ms = data.get('deadline_ms')  # optional latency budget
+    precompress = data.get('precompress')  # None uses the server default
+    with executors.slot('extractive' if output_format == 'mindmap' else 'abstractive'):
+        result = cached_summary(text, length, output_format, _deadline(deadline_ms),
+                                _flag(precompress), document_id)
+    return jsonify(result)
+
+@summarizer_api.route('/overview', methods=['POST'])
+def text_overview():
+    """Return an extractive summary, bullets and a JSON mind map of one text.
+    
+    Body: {"text", "length", "max_concepts"}. The text is tokenized once
+    and shared by the summary and the mind map.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or not isinstance(data.get('text'), str) or not data['text'].strip():
+        return jsonify({'error': 'No text provided'}), 400
+    
+    try:
+        max_concepts = int(data.get('max_concepts', 7))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'max_concepts must be an integer'}), 400
+    
+    with stage('summarize.overview'):
+        result = overview(data['text'], data.get('length', 'medium'), max_concepts)
+    return jsonify(result)
+
+@summarizer_api.route('/summarize-batch', methods=['POST'])
+def summarize_batch():
+    """Summarize many texts in one call.
+    
+    Body: {"items": [{"text", "length", "format", "engine", "document_id"}], "stream": bool}.
+    Results come back in input order with per-item errors, or with
+    "stream": true as NDJSON lines as each batch finishes.
+    """
+    data = request.get_json(silent=True)
+    
+    if not data or not isinstance(data.get('items'), list):
+        return jsonify({'error': 'No items provided'}), 400
+    
+    items = data['items']
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f'At most {BATCH_MAX_ITEMS} items per request'}), 400
+    for index, item in enumerate(items):
+        if isinstance(item, dict) and not all(isinstance(item.get(name, ''), str) for name in ('length', 'format')):
+            return jsonify({'error': f'Item {index}: length and format must be strings'}), 400
+    if data.get('stream'):
+        lines = (json.dumps(result) + '\n' for batch in summarize_items(items) for result in batch)
+        return Response(stream_with_context(executors.hold('abstractive', lines)), mimetype='application/x-ndjson')
     
-    return jsonify({'summary': result})
+    results = [None] * len(items)
+    with executors.slot('abstractive'):
+        for batch in summarize_items(items):
+            for result in batch:
+                results[result['index']] = result
+    return jsonify({'results': results})
 
 @summarizer_api.route('/upload-document', methods=['POST'])
 def upload_document():
@@ -54,46 +147,117 @@ def upload_document():
     # Process file if allowed
     if file and allowed_file(file.filename, ['text', 'document', 'image', 'audio']):
         filename = secure_filename(file.filename)
-        temp_path = os.path.join(tempfile.gettempdir(),filename)
-        file.save(temp_path)
-        
         file_ext = filename.rsplit('.', 1)[1].lower()
-        text = ""
-        
-        # Process based on file type
-        if file_ext in ALLOWED_EXTENSIONS['text']:
-            with open(temp_path, 'r', encoding='utf-8') as f:
-                text = f.read()
-        elif file_ext == 'pdf':
-            text = ocr_processor.process_pdf(temp_path)
-        elif file_ext in ALLOWED_EXTENSIONS['image']:
-            text = ocr_processor.process_image(temp_path)
-            # If text is too short, try handwriting detection
-            if len(text.strip()) < 50:
-                text = ocr_processor.detect_handwriting(temp_path)
-        elif file_ext in ALLOWED_EXTENSIONS['audio']:
-            text = speech_processor.process_audio(temp_path)
-        
-        # Clean up
-        os.remove(temp_path)
         
-        # Check if text extraction was successful
-        if not text or len(text.strip()) == 0:
-            return jsonify({'error': 'Could not extract text from the file'}), 400
-            
         # Get parameters for summarization
         length = request.form.get('length', 'medium')  # short, medium, large
         output_format = request.form.get('format', 'paragraph')  # paragraph, bullets, mindmap
         
-        # Generate summary or mindmap
-        if output_format == 'mindmap':
-            result = mindmap_generator.generate_mindmap(text)
-        else:
-            result = summarizer.summarize(text, length, output_format)
+        deadline_ms = request.form.get('deadline_ms')  # optional latency budget
+        precompress = request.form.get('precompress')  # None uses the server default
+        document_id = request.form.get('document_id')
         
-        return jsonify({
-            'original_text': text,
-            'summary': result
-        })
+        # Extractors read the request's upload stream directly instead of a saved copy
+        try:
+            # The extractor's pool slot is taken per block inside iter_blocks
+            with executors.slot('abstractive'):
+                result = summarize_upload(file.stream, file_ext, length, output_format, _deadline(deadline_ms),
+                                          _flag(precompress), document_id)
+        except ValueError as e:
+            return jsonify({'error': f'Could not extract text from the file: {e}'}), 400
+        
+        # Check if text extraction was successful
+        if result is None:
+            return jsonify({'error': 'Could not extract text from the file'}), 400
+        return jsonify(result)
+    
+    return jsonify({'error': 'File type not allowed'}), 400
+
+
+def _job_status(job):
+    """Public view of a job; the stored file path stays server-side."""
+    return {
+        'id': job['id'],
+        'stage': job['stage'],
+        'progress': job['progress'],
+        'result': job['result'],
+        'error': job['error'],
+    }
+
+@summarizer_api.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue a document for background extraction, summarization and mindmap generation.
+    
+    Accepts either a multipart file upload or JSON with the `filename`
+    returned by /api/upload.
+    """
+    if 'file' in request.files:
+        file = request.files['file']
+        if file.filename == '' or not allowed_file(file.filename, ['text', 'document', 'image', 'audio']):
+            return jsonify({'error': 'File type not allowed'}), 400
+        filename, _, path = save_upload(file)
+        options = request.form
+        owned = True
+    else:
+        options = request.get_json(silent=True) or {}
+        filename = options.get('filename')
+        path = upload_path(filename)
+        if not path:
+            return jsonify({'error': 'Unknown upload filename'}), 404
+        if not allowed_file(filename, ['text', 'document', 'image', 'audio']):
+            return jsonify({'error': 'File type not allowed'}), 400
+        owned = False
+    
+    params = {
+        'path': path,
+        # Only files saved for this job are deleted with it; /api/upload files stay the client's
+        'owned': owned,
+        'file_ext': filename.rsplit('.', 1)[1].lower(),
+        'length': options.get('length', 'medium'),
+        'format': options.get('format', 'paragraph'),
+    }
+    try:
+        job_id = jobs.get_manager().submit(params)
+    except jobs.QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({'job_id': job_id, 'stage': 'queued'}), 202
+
+@summarizer_api.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Report the stage, progress and result of a job."""
+    job = jobs.get_manager().store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(_job_status(job))
+
+@summarizer_api.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Stream a job's stage transitions as Server-Sent Events until it finishes."""
+    store = jobs.get_manager().store
+    if store.get(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        last_stage = None
+        deadline = time.monotonic() + jobs.JOB_EVENTS_TIMEOUT_SECONDS
+        while True:
+            job = store.get(job_id)
+            if job is None:
+                yield sse_event('error', {'error': 'Job not found'})
+                return
+            if job['stage'] != last_stage:
+                last_stage = job['stage']
+                yield sse_event('stage', _job_status(job))
+            if job['stage'] in jobs.FINISHED:
+                return
+            if time.monotonic() >= deadline:
+                # Don't hold the connection forever; the job keeps running and can be polled again
+                yield sse_event('error', {'error': f'No result within {jobs.JOB_EVENTS_TIMEOUT_SECONDS:g} seconds',
+                                          'job': _job_status(job)})
+                return
+            # Jobs may run in another worker process, so poll the shared store
+            time.sleep(JOB_EVENTS_POLL_SECONDS)
     
-    return jsonify({'error': 'File type not allowed'}), 400
\ No newline at end of file
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
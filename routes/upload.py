@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 import os
+import re
 from werkzeug.utils import secure_filename
 import uuid
 import tempfile
@@ -27,6 +28,25 @@ def allowed_file(filename, file_types):
     
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in extensions
 
+def save_upload(file):
+    """Save an uploaded file under a unique name and return (unique_filename, original_filename, path)."""
+    # Generate unique filename to prevent collisions
+    original_filename = secure_filename(file.filename)
+    file_ext = original_filename.rsplit('.', 1)[1].lower()
+    unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
+    
+    # Save file
+    temp_path = os.path.join(tempfile.gettempdir(), unique_filename)
+    file.save(temp_path)
+    return unique_filename, original_filename, temp_path
+
+def upload_path(unique_filename):
+    """Return the path of a file saved by save_upload, or None if the name is not one of ours."""
+    if not re.fullmatch(r'[0-9a-f]{32}\.[a-z0-9]+', unique_filename or ''):
+        return None
+    path = os.path.join(tempfile.gettempdir(), unique_filename)
+    return path if os.path.exists(path) else None
+
 @upload_routes.route('/', methods=['POST'])
 def upload_file():
     """General file upload endpoint."""
@@ -42,14 +62,7 @@ def upload_file():
         
     # Process file if allowed
     if file and allowed_file(file.filename, ['text', 'document', 'image', 'audio']):
-        # Generate unique filename to prevent collisions
-        original_filename = secure_filename(file.filename)
-        file_ext = original_filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}.{file_ext}"
-        
-        # Save file
-        temp_path = os.path.join(tempfile.gettempdir(), unique_filename)
-        file.save(temp_path)
+        unique_filename, original_filename, temp_path = save_upload(file)
         
         return jsonify({
             'message': 'File uploaded successfully',
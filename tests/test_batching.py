@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from utils.batching import BatchScheduler
+
+
+def test_requests_with_one_key_share_a_batch():
+    batches = []
+
+    def run_batch(key, payloads):
+        batches.append((key, list(payloads)))
+        return [payload * 2 for payload in payloads]
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=3, max_wait_ms=1000)
+    futures = [scheduler.submit('short', i) for i in range(3)]
+    assert [future.result(timeout=5) for future in futures] == [0, 2, 4]
+    assert batches == [('short', [0, 1, 2])]
+
+
+def test_partial_batch_is_dispatched_after_max_wait():
+    scheduler = BatchScheduler(lambda key, payloads: payloads, max_batch_size=8, max_wait_ms=10)
+    assert scheduler.submit('key', 'alone').result(timeout=5) == 'alone'
+
+
+def test_batches_never_mix_keys():
+    batches = []
+
+    def run_batch(key, payloads):
+        batches.append((key, list(payloads)))
+        return payloads
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=2, max_wait_ms=1000)
+    futures = [scheduler.submit(key, i) for i, key in enumerate(['a', 'b', 'a', 'b'])]
+    for future in futures:
+        future.result(timeout=5)
+    assert sorted(batches) == [('a', [0, 2]), ('b', [1, 3])]
+
+
+def test_batch_errors_fail_every_future_in_the_batch():
+    def run_batch(key, payloads):
+        raise RuntimeError("model failed")
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=2, max_wait_ms=1000)
+    futures = [scheduler.submit('key', i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(timeout=5)
+
+
+def test_calls_run_alone_on_the_worker_thread():
+    running = threading.Event()
+    release = threading.Event()
+    threads = []
+
+    def blocking_call():
+        threads.append(threading.current_thread().name)
+        running.set()
+        release.wait(5)
+        return 'called'
+
+    def run_batch(key, payloads):
+        threads.append(threading.current_thread().name)
+        return payloads
+
+    scheduler = BatchScheduler(run_batch, max_batch_size=1, max_wait_ms=0)
+    call = scheduler.call(blocking_call)
+    assert running.wait(5)
+    batched = scheduler.submit('key', 'payload')
+    # The batch waits for the call to finish instead of running beside it
+    assert not batched.done()
+    assert scheduler.queue_depth() == 1
+    release.set()
+    assert call.result(timeout=5) == 'called'
+    assert batched.result(timeout=5) == 'payload'
+    assert threads == ['batch-scheduler', 'batch-scheduler']
+
+
+def test_call_errors_reach_the_caller():
+    scheduler = BatchScheduler(lambda key, payloads: payloads)
+    future = scheduler.call(lambda: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        future.result(timeout=5)
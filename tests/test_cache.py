@@ -0,0 +1,61 @@
+from utils.cache import TwoTierCache, get_or_compute
+
+
+def test_get_returns_none_on_miss(tmp_path):
+    cache = TwoTierCache('test', cache_dir=str(tmp_path))
+    assert cache.get('missing') is None
+    assert cache.counters['misses'] == 1
+
+
+def test_set_then_get_hits_memory(tmp_path):
+    cache = TwoTierCache('test', cache_dir=str(tmp_path))
+    cache.set('key', {'text': 'value'})
+    assert cache.get('key') == {'text': 'value'}
+    assert cache.counters['memory_hits'] == 1
+
+
+def test_entries_survive_in_a_new_instance_through_disk(tmp_path):
+    TwoTierCache('test', cache_dir=str(tmp_path)).set('key', ['a', 'b'])
+    cache = TwoTierCache('test', cache_dir=str(tmp_path))
+    assert cache.get('key') == ['a', 'b']
+    assert cache.counters['disk_hits'] == 1
+    # The disk hit is promoted to memory
+    assert cache.get('key') == ['a', 'b']
+    assert cache.counters['memory_hits'] == 1
+
+
+def test_memory_tier_evicts_least_recently_used(tmp_path):
+    cache = TwoTierCache('test', max_items=2, cache_dir=str(tmp_path))
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.counters['memory_evictions'] == 1
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.counters['memory_hits'] == 3
+    # b was evicted from memory but is still on disk
+    assert cache.get('b') == 2
+    assert cache.counters['disk_hits'] == 1
+
+
+def test_disk_tier_stays_under_its_size_limit(tmp_path):
+    cache = TwoTierCache('test', max_items=1, max_disk_bytes=200, cache_dir=str(tmp_path))
+    for i in range(10):
+        cache.set(f'key{i}', 'x' * 50)
+    assert cache.counters['disk_evictions'] > 0
+    assert sum(size for _, size, _ in cache._disk_entries()) <= 200
+    assert cache.get('key9') == 'x' * 50
+
+
+def test_get_or_compute_computes_once(tmp_path):
+    cache = TwoTierCache('test', cache_dir=str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return 'summary'
+
+    assert get_or_compute(cache, 'key', compute) == 'summary'
+    assert get_or_compute(cache, 'key', compute) == 'summary'
+    assert len(calls) == 1
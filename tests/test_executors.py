@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from utils import executors
+from utils.executors import PoolBusy, ResourcePool
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_slot_limits_concurrency_and_releases():
+    pool = ResourcePool('test', concurrency=1, queue_limit=0)
+    with pool.slot():
+        assert pool.running == 1
+        with pytest.raises(PoolBusy) as excinfo:
+            pool.acquire()
+        assert excinfo.value.pool == 'test'
+        assert excinfo.value.retry_after >= 1
+    assert pool.running == 0
+    with pool.slot():
+        assert pool.running == 1
+
+
+def test_queue_admits_waiters_up_to_its_limit():
+    pool = ResourcePool('test', concurrency=1, queue_limit=1)
+    acquired = pool.acquire()
+    results = []
+
+    def waiter():
+        with pool.slot():
+            results.append('ran')
+
+    thread = threading.Thread(target=waiter)
+    thread.start()
+    wait_for(lambda: pool.waiting == 1)
+    with pytest.raises(PoolBusy):
+        pool.acquire()
+    pool.release(acquired)
+    thread.join(5)
+    assert results == ['ran']
+
+
+def test_wait_skips_admission_control():
+    pool = ResourcePool('test', concurrency=1, queue_limit=0)
+    acquired = pool.acquire()
+    thread = threading.Thread(target=lambda: pool.release(pool.acquire(wait=True)))
+    thread.start()
+    wait_for(lambda: pool.waiting == 1)
+    pool.release(acquired)
+    thread.join(5)
+    assert not thread.is_alive()
+    assert pool.running == 0
+
+
+def test_run_returns_the_result_in_process():
+    pool = ResourcePool('test', concurrency=2, queue_limit=0)
+    assert pool.run(sum, [1, 2, 3]) == 6
+    assert pool.running == 0
+
+
+def test_hold_releases_when_the_stream_is_exhausted_or_closed(monkeypatch):
+    pool = ResourcePool('test', concurrency=1, queue_limit=0)
+    monkeypatch.setitem(executors.pools, 'test', pool)
+    assert list(executors.hold('test', iter([1, 2]))) == [1, 2]
+    assert pool.running == 0
+
+    held = executors.hold('test', iter([1, 2]))
+    next(held)
+    assert pool.running == 1
+    held.close()
+    assert pool.running == 0
+
+
+def test_busy_pool_answers_429_with_retry_after(monkeypatch):
+    flask = pytest.importorskip('flask')
+    pool = ResourcePool('test', concurrency=1, queue_limit=0)
+    monkeypatch.setitem(executors.pools, 'test', pool)
+
+    app = flask.Flask(__name__)
+    executors.init_app(app)
+
+    @app.route('/work')
+    def work():
+        with executors.slot('test'):
+            return {'status': 'done'}
+
+    client = app.test_client()
+    assert client.get('/work').status_code == 200
+
+    acquired = pool.acquire()
+    try:
+        response = client.get('/work')
+    finally:
+        pool.release(acquired)
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.get_json()['pool'] == 'test'
@@ -0,0 +1,73 @@
+import io
+
+import pytest
+
+from utils import extractors
+from utils.ALLOWED_EXTENSIONS import ALLOWED_EXTENSIONS
+from utils.lazy import LazyModule
+
+
+def test_every_allowed_extension_has_an_extractor_and_pool():
+    for file_type, extensions in ALLOWED_EXTENSIONS.items():
+        for extension in extensions:
+            assert extension in extractors.EXTRACTORS, extension
+    assert extractors.EXTRACTOR_POOLS['pdf'] == 'ocr'
+    assert extractors.EXTRACTOR_POOLS['png'] == 'ocr'
+    assert extractors.EXTRACTOR_POOLS['wav'] == 'speech'
+    assert extractors.EXTRACTOR_POOLS['txt'] is None
+
+
+def test_unknown_extensions_are_rejected():
+    with pytest.raises(ValueError, match=r'No extractor registered for \.xyz files'):
+        list(extractors.iter_blocks(b'data', 'xyz'))
+
+
+def test_registered_extractors_are_used_and_blocks_end_with_a_newline(monkeypatch):
+    monkeypatch.setitem(extractors.EXTRACTORS, 'csv', None)
+    monkeypatch.setitem(extractors.EXTRACTOR_POOLS, 'csv', None)
+
+    @extractors.register('csv')
+    def extract_csv_blocks(source, file_ext):
+        yield from ['a,b', '   ', 'c,d\n']
+
+    assert list(extractors.iter_blocks(b'', 'csv')) == ['a,b\n', 'c,d\n']
+
+
+def test_text_is_grouped_into_blocks_of_about_the_block_size():
+    lines = ''.join(f'line {i}\n' for i in range(10)).encode()
+    blocks = list(extractors.group_blocks(io.TextIOWrapper(io.BytesIO(lines)), block_chars=14))
+    assert blocks == ['line 0\nline 1\n', 'line 2\nline 3\n', 'line 4\nline 5\n', 'line 6\nline 7\n',
+                      'line 8\nline 9\n']
+    assert ''.join(extractors.iter_blocks(lines, 'txt')) == lines.decode()
+
+
+def docx_bytes():
+    docx = pytest.importorskip('docx')
+    document = docx.Document()
+    document.add_paragraph('Preface text.')
+    document.add_heading('Methods', level=1)
+    document.add_paragraph('We measured things.')
+    table = document.add_table(rows=2, cols=2)
+    for row, values in zip(table.rows, [('Name', 'Value'), ('speed', ' 42 ')]):
+        for cell, value in zip(row.cells, values):
+            cell.text = value
+    document.add_heading('Results', level=1)
+    document.add_paragraph('It worked.')
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def test_docx_blocks_start_at_headings_and_keep_tables():
+    blocks = list(extractors.iter_blocks(docx_bytes(), 'docx'))
+    assert blocks == [
+        'Preface text.\n',
+        'Methods\nWe measured things.\nName | Value\nspeed | 42\n',
+        'Results\nIt worked.\n',
+    ]
+
+
+def test_docx_without_python_docx(monkeypatch):
+    monkeypatch.setattr(extractors, 'docx', LazyModule('no_such_module_for_notes_tests'))
+    with pytest.raises(ValueError, match='python-docx not installed'):
+        list(extractors.iter_blocks(b'', 'docx'))
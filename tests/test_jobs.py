@@ -0,0 +1,125 @@
+import threading
+import time
+
+import pytest
+
+from utils import jobs
+from utils.jobs import JobManager, JobStore, QueueFull
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+def params(path, owned=True):
+    return {'path': str(path), 'owned': owned, 'file_ext': 'txt', 'length': 'short', 'format': 'paragraph'}
+
+
+def test_a_job_is_claimed_once(store, tmp_path):
+    job_id = store.create(params(tmp_path / 'note.txt'))
+    assert store.get(job_id)['stage'] == 'queued'
+    assert store.claim(job_id)
+    assert not store.claim(job_id)
+    job = store.get(job_id)
+    assert job['stage'] == 'extracting'
+    assert job['progress'] == jobs.STAGES['extracting']
+
+
+def test_stale_running_jobs_are_requeued(store, tmp_path):
+    running = store.create(params(tmp_path / 'a.txt'))
+    finished = store.create(params(tmp_path / 'b.txt'))
+    queued = store.create(params(tmp_path / 'c.txt'))
+    store.claim(running)
+    store.claim(finished)
+    store.update(finished, 'done', result={'summary': ''})
+
+    assert store.requeue_stale(stale_seconds=60) == [queued]
+    assert store.requeue_stale(stale_seconds=-1) == [running, queued]
+    assert store.get(running)['stage'] == 'queued'
+    assert store.get(finished)['stage'] == 'done'
+
+
+def test_live_jobs_are_kept_alive_by_the_heartbeat(store, monkeypatch, tmp_path):
+    release = threading.Event()
+    monkeypatch.setattr(jobs, 'JOB_HEARTBEAT_SECONDS', 0.01)
+    monkeypatch.setattr(jobs, 'run_pipeline', lambda store, job_id, p: release.wait(5) and {})
+    manager = JobManager(store, workers=1)
+    job_id = manager.submit(params(tmp_path / 'long.txt'))
+    wait_for(lambda: store.get(job_id)['stage'] == 'extracting')
+    claimed = store.get(job_id)['updated']
+    wait_for(lambda: store.get(job_id)['updated'] > claimed)
+    assert store.requeue_stale(stale_seconds=1) == []
+    release.set()
+    wait_for(lambda: store.get(job_id)['stage'] == 'done')
+    finished = store.get(job_id)['updated']
+    store.touch(job_id)
+    assert store.get(job_id)['updated'] == finished
+
+
+def run_jobs(store, monkeypatch, pipeline, *job_params):
+    monkeypatch.setattr(jobs, 'run_pipeline', pipeline)
+    manager = JobManager(store, workers=1)
+    job_ids = [manager.submit(p) for p in job_params]
+    wait_for(lambda: all(store.get(job_id)['stage'] in jobs.FINISHED for job_id in job_ids))
+    return [store.get(job_id) for job_id in job_ids]
+
+
+def test_only_files_uploaded_with_the_job_are_deleted(store, monkeypatch, tmp_path):
+    owned, shared = tmp_path / 'owned.txt', tmp_path / 'shared.txt'
+    owned.write_text('job upload')
+    shared.write_text('earlier /api/upload')
+    done = run_jobs(store, monkeypatch, lambda store, job_id, p: {'summary': 'ok'},
+                    params(owned), params(shared, owned=False))
+    assert [job['stage'] for job in done] == ['done', 'done']
+    assert done[0]['result'] == {'summary': 'ok'}
+    assert not owned.exists()
+    assert shared.exists()
+
+
+def test_failures_are_recorded(store, monkeypatch, tmp_path):
+    def failing(store, job_id, p):
+        raise ValueError('Could not extract text from the file')
+
+    [job] = run_jobs(store, monkeypatch, failing, params(tmp_path / 'missing.txt'))
+    assert job['stage'] == 'failed'
+    assert job['error'] == 'Could not extract text from the file'
+
+
+def test_queue_limit(store, tmp_path):
+    manager = JobManager(store, workers=1, queue_limit=1)
+    store.create(params(tmp_path / 'waiting.txt'))
+    with pytest.raises(QueueFull):
+        manager.submit(params(tmp_path / 'next.txt'))
+
+
+def job_events(store, monkeypatch, job_id):
+    flask = pytest.importorskip('flask')
+    import routes.summarizer_api as summarizer_api
+    monkeypatch.setattr(jobs, 'get_manager', lambda: type('Manager', (), {'store': store})())
+    monkeypatch.setattr(summarizer_api, 'JOB_EVENTS_POLL_SECONDS', 0.01)
+    app = flask.Flask(__name__)
+    app.register_blueprint(summarizer_api.summarizer_api)
+    response = app.test_client().get(f'/jobs/{job_id}/events')
+    return [line[len('event: '):] for line in response.get_data(as_text=True).splitlines()
+            if line.startswith('event: ')]
+
+
+def test_job_events_end_when_the_job_finishes(store, monkeypatch, tmp_path):
+    job_id = store.create(params(tmp_path / 'note.txt'))
+    store.update(job_id, 'done', result={'summary': 'ok'})
+    assert job_events(store, monkeypatch, job_id) == ['stage']
+
+
+def test_job_events_time_out_with_an_error_event(store, monkeypatch, tmp_path):
+    job_id = store.create(params(tmp_path / 'note.txt'))
+    monkeypatch.setattr(jobs, 'JOB_EVENTS_TIMEOUT_SECONDS', 0.05)
+    assert job_events(store, monkeypatch, job_id) == ['stage', 'error']
+    assert store.get(job_id)['stage'] == 'queued'
@@ -0,0 +1,74 @@
+from collections import OrderedDict
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+pytest.importorskip('nltk')
+
+from models import document as document_module
+from models.document import AnalyzedDocument
+from models.min_map import MindMapGenerator
+
+
+def document(sentences):
+    """AnalyzedDocument of whitespace-separated sentences, without NLTK data."""
+    vocabulary = {}
+    token_ids = []
+    offsets = [0]
+    for sentence in sentences:
+        token_ids.extend(vocabulary.setdefault(word, len(vocabulary)) for word in sentence.lower().split())
+        offsets.append(len(token_ids))
+    terms = list(vocabulary)
+    return AnalyzedDocument(sentences, terms, np.array(token_ids, dtype=np.int32), np.array(offsets, dtype=np.int64),
+                            np.zeros(len(terms), dtype=bool))
+
+
+@pytest.fixture
+def generator():
+    # Skips __init__, which loads the NLTK stopword list
+    return MindMapGenerator.__new__(MindMapGenerator)
+
+
+SENTENCES = ['cat dog', 'dog bird cat', 'bird fish', 'cat dog']
+CONCEPTS = ['cat', 'dog', 'bird', 'fish', 'whale']
+
+
+def test_edges_are_weighted_by_shared_sentences(generator):
+    weighted = generator._weighted_relationships(document(SENTENCES), CONCEPTS)
+    assert weighted == {
+        'cat': [('dog', 3), ('bird', 1)],
+        'dog': [('cat', 3), ('bird', 1)],
+        # Ordered by first shared sentence, then concept order
+        'bird': [('cat', 1), ('dog', 1), ('fish', 1)],
+        'fish': [('bird', 1)],
+        'whale': [],
+    }
+
+
+def test_mindmap_branches_carry_the_weights(generator):
+    weighted = generator._weighted_relationships(document(SENTENCES), CONCEPTS)
+    data = generator._mindmap_data(CONCEPTS, weighted, 'bird')
+    assert data['central'] == 'Bird'
+    assert data['branches'][0] == {
+        'name': 'Cat', 'weight': 1, 'sub_branches': [{'name': 'Dog', 'weight': 3}],
+    }
+    assert data['branches'][-1] == {'name': 'Whale', 'weight': 0, 'sub_branches': []}
+
+
+class RecordingTagger:
+    def __init__(self):
+        self.calls = []
+
+    def tag_sents(self, sentences):
+        self.calls.append(sentences)
+        return [[(word, 'NN' if word.endswith('s') else 'VB') for word in sentence] for sentence in sentences]
+
+
+def test_unseen_words_are_tagged_in_one_call_and_cached(monkeypatch):
+    tagger = RecordingTagger()
+    monkeypatch.setattr(document_module, '_tagger', tagger)
+    monkeypatch.setattr(document_module, '_pos_cache', OrderedDict())
+    assert document_module.word_tags(['cats', 'run']) == {'cats': 'NN', 'run': 'VB'}
+    assert document_module.word_tags(['run', 'dogs']) == {'run': 'VB', 'dogs': 'NN'}
+    assert tagger.calls == [[['cats'], ['run']], [['dogs']]]
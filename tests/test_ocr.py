@@ -0,0 +1,34 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from utils import ocr
+from utils.lazy import LazyModule
+
+
+def test_lazy_module_reports_missing_module_without_importing():
+    module = LazyModule('no_such_module_for_notes_tests')
+    assert not module.available
+    assert not module.loaded
+
+
+def test_lazy_module_reports_missing_parent_package():
+    assert not LazyModule('no_such_package_for_notes_tests.child').available
+
+
+def test_lazy_module_available_before_load():
+    module = LazyModule('json')
+    assert module.available
+    assert not module.loaded
+    assert module.dumps([1]) == '[1]'
+    assert module.loaded and module.available
+
+
+def test_process_pdf_without_pymupdf(monkeypatch):
+    monkeypatch.setattr(ocr, 'fitz', LazyModule('no_such_module_for_notes_tests'))
+    assert ocr.process_pdf(b'%PDF-1.4') == "PyMuPDF not installed."
+
+
+def test_process_image_details_without_tesseract(monkeypatch):
+    monkeypatch.setattr(ocr, 'pytesseract', LazyModule('no_such_module_for_notes_tests'))
+    assert ocr.process_image_details(b'')['text'] == "OCR libraries not installed."
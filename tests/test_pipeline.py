@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip('nltk')
+
+from utils import pipeline, summarizer
+
+
+def test_deadline_misses_fall_back_to_the_extractive_pool(monkeypatch):
+    calls = []
+
+    def extractive_summary(*args, **kwargs):
+        calls.append((args, kwargs))
+        return 'Extractive summary.'
+
+    monkeypatch.setattr(summarizer, 'token_count', lambda text: len(text.split()))
+    monkeypatch.setattr(summarizer, 'plan_decoding', lambda tokens, length, deadline_ms: None)
+    monkeypatch.setattr(summarizer, 'summarize_document', lambda *args: pytest.fail('abstractive path used'))
+    monkeypatch.setattr(pipeline, 'extractive_summary', extractive_summary)
+
+    result = pipeline.cached_summary('A text that cannot be summarized in time.', 'short', 'paragraph',
+                                     deadline_ms=1, precompress=False, document_id='note-1')
+    assert result['strategy'] == 'extractive'
+    assert result['summary'] == 'Extractive summary.'
+    assert calls == [(('A text that cannot be summarized in time.', 'short', 'paragraph', 'note-1'),
+                      {'wait': True})]
+
+
+@pytest.fixture
+def word_summarizer(monkeypatch):
+    """Extractive summarizer splitting on '. ' and spaces, so no NLTK data is needed."""
+    from models import summarizer as extractive
+    from utils import nltk_data
+    monkeypatch.setattr(nltk_data, 'require', lambda *names: None)
+    monkeypatch.setattr(extractive, 'stopwords', type('Stopwords', (), {'words': staticmethod(lambda lang: ['the'])}))
+    monkeypatch.setattr(extractive, 'sent_tokenize', lambda text: text.split('. '))
+    monkeypatch.setattr(extractive, 'word_tokenize', str.split)
+    monkeypatch.setattr(summarizer, 'sentence_token_counts', lambda sentences: [len(s.split()) for s in sentences])
+    instance = extractive.Summarizer()
+    monkeypatch.setattr(pipeline, 'get_extractive_summarizer', lambda: instance)
+    return instance
+
+
+SENTENCES = [
+    'cats chase mice in the barn',
+    'the weather was mild',
+    'mice hide from cats in the barn at night',
+    'a farmer keeps cats for the mice',
+    'the road was quiet',
+]
+
+
+def test_condense_text_keeps_top_sentences_within_the_budget(word_summarizer):
+    condensed, info = pipeline.condense_text('. '.join(SENTENCES), token_budget=16)
+    kept = [sentence for sentence in SENTENCES if sentence in condensed]
+    # Original order, and the sentences about cats and mice rank above the unrelated ones
+    assert condensed == ' '.join(kept)
+    assert info == {'sentences': 5, 'kept': len(kept)}
+    assert sum(len(sentence.split()) for sentence in kept) <= 16
+    assert 'the road was quiet' not in kept and 'the weather was mild' not in kept
+
+
+def test_condense_text_leaves_short_texts_alone(word_summarizer):
+    text = '. '.join(SENTENCES)
+    assert pipeline.condense_text(text, token_budget=100) == (text, {'sentences': 5, 'kept': 5})
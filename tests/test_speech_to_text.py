@@ -0,0 +1,187 @@
+import io
+import wave
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('speech_recognition')
+
+from models.speech_to_text import SpeechToText, iter_speech_segments, iter_voiced, voiced_spans
+
+RATE = 16000
+WINDOW = RATE * 50 // 1000
+
+
+def tone(seconds, amplitude=8000):
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype(np.int16)
+
+
+def silence(seconds):
+    return np.zeros(int(seconds * RATE), dtype=np.int16)
+
+
+def test_silence_has_no_voiced_spans():
+    assert voiced_spans(silence(2)) == []
+
+
+def test_empty_buffer():
+    assert voiced_spans(np.zeros(0, dtype=np.int16)) == []
+
+
+def test_speech_is_found_and_widened_by_the_hangover():
+    samples = np.concatenate([silence(1), tone(1), silence(1)])
+    spans = voiced_spans(samples, hangover_ms=100)
+    assert spans == [(RATE - 2 * WINDOW, 2 * RATE + 2 * WINDOW)]
+
+
+def test_pauses_longer_than_the_hangover_split_spans():
+    samples = np.concatenate([tone(0.5), silence(1), tone(0.5)])
+    spans = voiced_spans(samples, hangover_ms=0)
+    assert spans == [(0, RATE // 2), (3 * RATE // 2, 2 * RATE)]
+
+
+def test_short_pauses_are_bridged_by_the_hangover():
+    samples = np.concatenate([tone(0.5), silence(0.2), tone(0.5)])
+    assert voiced_spans(samples, hangover_ms=300) == [(0, len(samples))]
+
+
+def test_quiet_noise_stays_below_the_threshold():
+    rng = np.random.default_rng(0)
+    noise = rng.normal(0, 50, RATE).astype(np.int16)
+    assert voiced_spans(noise) == []
+
+
+def test_partial_last_window_ends_at_the_buffer():
+    samples = np.concatenate([silence(1), tone(0.51)])
+    spans = voiced_spans(samples, hangover_ms=0)
+    assert spans == [(RATE, len(samples))]
+
+
+def test_results_do_not_depend_on_the_block_size(monkeypatch):
+    import models.speech_to_text as speech_to_text
+    rng = np.random.default_rng(1)
+    samples = np.concatenate([np.concatenate([tone(rng.uniform(0.1, 1)), silence(rng.uniform(0.1, 1))])
+                              for _ in range(20)])
+    expected = voiced_spans(samples)
+    monkeypatch.setattr(speech_to_text, 'VAD_BLOCK_WINDOWS', 3)
+    assert voiced_spans(samples) == expected
+
+
+def speech_like(seed=1, parts=20):
+    rng = np.random.default_rng(seed)
+    return np.concatenate([np.concatenate([tone(rng.uniform(0.1, 1)), silence(rng.uniform(0.1, 1))])
+                           for _ in range(parts)])
+
+
+def blocks_of(samples, size):
+    return (samples[start:start + size] for start in range(0, len(samples), size))
+
+
+def test_streamed_fragments_match_the_buffer_spans():
+    samples = speech_like()
+    spans = []
+    span = None
+    for fragment in iter_voiced(blocks_of(samples, 777)):
+        if fragment is None:
+            spans.append(span)
+            span = None
+            continue
+        start, audio = fragment
+        assert np.array_equal(audio, samples[start:start + len(audio)])
+        assert span is None or span[1] == start
+        span = (start if span is None else span[0], start + len(audio))
+    assert spans == voiced_spans(samples)
+
+
+def test_segments_stay_within_the_maximum_and_keep_only_speech():
+    samples = np.concatenate([tone(3), silence(1), tone(2.5), silence(1), tone(1)])
+    segments = list(iter_speech_segments(iter_voiced(blocks_of(samples, RATE)), min_seconds=2, max_seconds=2))
+    lengths = [len(audio.frame_data) // 2 for _, _, audio in segments]
+    assert all(length <= 2 * RATE for length in lengths)
+    assert sum(lengths) == sum(end - start for start, end in voiced_spans(samples))
+    assert [start for start, _, _ in segments] == sorted(start for start, _, _ in segments)
+
+
+def wav_bytes(samples, rate, channels=1):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(samples, channels).tobytes())
+    return buffer.getvalue()
+
+
+def test_wav_is_streamed_without_ffmpeg(monkeypatch):
+    import models.speech_to_text as speech_to_text
+    monkeypatch.setattr(speech_to_text, 'FFMPEG_BINARY', 'no-such-ffmpeg')
+    rate = 44100
+    t = np.arange(rate * 3) / rate
+    samples = (8000 * np.sin(2 * np.pi * 440 * t) * (t >= 1) * (t < 2)).astype(np.int16)
+    stats = {}
+    audio = SpeechToText().voiced_audio(wav_bytes(samples, rate, channels=2), 'wav', stats)
+    assert stats['audio_seconds'] == pytest.approx(3, abs=0.01)
+    assert stats['speech_seconds'] == pytest.approx(1.6, abs=0.06)
+    assert stats['pcm_bytes'] == pytest.approx(3 * RATE * 2, abs=4)
+    assert len(audio) == round(stats['speech_seconds'] * RATE)
+
+
+def test_wav_blocks_are_read_window_by_window():
+    from models.speech_to_text import iter_pcm
+    samples = speech_like(parts=5)
+    blocks = list(iter_pcm(io.BytesIO(wav_bytes(samples, RATE)), 'wav', block_samples=RATE))
+    assert max(len(block) for block in blocks) == RATE
+    assert np.array_equal(np.concatenate(blocks), samples)
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """An 'ffmpeg' that passes raw PCM from stdin to stdout, or fails on input starting with 'bad'."""
+    import sys
+    import models.speech_to_text as speech_to_text
+    script = tmp_path / 'ffmpeg'
+    script.write_text(f"#!{sys.executable}\n"
+                      "import sys\n"
+                      "data = sys.stdin.buffer.read()\n"
+                      "if data.startswith(b'bad'):\n"
+                      "    sys.stderr.write('invalid data'); sys.exit(1)\n"
+                      "sys.stdout.buffer.write(data)\n")
+    script.chmod(0o755)
+    monkeypatch.setattr(speech_to_text, 'FFMPEG_BINARY', str(script))
+
+
+def test_ffmpeg_output_is_read_in_blocks(fake_ffmpeg):
+    from models.speech_to_text import iter_pcm
+    samples = speech_like(parts=5)
+    blocks = list(iter_pcm(samples.tobytes(), 'mp3', block_samples=RATE))
+    assert all(len(block) == RATE for block in blocks[:-1])
+    assert np.array_equal(np.concatenate(blocks), samples)
+
+
+def test_ffmpeg_errors_are_raised(fake_ffmpeg):
+    from models.speech_to_text import iter_pcm
+    with pytest.raises(RuntimeError, match='invalid data'):
+        list(iter_pcm(b'bad audio', 'mp3'))
+
+
+def test_chunked_route_ends_with_an_error_event(monkeypatch):
+    flask = pytest.importorskip('flask')
+    import models.speech_to_text as speech_to_text
+    from routes.stt_api import stt_api
+    monkeypatch.setattr(speech_to_text, 'FFMPEG_BINARY', 'no-such-ffmpeg')
+    app = flask.Flask(__name__)
+    app.register_blueprint(stt_api)
+    response = app.test_client().post('/stt/audio', data={'chunked': 'true', 'file': (io.BytesIO(b'ID3'), 'a.mp3')})
+    body = response.get_data(as_text=True)
+    assert body.startswith('event: error\n')
+    assert 'ffmpeg is required to decode .mp3 audio' in body
+
+
+def test_process_audio_failures_are_logged(monkeypatch, caplog, tmp_path):
+    import models.speech_to_text as speech_to_text
+    monkeypatch.setattr(speech_to_text, 'FFMPEG_BINARY', 'no-such-ffmpeg')
+    path = tmp_path / 'note.mp3'
+    path.write_bytes(b'ID3')
+    assert SpeechToText().process_audio(str(path)) == "Error processing audio file."
+    assert 'ffmpeg is required' in caplog.text
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from utils.sse import sse_event
+
+
+def parse_events(body):
+    events = []
+    for message in body.strip().split('\n\n'):
+        event, data = message.split('\n')
+        assert event.startswith('event: ') and data.startswith('data: ')
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def test_events_are_framed_with_a_json_payload():
+    message = sse_event('token', {'text': 'line one\nline two'})
+    assert message == 'event: token\ndata: {"text": "line one\\nline two"}\n\n'
+    assert parse_events(message) == [('token', {'text': 'line one\nline two'})]
+
+
+def test_generation_errors_end_the_stream_with_an_error_event(monkeypatch):
+    flask = pytest.importorskip('flask')
+    from routes.summarizer_api import summarizer_api
+    import utils.executors as executors
+    import utils.summarizer as summarizer
+
+    def failing_stream(text, length, output_format):
+        yield 'token', 'Partial'
+        yield 'error', {'error': 'model failed'}
+
+    monkeypatch.setattr(summarizer, 'stream_summary', failing_stream)
+    app = flask.Flask(__name__)
+    app.register_blueprint(summarizer_api)
+    executors.init_app(app)
+
+    response = app.test_client().post('/summarize-text', json={'text': 'Some text.', 'stream': True})
+    assert response.mimetype == 'text/event-stream'
+    assert parse_events(response.get_data(as_text=True)) == [
+        ('token', 'Partial'),
+        ('error', {'error': 'model failed'}),
+    ]
+
+
+def test_stream_summary_reports_failures_as_an_error_event(monkeypatch):
+    pytest.importorskip('torch')
+    pytest.importorskip('transformers')
+    import utils.summarizer as summarizer
+
+    def broken_tokenizer():
+        raise RuntimeError('no tokenizer')
+
+    monkeypatch.setattr(summarizer, 'get_tokenizer', broken_tokenizer)
+    monkeypatch.setattr(summarizer, 'chunk_text', lambda text: [text])
+    assert list(summarizer.stream_summary('Some text.')) == [('error', {'error': 'no tokenizer'})]
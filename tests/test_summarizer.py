@@ -0,0 +1,91 @@
+import pytest
+
+pytest.importorskip('nltk')
+
+from utils import summarizer
+
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """Split sentences on '. ' and count one token per word, so no tokenizer or NLTK data is needed."""
+    monkeypatch.setattr(summarizer, 'sent_tokenize',
+                        lambda text: [s if s.endswith('.') else s + '.' for s in text.split('. ') if s])
+    monkeypatch.setattr(summarizer, 'sentence_token_counts',
+                        lambda sentences: [len(sentence.split()) for sentence in sentences])
+
+
+def test_chunk_text_packs_whole_sentences_up_to_the_budget(word_tokens):
+    text = "One two three. Four five. Six seven eight nine. Ten."
+    assert summarizer.chunk_text(text, max_tokens=5) == [
+        "One two three. Four five.",
+        "Six seven eight nine. Ten.",
+    ]
+
+
+def test_chunk_text_keeps_long_sentences_whole(word_tokens):
+    text = "Short one. This sentence alone is longer than the budget. End."
+    assert summarizer.chunk_text(text, max_tokens=3) == [
+        "Short one.",
+        "This sentence alone is longer than the budget.",
+        "End.",
+    ]
+
+
+def test_chunk_text_of_fitting_text_is_one_chunk(word_tokens):
+    text = "One two. Three four."
+    assert summarizer.chunk_text(text, max_tokens=100) == [text]
+
+
+def test_chunk_text_of_empty_text(word_tokens):
+    assert summarizer.chunk_text("", max_tokens=10) == []
+
+
+
+def test_profiles_name_their_checkpoint_and_cache_id(monkeypatch):
+    monkeypatch.setattr(summarizer, 'MODEL_NAME', 'facebook/bart-large-cnn')
+    monkeypatch.setattr(summarizer, 'DISTILLED_MODEL_PATH', '/models/distilbart')
+    assert summarizer.checkpoint('fp32') == ('facebook/bart-large-cnn', 'facebook/bart-large-cnn')
+    assert summarizer.checkpoint('int8') == ('facebook/bart-large-cnn', 'facebook/bart-large-cnn#int8')
+    assert summarizer.checkpoint('distilled') == ('/models/distilbart', '/models/distilbart#distilled')
+    assert summarizer.checkpoint('distilled-int8') == ('/models/distilbart', '/models/distilbart#distilled-int8')
+
+
+def test_distilled_profiles_need_a_local_checkpoint(monkeypatch):
+    monkeypatch.setattr(summarizer, 'DISTILLED_MODEL_PATH', '')
+    with pytest.raises(ValueError, match='SUMMARIZER_DISTILLED_PATH'):
+        summarizer.checkpoint('distilled')
+
+
+def test_unknown_profiles_are_rejected():
+    with pytest.raises(ValueError, match='Unknown summarizer profile'):
+        summarizer.checkpoint('fp16')
+
+@pytest.fixture
+def idle_model(monkeypatch):
+    """Default cost model (0.5 ms per input token, 30 ms per greedy step) with nothing queued."""
+    monkeypatch.setattr(summarizer, 'cost_model', summarizer.CostModel())
+    monkeypatch.setattr(summarizer.scheduler, 'queue_depth', lambda: 0)
+
+
+@pytest.mark.parametrize('deadline_ms, strategy', [
+    (None, 'beam4'),
+    (10000, 'beam4'),
+    (6000, 'beam2'),
+    (4000, 'greedy'),
+    (1010, 'greedy-capped-25'),
+])
+def test_plan_decoding_picks_the_most_thorough_strategy_that_fits(idle_model, deadline_ms, strategy):
+    name, decoding = summarizer.plan_decoding(500, 'medium', deadline_ms)
+    assert name == strategy
+    if strategy == 'greedy-capped-25':
+        assert decoding['max_length'] == 25 and decoding['num_beams'] == 1
+
+
+def test_plan_decoding_gives_up_when_even_capped_output_would_be_late(idle_model):
+    assert summarizer.plan_decoding(500, 'medium', 500) is None
+
+
+def test_plan_decoding_counts_queued_batches(idle_model, monkeypatch):
+    assert summarizer.plan_decoding(500, 'medium', 4000)[0] == 'greedy'
+    monkeypatch.setattr(summarizer.scheduler, 'queue_depth', lambda: 4 * summarizer.MAX_BATCH_SIZE)
+    assert summarizer.plan_decoding(500, 'medium', 4000) is None
@@ -0,0 +1,137 @@
+import pytest
+
+flask = pytest.importorskip('flask')
+pytest.importorskip('nltk')
+
+import routes.summarizer_api as summarizer_api
+import utils.executors as executors
+from utils import pipeline, summarizer
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def summarize_many(texts, length, output_format):
+        # Shortest first, two per batch, like the real token-length sort
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), 2):
+            yield [(i, f'{length}:{texts[i].upper()}') for i in order[start:start + 2]]
+
+    monkeypatch.setattr(summarizer, 'token_count', lambda text: len(text.split()))
+    monkeypatch.setattr(summarizer, 'summarize_many', summarize_many)
+    monkeypatch.setattr(pipeline.mindmap_generator, 'generate_mindmap', lambda text: f'map of {text}')
+    app = flask.Flask(__name__)
+    app.register_blueprint(summarizer_api.summarizer_api)
+    executors.init_app(app)
+    return app.test_client()
+
+
+def test_results_come_back_in_input_order_with_per_item_errors(client):
+    items = [
+        {'text': 'a much longer first text'},
+        {'text': ''},
+        {'text': 'mind', 'format': 'mindmap'},
+        'not an item',
+        {'text': 'short', 'length': 'short'},
+        {'text': 'mid text'},
+    ]
+    response = client.post('/summarize-batch', json={'items': items})
+    assert response.status_code == 200
+    assert response.get_json()['results'] == [
+        {'index': 0, 'summary': 'medium:A MUCH LONGER FIRST TEXT'},
+        {'index': 1, 'error': 'No text provided'},
+        {'index': 2, 'summary': 'map of mind'},
+        {'index': 3, 'error': 'No text provided'},
+        {'index': 4, 'summary': 'short:SHORT'},
+        {'index': 5, 'summary': 'medium:MID TEXT'},
+    ]
+
+
+def test_a_failing_batch_fails_only_its_unfinished_items(client, monkeypatch):
+    def summarize_many(texts, length, output_format):
+        yield [(0, 'first')]
+        raise RuntimeError('model failed')
+
+    monkeypatch.setattr(summarizer, 'summarize_many', summarize_many)
+    response = client.post('/summarize-batch', json={'items': [{'text': 'one'}, {'text': 'two'}]})
+    assert response.get_json()['results'] == [
+        {'index': 0, 'summary': 'first'},
+        {'index': 1, 'error': 'model failed'},
+    ]
+
+
+def test_mindmap_items_hold_an_extractive_slot(client, monkeypatch):
+    monkeypatch.setattr(pipeline.mindmap_generator, 'generate_mindmap',
+                        lambda text: str(executors.pools['extractive'].running))
+    response = client.post('/summarize-batch', json={'items': [{'text': 'mind', 'format': 'mindmap'}]})
+    assert response.get_json()['results'] == [{'index': 0, 'summary': '1'}]
+
+
+def test_too_many_items_are_rejected(client, monkeypatch):
+    monkeypatch.setattr(summarizer_api, 'BATCH_MAX_ITEMS', 2)
+    response = client.post('/summarize-batch', json={'items': [{'text': 'x'}] * 3})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'At most 2 items per request'}
+
+
+class NounTagger:
+    """Tags plural words as nouns; stands in for the NLTK perceptron tagger."""
+
+    def tag_sents(self, sentences):
+        return [[(word, 'NNS' if word.endswith('s') else 'VB') for word in sentence] for sentence in sentences]
+
+
+@pytest.fixture
+def overview_client(client, monkeypatch):
+    """Real TextRank and mind map code with NLTK's data-backed pieces replaced by simple splitting."""
+    from collections import OrderedDict
+    from models import document, min_map
+    from models import summarizer as extractive
+    from utils import nltk_data
+
+    stopwords = type('Stopwords', (), {'words': staticmethod(lambda lang: ['the', 'a', 'in', 'at'])})
+    split_sentences = lambda text: [s if s.endswith('.') else s + '.' for s in text.split('. ')]
+    split_words = lambda sentence: sentence.rstrip('.').split()
+    monkeypatch.setattr(nltk_data, 'require', lambda *names: None)
+    for module in (extractive, min_map):
+        monkeypatch.setattr(module, 'stopwords', stopwords)
+    for module in (extractive, document):
+        monkeypatch.setattr(module, 'sent_tokenize', split_sentences)
+        monkeypatch.setattr(module, 'word_tokenize', split_words)
+    monkeypatch.setattr(document, '_tagger', NounTagger())
+    monkeypatch.setattr(document, '_pos_cache', OrderedDict())
+    monkeypatch.setattr(extractive, '_process_summarizer', None)
+    monkeypatch.setattr(extractive, '_process_generator', None)
+    monkeypatch.setattr(executors.pools['extractive'], 'processes', False)
+    return client
+
+
+OVERVIEW_TEXT = ('Cats chase mice in the barns. Farmers keep cats for the mice. '
+                 'The mice hide from cats at night. Dogs guard the farmers. '
+                 'Barns shelter cats and dogs. The weather was mild.')
+
+
+def test_overview_returns_summary_bullets_and_mindmap(overview_client):
+    response = overview_client.post('/overview', json={'text': OVERVIEW_TEXT, 'length': 'medium',
+                                                      'max_concepts': 3})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert set(body) == {'summary', 'bullets', 'mindmap', 'sentences'}
+    assert body['sentences'] == 6
+    # Both renderings come from one ranking
+    bullets = [line[len('• '):] for line in body['bullets'].split('\n')]
+    assert body['summary'] == ' '.join(bullets)
+    assert body['mindmap']['central'] == 'Cats'
+    # Nouns by frequency; cats and barns share two sentences, cats and farmers one
+    assert [(branch['name'], branch['weight']) for branch in body['mindmap']['branches']] == [
+        ('Barns', 2), ('Farmers', 1)]
+
+
+@pytest.mark.parametrize('payload, error', [
+    ({}, 'No text provided'),
+    ({'text': '   '}, 'No text provided'),
+    ({'text': 'Some text.', 'max_concepts': 'many'}, 'max_concepts must be an integer'),
+])
+def test_overview_rejects_bad_requests(client, payload, error):
+    response = client.post('/overview', json=payload)
+    assert response.status_code == 400
+    assert response.get_json() == {'error': error}
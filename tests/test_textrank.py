@@ -0,0 +1,116 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('scipy')
+
+from models.textrank import (IncrementalGraph, build_term_matrix, cosine_similarity_matrix, factored_pagerank,
+                             pagerank)
+
+SENTENCES = [
+    "The solar panel converts sunlight into electricity for the house.",
+    "Electricity from the panel charges a battery during the day.",
+    "At night the battery powers the lights and the fridge.",
+    "A cloudy week reduces how much sunlight reaches the panel.",
+    "The inverter turns battery power into household current.",
+    "Gardening is a relaxing hobby on weekends.",
+    "The fridge and the lights draw most of the household current.",
+]
+
+
+def tokenize(sentence):
+    return [word.strip('.,').lower() for word in sentence.split() if len(word) > 3]
+
+
+@pytest.fixture
+def term_matrix():
+    matrix, _ = build_term_matrix([tokenize(sentence) for sentence in SENTENCES])
+    return matrix
+
+def test_term_matrix_is_binary_per_sentence():
+    matrix, vocabulary = build_term_matrix([["a", "b", "a"], ["b", "c"]])
+    assert matrix.shape == (2, 3)
+    assert matrix.toarray().tolist() == [[1, 1, 0], [0, 1, 1]]
+    assert vocabulary == {"a": 0, "b": 1, "c": 2}
+
+
+def test_dense_pagerank_matches_networkx(term_matrix):
+    nx = pytest.importorskip('networkx')
+    similarity = cosine_similarity_matrix(term_matrix)
+    expected = nx.pagerank(nx.from_numpy_array(similarity))
+    np.testing.assert_allclose(pagerank(similarity), [expected[i] for i in range(len(SENTENCES))], atol=1e-5)
+
+def test_factored_pagerank_matches_dense(term_matrix):
+    np.testing.assert_allclose(factored_pagerank(term_matrix), pagerank(cosine_similarity_matrix(term_matrix)),
+                               atol=1e-12)
+
+
+def test_factored_pagerank_of_empty_matrix():
+    matrix, _ = build_term_matrix([])
+    assert factored_pagerank(matrix).shape == (0,)
+
+
+def test_incremental_graph_matches_full_ranking_after_edits(term_matrix):
+    graph = IncrementalGraph()
+    np.testing.assert_allclose(graph.update(SENTENCES, tokenize), pagerank(cosine_similarity_matrix(term_matrix)),
+                               atol=1e-9)
+
+    edited = list(SENTENCES)
+    edited[2] = "At night the battery powers the lights, the fridge and the inverter."
+    edited.insert(4, "Sunlight is free, the panel and the battery are not.")
+    del edited[-2]
+    scores = graph.update(edited, tokenize)
+    assert graph.changed == 2
+
+    matrix, _ = build_term_matrix([tokenize(sentence) for sentence in edited])
+    expected = pagerank(cosine_similarity_matrix(matrix))
+    np.testing.assert_allclose(scores, expected, atol=1e-5)
+    assert np.argsort(-scores)[:3].tolist() == np.argsort(-expected)[:3].tolist()
+
+
+def test_incremental_graph_reuses_scores_when_unchanged():
+    graph = IncrementalGraph()
+    first = graph.update(SENTENCES, tokenize)
+    assert graph.update(list(SENTENCES), tokenize) is first
+    assert graph.changed == 0
+
+
+def test_incremental_graph_bounds_its_vocabulary_and_counts_it(monkeypatch):
+    import models.textrank as textrank
+    monkeypatch.setattr(textrank, 'VOCABULARY_SLACK', 16)
+    rng = np.random.default_rng(0)
+    graph = IncrementalGraph()
+    sentences = [" ".join(f"word{n}" for n in rng.integers(0, 40, 6)) for _ in range(10)]
+    graph.update(sentences, tokenize)
+    for edit in range(40):
+        # Every rewrite brings words no earlier version used
+        sentences[edit % 10] = " ".join(f"edit{edit}x{n}" for n in range(6))
+        scores = graph.update(sentences, tokenize)
+
+    in_use = {word for sentence in sentences for word in tokenize(sentence)}
+    assert len(graph.vocabulary) <= max(2 * len(in_use), 16)
+    assert set(graph.vocabulary) >= in_use
+    matrix, _ = build_term_matrix([tokenize(sentence) for sentence in sentences])
+    np.testing.assert_allclose(scores, factored_pagerank(matrix), atol=1e-5)
+    assert graph.nbytes > sum(len(sentence) for sentence in sentences) + graph.term_matrix.data.nbytes
+
+
+@pytest.fixture
+def summarizer_engines():
+    pytest.importorskip('nltk')
+    from utils import nltk_data
+    if nltk_data.missing('punkt', 'stopwords'):
+        pytest.skip("NLTK punkt and stopwords data not installed")
+    pytest.importorskip('networkx')
+    from models.summarizer import Summarizer
+    return Summarizer(engine="reference"), Summarizer(engine="vectorized")
+
+
+def test_rank_sentences_agrees_across_engines(summarizer_engines):
+    reference, vectorized = summarizer_engines
+    expected = reference._rank_sentences(SENTENCES)
+    np.testing.assert_allclose(vectorized._rank_sentences(SENTENCES), expected, atol=1e-5)
+    np.testing.assert_allclose(vectorized._rank_sentences(SENTENCES, document_id="note"), expected, atol=1e-5)
+
+    edited = SENTENCES[:3] + ["The inverter and the battery sit next to the fridge."] + SENTENCES[3:]
+    np.testing.assert_allclose(vectorized._rank_sentences(edited, document_id="note"),
+                               reference._rank_sentences(edited), atol=1e-5)
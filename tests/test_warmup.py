@@ -0,0 +1,67 @@
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+flask = pytest.importorskip('flask')
+
+from utils import warmup
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_ready_answers_503_until_warm_up_finishes(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setitem(warmup.COMPONENTS, 'nltk', (lambda: None, lambda: True))
+    monkeypatch.setitem(warmup.COMPONENTS, 'extractive', (lambda: release.wait(5), None))
+    monkeypatch.setattr(warmup, '_state', {name: {'status': 'cold'} for name in warmup.COMPONENTS})
+
+    app = flask.Flask(__name__)
+    warmup.init_app(app, 'extractive')
+    client = app.test_client()
+    assert client.get('/health/live').status_code == 200
+
+    response = client.get('/health/ready')
+    assert response.status_code == 503
+    body = response.get_json()
+    assert body['warm_up'] == ['extractive']
+    assert body['components']['nltk']['status'] == 'ready'
+    assert body['components']['extractive']['status'] in ('cold', 'loading')
+
+    release.set()
+    wait_for(lambda: client.get('/health/ready').status_code == 200)
+    assert client.get('/health/ready').get_json()['components']['extractive']['status'] == 'ready'
+
+
+def test_failed_warm_up_keeps_the_app_unready(monkeypatch):
+    def broken():
+        raise RuntimeError('model missing')
+
+    monkeypatch.setitem(warmup.COMPONENTS, 'nltk', (lambda: None, lambda: True))
+    monkeypatch.setitem(warmup.COMPONENTS, 'ocr', (broken, None))
+    monkeypatch.setattr(warmup, '_state', {name: {'status': 'cold'} for name in warmup.COMPONENTS})
+
+    app = flask.Flask(__name__)
+    warmup.init_app(app, 'ocr')
+    client = app.test_client()
+    wait_for(lambda: client.get('/health/ready').get_json()['components']['ocr']['status'] == 'failed')
+    response = client.get('/health/ready')
+    assert response.status_code == 503
+    assert response.get_json()['components']['ocr']['error'] == 'model missing'
+
+
+def test_app_import_leaves_heavy_modules_unloaded():
+    code = ("import sys, app; app.create_app(); "
+            "print(','.join(m for m in ('docx', 'speech_recognition', 'networkx', 'cv2', 'torch') if m in sys.modules))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, timeout=60,
+                            cwd=Path(__file__).resolve().parents[1])
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+
+class BatchScheduler:
+    """
+    Group queued requests into batches and run them on a single worker thread.
+
+    Requests are grouped by a key (e.g. length setting and token-length
+    bucket). A group is dispatched once it reaches ``max_batch_size`` or its
+    oldest request has waited ``max_wait_ms``. Each caller receives a
+    ``concurrent.futures.Future`` resolved with its own result.
+
+    Work that cannot be batched (e.g. streamed generation) is queued with
+    ``call`` and runs on the same worker thread, so nothing else touches the
+    model while it runs.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=20):
+        # run_batch(key, payloads) must return one result per payload, in order
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms) / 1000.0)
+        self._groups = OrderedDict()
+        self._calls = deque()
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def submit(self, key, payload):
+        """Queue a payload under a batching key and return a future for its result."""
+        future = Future()
+        with self._condition:
+            self._ensure_worker()
+            group = self._groups.setdefault(key, [])
+            group.append((time.monotonic(), payload, future))
+            self._condition.notify()
+        return future
+
+    def call(self, fn, *args, **kwargs):
+        """Queue fn to run alone on the worker thread and return a future for its result."""
+        future = Future()
+        with self._condition:
+            self._ensure_worker()
+            self._calls.append((fn, args, kwargs, future))
+            self._condition.notify()
+        return future
+
+    def queue_depth(self):
+        """Number of requests waiting to be batched or run."""
+        with self._condition:
+            return sum(len(group) for group in self._groups.values()) + len(self._calls)
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+            self._worker.start()
+
+    def _next_batch(self):
+        """Block until a call or a group is ready, then pop the call or up to max_batch_size entries."""
+        with self._condition:
+            while True:
+                if self._calls:
+                    return None, self._calls.popleft()
+                now = time.monotonic()
+                timeout = None
+                for key, group in self._groups.items():
+                    waited = now - group[0][0]
+                    if len(group) >= self.max_batch_size or waited >= self.max_wait:
+                        batch = group[:self.max_batch_size]
+                        del group[:self.max_batch_size]
+                        if not group:
+                            del self._groups[key]
+                        return key, batch
+                    remaining = self.max_wait - waited
+                    timeout = remaining if timeout is None else min(timeout, remaining)
+                self._condition.wait(timeout)
+
+    def _run(self):
+        while True:
+            key, batch = self._next_batch()
+            if key is None:
+                fn, args, kwargs, future = batch
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+                continue
+            futures = [future for _, _, future in batch]
+            try:
+                results = self.run_batch(key, [payload for _, payload, _ in batch])
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
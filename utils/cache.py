@@ -0,0 +1,202 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'ai_notes_cache'))
+CACHE_MEMORY_ITEMS = int(os.environ.get('CACHE_MEMORY_ITEMS', 256))
+CACHE_DISK_BYTES = int(os.environ.get('CACHE_DISK_BYTES', 256 * 1024 * 1024))
+
+
+def hash_bytes(data):
+    """Content hash used as the cache key for raw file bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(source, chunk_size=1024 * 1024):
+    """Content hash of a file on disk or an open binary file object, read in chunks."""
+    digest = hashlib.sha256()
+    if hasattr(source, 'read'):
+        for chunk in iter(lambda: source.read(chunk_size), b''):
+            digest.update(chunk)
+        source.seek(0)
+        return digest.hexdigest()
+    with open(source, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_bytes(source):
+    """Return the raw bytes of a bytes-like object, an open file object or a path."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if hasattr(source, 'read'):
+        data = source.read()
+        source.seek(0)
+        return data
+    with open(source, 'rb') as f:
+        return f.read()
+
+
+def extraction_key(data, kind, *options):
+    """Key for text extracted from file bytes with a given extractor and options."""
+    return hash_bytes(json.dumps([kind, *options]).encode('utf-8') + b'\0' + bytes(data))
+
+
+def summary_key(text, length, output_format, model_id):
+    """Key for a summary of text produced with given settings and model."""
+    payload = json.dumps([text, length, output_format, model_id], ensure_ascii=False)
+    return hash_bytes(payload.encode('utf-8'))
+
+
+class TwoTierCache:
+    """
+    In-process LRU backed by an on-disk JSON store with size-based eviction.
+
+    Values must be JSON serializable. Disk entries are evicted least
+    recently used first (by modification time, refreshed on every hit) once
+    the store grows past max_disk_bytes.
+    """
+
+    def __init__(self, name, max_items=CACHE_MEMORY_ITEMS, max_disk_bytes=CACHE_DISK_BYTES,
+                 cache_dir=CACHE_DIR):
+        self.name = name
+        self.max_items = max_items
+        self.max_disk_bytes = max_disk_bytes
+        self.directory = os.path.join(cache_dir, name)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self.counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                         'memory_evictions': 0, 'disk_evictions': 0}
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _disk_entries(self):
+        entries = []
+        if not os.path.isdir(self.directory):
+            return entries
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+            self.counters['memory_evictions'] += 1
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.counters['memory_hits'] += 1
+                return self._memory[key]
+
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = json.load(f)
+                os.utime(path)
+            except (OSError, ValueError):
+                self.counters['misses'] += 1
+                return None
+
+            self.counters['disk_hits'] += 1
+            self._remember(key, value)
+            return value
+
+    def set(self, key, value):
+        """Store value in memory and on disk, evicting old disk entries if needed."""
+        with self._lock:
+            self._remember(key, value)
+            path = self._path(key)
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(value, f, ensure_ascii=False)
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(temp_path, path)
+            except OSError as e:
+                logger.warning("Error writing cache entry: %s", e)
+                return
+
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            else:
+                self._disk_bytes += os.path.getsize(path) - previous
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            self.counters['disk_evictions'] += 1
+        self._disk_bytes = total
+
+    def purge(self):
+        """Remove every entry from both tiers and return how many disk entries were deleted."""
+        with self._lock:
+            self._memory.clear()
+            removed = 0
+            for _, _, path in self._disk_entries():
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    continue
+            self._disk_bytes = 0
+            return removed
+
+    def stats(self):
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            return {
+                **self.counters,
+                'hits': self.counters['memory_hits'] + self.counters['disk_hits'],
+                'memory_entries': len(self._memory),
+                'disk_bytes': self._disk_bytes,
+            }
+
+
+def get_or_compute(cache, key, compute):
+    """Return the cached value for key, computing and storing it on a miss."""
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value)
+    return value
+
+
+extraction_cache = TwoTierCache('extraction')
+summary_cache = TwoTierCache('summary')
+
+caches = {
+    'extraction': extraction_cache,
+    'summary': summary_cache,
+}
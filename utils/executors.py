@@ -0,0 +1,211 @@
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from utils.metrics import DURATION_BUCKETS, registry
+
+# Cores this process may keep busy; split between torch, OCR and extractive workers
+CPU_BUDGET = int(os.environ.get('CPU_BUDGET', os.cpu_count() or 1))
+THREAD_BUDGETS = {
+    'abstractive': max(1, CPU_BUDGET // 2),
+    'ocr': max(1, CPU_BUDGET // 4),
+    'extractive': max(1, CPU_BUDGET // 4),
+}
+# Run extractive summaries in worker processes, off the request threads' GIL
+EXTRACTIVE_PROCESSES = os.environ.get('EXTRACTIVE_PROCESSES', '1' if CPU_BUDGET > 1 else '0').lower() in ('1', 'true', 'yes')
+
+
+def _limit(name, setting, default):
+    return int(os.environ.get(f'POOL_{name.upper()}_{setting}', default))
+
+
+# name -> (requests running at once, requests allowed to wait for a slot)
+POOL_LIMITS = {
+    'ocr': (_limit('ocr', 'CONCURRENCY', THREAD_BUDGETS['ocr']), _limit('ocr', 'QUEUE', 16)),
+    'speech': (_limit('speech', 'CONCURRENCY', 2), _limit('speech', 'QUEUE', 16)),
+    'extractive': (_limit('extractive', 'CONCURRENCY', THREAD_BUDGETS['extractive']),
+                   _limit('extractive', 'QUEUE', 32)),
+    # Abstractive requests mostly wait on the batch scheduler; allow enough to fill a batch
+    'abstractive': (_limit('abstractive', 'CONCURRENCY', 8), _limit('abstractive', 'QUEUE', 32)),
+}
+
+
+class PoolBusy(Exception):
+    """Raised when a pool already has its limit of requests waiting for a slot."""
+
+    def __init__(self, pool, retry_after):
+        super().__init__(f'{pool} pool is busy, retry in {retry_after}s')
+        self.pool = pool
+        self.retry_after = retry_after
+
+
+def _init_worker(threads):
+    """Keep numerical libraries in a worker process within its thread budget."""
+    for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[variable] = str(threads)
+
+
+class ResourcePool:
+    """
+    Concurrency limit and bounded wait queue for one class of work.
+
+    Callers hold a slot while they work; at most ``concurrency`` hold one at
+    a time and at most ``queue_limit`` may wait, beyond which PoolBusy is
+    raised with an estimated retry delay. With ``processes``, run() executes
+    the function in a spawned worker process instead of the calling thread.
+    Wait times are recorded in notes_pool_wait_seconds.
+    """
+
+    def __init__(self, name, concurrency, queue_limit, processes=False, threads_per_process=1):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.queue_limit = max(0, queue_limit)
+        self.processes = processes
+        self.threads_per_process = threads_per_process
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.running = 0
+        self.waiting = 0
+        # EWMA of how long a slot is held, for Retry-After estimates
+        self.average_seconds = 1.0
+
+    def retry_after(self):
+        """Seconds until the queue ahead of a new request has likely drained."""
+        return max(1, math.ceil((self.waiting + 1) * self.average_seconds / self.concurrency))
+
+    def acquire(self, wait=False):
+        """Take a slot, blocking while all are held; without wait, raise PoolBusy if the wait queue is full."""
+        with self._lock:
+            if not wait and self.running >= self.concurrency and self.waiting >= self.queue_limit:
+                raise PoolBusy(self.name, self.retry_after())
+            self.waiting += 1
+        start = time.perf_counter()
+        self._slots.acquire()
+        acquired = time.perf_counter()
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+        registry.observe('notes_pool_wait_seconds', 'Time requests waited for a worker pool slot.',
+                         DURATION_BUCKETS, {'pool': self.name}, acquired - start)
+        return acquired
+
+    def release(self, acquired):
+        """Return a slot taken at time acquired (as returned by acquire)."""
+        held = time.perf_counter() - acquired
+        with self._lock:
+            self.running -= 1
+            self.average_seconds = 0.8 * self.average_seconds + 0.2 * held
+        self._slots.release()
+
+    @contextmanager
+    def slot(self, wait=False):
+        """Hold one slot of the pool for the duration of the block."""
+        acquired = self.acquire(wait)
+        try:
+            yield
+        finally:
+            self.release(acquired)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.concurrency,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_init_worker,
+                                                     initargs=(self.threads_per_process,))
+            return self._executor
+
+    def run(self, fn, *args, wait=False, **kwargs):
+        """Run fn while holding a slot, in a worker process when the pool uses processes."""
+        with self.slot(wait):
+            if self.processes:
+                return self._get_executor().submit(fn, *args, **kwargs).result()
+            return fn(*args, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'concurrency': self.concurrency,
+                'queue_limit': self.queue_limit,
+                'running': self.running,
+                'waiting': self.waiting,
+                'average_seconds': round(self.average_seconds, 3),
+                'processes': self.processes,
+            }
+
+
+pools = {
+    name: ResourcePool(name, concurrency, queue_limit,
+                       processes=name == 'extractive' and EXTRACTIVE_PROCESSES)
+    for name, (concurrency, queue_limit) in POOL_LIMITS.items()
+}
+
+
+def slot(name, wait=False):
+    """Hold a slot of the named pool (see ResourcePool.slot); a None name holds nothing."""
+    return pools[name].slot(wait) if name else nullcontext()
+
+
+def run(name, fn, *args, **kwargs):
+    """Run fn on the named pool (see ResourcePool.run)."""
+    return pools[name].run(fn, *args, **kwargs)
+
+
+class _HeldIterable:
+    """Iterate a response body while holding a pool slot, released when exhausted or closed."""
+
+    def __init__(self, pool, acquired, iterable):
+        self._pool = pool
+        self._acquired = acquired
+        self._iterator = iter(iterable)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._iterator)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        # Also called by the server when a client disconnects before the body is exhausted
+        if self._acquired is not None:
+            self._pool.release(self._acquired)
+            self._acquired = None
+            if hasattr(self._iterator, 'close'):
+                self._iterator.close()
+
+
+def hold(name, iterable, wait=False):
+    """
+    Take a slot of the named pool now and hold it while a streamed response is produced.
+
+    Admission happens before the response starts, so a full pool still
+    answers 429 rather than failing mid-stream.
+    """
+    pool = pools[name]
+    return _HeldIterable(pool, pool.acquire(wait), iterable)
+
+
+def init_app(app):
+    """Answer PoolBusy with 429 and Retry-After, and export pool queue depth as gauges."""
+    from flask import jsonify
+
+    @app.errorhandler(PoolBusy)
+    def pool_busy(e):
+        response = jsonify({'error': str(e), 'pool': e.pool, 'retry_after': e.retry_after})
+        response.status_code = 429
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
+    registry.gauge('notes_pool_waiting', 'Requests waiting for a worker pool slot.',
+                   lambda: {(('pool', name),): pool.waiting for name, pool in pools.items()})
+    registry.gauge('notes_pool_running', 'Requests holding a worker pool slot.',
+                   lambda: {(('pool', name),): pool.running for name, pool in pools.items()})
@@ -0,0 +1,151 @@
+import io
+import os
+
+import utils.executors as executors
+import utils.ocr as ocr_processor
+import utils.speech_processor as speech_processor
+from utils.ALLOWED_EXTENSIONS import ALLOWED_EXTENSIONS
+from utils.lazy import LazyModule
+
+# python-docx loads on the first DOCX upload, not with the app
+docx = LazyModule('docx')
+docx_table = LazyModule('docx.table')
+docx_paragraph = LazyModule('docx.text.paragraph')
+
+# Target size of the text blocks extractors yield; pages and sections stay whole up to this
+EXTRACT_BLOCK_CHARS = int(os.environ.get('EXTRACT_BLOCK_CHARS', 16000))
+
+# File extension -> extractor(source, file_ext) generating text blocks
+EXTRACTORS = {}
+# File extension -> executor pool whose slot producing each block holds (None for cheap extractors)
+EXTRACTOR_POOLS = {}
+
+
+def register(*extensions, pool=None):
+    """Register a block extractor for file extensions, with the executor pool its work belongs to."""
+    def decorator(extractor):
+        for extension in extensions:
+            EXTRACTORS[extension] = extractor
+            EXTRACTOR_POOLS[extension] = pool
+        return extractor
+    return decorator
+
+
+def iter_blocks(source, file_ext, wait=False):
+    """
+    Yield the text of an uploaded file (path, bytes or file object) in page- or section-sized blocks.
+
+    Each block ends with a newline, so joining the blocks gives the whole text.
+    A slot of the extractor's pool is held only while a block is produced,
+    not while the caller consumes it. The first block is admitted like any
+    request (PoolBusy unless wait); later ones always wait for a slot, so a
+    started extraction never fails with 429 halfway through.
+    """
+    extractor = EXTRACTORS.get(file_ext)
+    if extractor is None:
+        raise ValueError(f"No extractor registered for .{file_ext} files")
+    pool = EXTRACTOR_POOLS.get(file_ext)
+    blocks = extractor(source, file_ext)
+    try:
+        while True:
+            with executors.slot(pool, wait):
+                block = next(blocks, None)
+            if block is None:
+                return
+            wait = True
+            if block.strip():
+                yield block if block.endswith('\n') else block + '\n'
+    finally:
+        blocks.close()
+
+
+def group_blocks(pieces, block_chars=EXTRACT_BLOCK_CHARS):
+    """Join small pieces (lines, paragraphs, segments) into blocks of about block_chars; None closes a block."""
+    block = []
+    size = 0
+    for piece in pieces:
+        if piece is None or (block and size + len(piece) > block_chars):
+            if block:
+                yield ''.join(block)
+            block = []
+            size = 0
+        if piece:
+            block.append(piece if piece.endswith('\n') else piece + '\n')
+            size += len(block[-1])
+    if block:
+        yield ''.join(block)
+
+
+def _open_binary(source):
+    if isinstance(source, str):
+        return open(source, 'rb')
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+    return source
+
+
+@register(*ALLOWED_EXTENSIONS['text'])
+def extract_text_blocks(source, file_ext):
+    """Read plain text line by line."""
+    stream = io.TextIOWrapper(_open_binary(source), encoding='utf-8')
+    try:
+        yield from group_blocks(stream)
+    finally:
+        # Close files we opened; leave a caller's file object open
+        if isinstance(source, str):
+            stream.close()
+        else:
+            stream.detach()
+
+
+@register('pdf', pool='ocr')
+def extract_pdf_blocks(source, file_ext):
+    """One block per page: its text layer, or OCR for scanned pages."""
+    if not ocr_processor.fitz.available:
+        raise ValueError("PyMuPDF not installed.")
+    with ocr_processor.open_pdf(source) as doc:
+        yield from ocr_processor.iter_pdf_pages(doc)
+
+
+def _docx_pieces(document):
+    """Paragraph and table-row text in document order; None before each heading."""
+    for child in document.element.body.iterchildren():
+        tag = child.tag.rsplit('}', 1)[-1]
+        if tag == 'p':
+            paragraph = docx_paragraph.Paragraph(child, document)
+            if paragraph.style is not None and paragraph.style.name.startswith('Heading'):
+                yield None
+            yield paragraph.text
+        elif tag == 'tbl':
+            for row in docx_table.Table(child, document).rows:
+                yield ' | '.join(cell.text.strip() for cell in row.cells)
+
+
+@register('docx')
+def extract_docx_blocks(source, file_ext):
+    """Stream paragraphs and tables, starting a new block at each heading."""
+    if not docx.available:
+        raise ValueError("python-docx not installed.")
+    stream = _open_binary(source)
+    try:
+        document = docx.Document(stream)
+    finally:
+        if isinstance(source, str):
+            stream.close()
+    yield from group_blocks(_docx_pieces(document))
+
+
+@register(*ALLOWED_EXTENSIONS['image'], pool='ocr')
+def extract_image_blocks(source, file_ext):
+    """A single image is OCR'd as one block; unreadable images raise ValueError."""
+    try:
+        details = ocr_processor.image_details(source)
+    except Exception as e:
+        raise ValueError(f"Error processing image: {e}") from e
+    yield details['text']
+
+
+@register(*ALLOWED_EXTENSIONS['audio'], pool='speech')
+def extract_audio_blocks(source, file_ext):
+    """Transcript segments, grouped into blocks as they are recognized."""
+    yield from group_blocks(segment['text'] for segment in speech_processor.iter_transcript(source, file_ext))
@@ -0,0 +1,200 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import utils.executors as executors
+import utils.mindmap as mindmap_generator
+from utils.pipeline import cached_summary, extract_text
+
+JOB_DB_PATH = os.environ.get('JOB_DB_PATH', os.path.join(tempfile.gettempdir(), 'ai_notes_jobs.sqlite3'))
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_QUEUE_LIMIT = int(os.environ.get('JOB_QUEUE_LIMIT', 100))
+# Running jobs not updated for this long are assumed orphaned by a dead worker and requeued
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', 600))
+# Live workers refresh their running jobs this often, so only dead workers' jobs go stale
+JOB_HEARTBEAT_SECONDS = JOB_STALE_SECONDS / 4
+# /jobs/<id>/events streams stop with an error event after this long; clients may reconnect
+JOB_EVENTS_TIMEOUT_SECONDS = float(os.environ.get('JOB_EVENTS_TIMEOUT_SECONDS', 1800))
+# Start the job manager with the app so queued jobs resume without waiting for a job request
+JOB_RESUME_ON_START = os.environ.get('JOB_RESUME_ON_START', '0').lower() in ('1', 'true', 'yes')
+
+# Stage name -> progress reported once the stage starts
+STAGES = {
+    'queued': 0.0,
+    'extracting': 0.1,
+    'summarizing': 0.5,
+    'mindmap': 0.8,
+    'done': 1.0,
+}
+FINISHED = ('done', 'failed')
+
+
+class QueueFull(Exception):
+    """Raised when the job queue already holds JOB_QUEUE_LIMIT unfinished jobs."""
+
+
+class JobStore:
+    """SQLite-backed job table shared by every worker process on the host."""
+
+    def __init__(self, path=JOB_DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    stage TEXT NOT NULL,
+                    progress REAL NOT NULL,
+                    params TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                )""")
+
+    def create(self, params):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT INTO jobs (id, stage, progress, params, created, updated) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, 'queued', 0.0, json.dumps(params), now, now))
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'stage': row['stage'],
+            'progress': row['progress'],
+            'params': json.loads(row['params']),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created': row['created'],
+            'updated': row['updated'],
+        }
+
+    def claim(self, job_id):
+        """Atomically move a queued job to its first stage; False if another worker owns it."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET stage = 'extracting', progress = ?, updated = ? WHERE id = ? AND stage = 'queued'",
+                (STAGES['extracting'], time.time(), job_id))
+        return cursor.rowcount == 1
+
+    def update(self, job_id, stage, result=None, error=None):
+        progress = STAGES.get(stage, 1.0)
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE jobs SET stage = ?, progress = ?, result = ?, error = ?, updated = ? WHERE id = ?',
+                (stage, progress, json.dumps(result) if result is not None else None, error, time.time(), job_id))
+
+    def touch(self, job_id):
+        """Mark a running job as alive so requeue_stale leaves it alone."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE jobs SET updated = ? WHERE id = ? AND stage NOT IN (?, ?)', (time.time(), job_id, *FINISHED))
+
+    def count_unfinished(self):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM jobs WHERE stage NOT IN (?, ?)', FINISHED).fetchone()[0]
+
+    def requeue_stale(self, stale_seconds=JOB_STALE_SECONDS):
+        """Reset running jobs orphaned by a dead worker and return every queued job id."""
+        cutoff = time.time() - stale_seconds
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET stage = 'queued', progress = 0 WHERE stage NOT IN (?, ?, 'queued') AND updated < ?",
+                (*FINISHED, cutoff))
+            rows = self._conn.execute("SELECT id FROM jobs WHERE stage = 'queued' ORDER BY created").fetchall()
+        return [row['id'] for row in rows]
+
+
+def run_pipeline(store, job_id, params):
+    """Run extraction -> summarization -> mindmap for a job, recording each stage."""
+    # Jobs wait for pool slots instead of being turned away; their queue is already bounded
+    text = extract_text(params['path'], params['file_ext'], wait=True)
+    if not text or len(text.strip()) == 0:
+        raise ValueError('Could not extract text from the file')
+
+    store.update(job_id, 'summarizing')
+    with executors.slot('abstractive', wait=True):
+        result = cached_summary(text, params['length'], params['format'])
+
+    store.update(job_id, 'mindmap')
+    with executors.slot('extractive', wait=True):
+        mindmap = mindmap_generator.generate_mindmap(text)
+    return {
+        'original_text': text,
+        **result,
+        'mindmap': mindmap,
+    }
+
+
+class JobManager:
+    """Bounded worker pool that processes queued jobs from a JobStore."""
+
+    def __init__(self, store, workers=JOB_WORKERS, queue_limit=JOB_QUEUE_LIMIT):
+        self.store = store
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-worker')
+        for job_id in store.requeue_stale():
+            self._executor.submit(self._process, job_id)
+
+    def submit(self, params):
+        """Persist a new job and schedule it; raises QueueFull when the queue is at its limit."""
+        if self.store.count_unfinished() >= self.queue_limit:
+            raise QueueFull(f'{self.queue_limit} jobs already pending')
+        job_id = self.store.create(params)
+        self._executor.submit(self._process, job_id)
+        return job_id
+
+    def _heartbeat(self, job_id, finished):
+        while not finished.wait(JOB_HEARTBEAT_SECONDS):
+            self.store.touch(job_id)
+
+    def _process(self, job_id):
+        if not self.store.claim(job_id):
+            return
+        job = self.store.get(job_id)
+        # A stage can outlast JOB_STALE_SECONDS; the heartbeat keeps the job from being requeued meanwhile
+        finished = threading.Event()
+        threading.Thread(target=self._heartbeat, args=(job_id, finished), daemon=True).start()
+        try:
+            result = run_pipeline(self.store, job_id, job['params'])
+            self.store.update(job_id, 'done', result=result)
+        except Exception as e:
+            self.store.update(job_id, 'failed', error=str(e))
+        finally:
+            finished.set()
+            # A file uploaded with the job is only needed by it
+            if job['params'].get('owned'):
+                try:
+                    os.remove(job['params']['path'])
+                except OSError:
+                    pass
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """Return the process-wide JobManager, creating it (and recovering queued jobs) on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(JobStore())
+        return _manager
@@ -0,0 +1,38 @@
+import importlib
+import importlib.util
+
+
+class LazyModule:
+    """Stand-in for a module that is imported on first attribute access."""
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+
+    def load(self):
+        """Import the module now if it has not been imported yet and return it."""
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._on_load is not None:
+                self._on_load(module)
+            self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    @property
+    def available(self):
+        """Whether the module can be imported, checked without importing it."""
+        if self._module is not None:
+            return True
+        try:
+            return importlib.util.find_spec(self._name) is not None
+        except ModuleNotFoundError:
+            # A parent package (PIL for PIL.Image) is missing
+            return False
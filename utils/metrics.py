@@ -0,0 +1,197 @@
+import bisect
+import collections
+import contextvars
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 100000, 1000000, 16777216)
+
+# Fraction of requests run under the sampling profiler, and the duration above
+# which a profiled request's stacks are written to PROFILE_DIR
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_SLOW_MS = float(os.environ.get('PROFILE_SLOW_MS', 1000))
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(tempfile.gettempdir(), 'ai_notes_profiles'))
+PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+
+_trace = contextvars.ContextVar('trace', default=None)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus data model."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Histograms keyed by metric name and label values, plus gauges read at render time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = collections.OrderedDict()
+        self._gauges = collections.OrderedDict()
+
+    def gauge(self, name, help_text, collect):
+        """Register a gauge; collect() returns {label items tuple: value} when metrics are rendered."""
+        with self._lock:
+            self._gauges[name] = (help_text, collect)
+
+    def observe(self, name, help_text, buckets, labels, value):
+        with self._lock:
+            family = self._metrics.setdefault(name, (help_text, {}))[1]
+            key = tuple(sorted(labels.items()))
+            if key not in family:
+                family[key] = Histogram(buckets)
+            family[key].observe(value)
+
+    def render(self):
+        """Render every histogram and gauge in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, (help_text, family) in self._metrics.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in family.items():
+                    labels = ",".join(f'{k}="{v}"' for k, v in key)
+                    cumulative = 0
+                    for bound, count in zip(list(histogram.buckets) + ['+Inf'], histogram.counts):
+                        cumulative += count
+                        le = f'le="{bound}"'
+                        lines.append(f"{name}_bucket{{{labels + ',' if labels else ''}{le}}} {cumulative}")
+                    suffix = f"{{{labels}}}" if labels else ""
+                    lines.append(f"{name}_sum{suffix} {histogram.sum}")
+                    lines.append(f"{name}_count{suffix} {histogram.count}")
+            gauges = list(self._gauges.items())
+        for name, (help_text, collect) in gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for key, value in collect().items():
+                labels = ",".join(f'{k}="{v}"' for k, v in key)
+                lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+@contextmanager
+def stage(name, **sizes):
+    """
+    Time a pipeline stage and record its duration, input sizes and outcome.
+
+    Sizes (pages, sentences, tokens, audio_seconds, ...) can be passed up
+    front or added to the yielded dict once known. The duration is also
+    appended to the current request's trace for the Server-Timing header.
+    """
+    info = dict(sizes)
+    outcome = 'ok'
+    start = time.perf_counter()
+    try:
+        yield info
+    except Exception:
+        outcome = 'error'
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        registry.observe('notes_stage_duration_seconds', 'Duration of pipeline stages.',
+                         DURATION_BUCKETS, {'stage': name, 'outcome': outcome}, duration)
+        for unit, value in info.items():
+            if isinstance(value, (int, float)):
+                registry.observe('notes_stage_input_size', 'Input size handled by pipeline stages.',
+                                 SIZE_BUCKETS, {'stage': name, 'unit': unit}, value)
+        trace = _trace.get()
+        if trace is not None:
+            trace.append((name, duration))
+
+
+class StackSampler:
+    """Sample one thread's Python stack on a timer and count collapsed stacks."""
+
+    def __init__(self, thread_id, interval_ms=PROFILE_INTERVAL_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000.0
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self, path):
+        """Write the samples in collapsed-stack format (one 'frame;frame count' per line)."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def init_app(app):
+    """Install per-request tracing, the Server-Timing header, the profiler hook and /metrics."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_trace():
+        g.trace = []
+        _trace.set(g.trace)
+        g.request_start = time.perf_counter()
+        g.sampler = None
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            g.sampler = StackSampler(threading.get_ident()).start()
+
+    @app.after_request
+    def finish_trace(response):
+        if 'request_start' not in g:
+            return response
+        duration = time.perf_counter() - g.request_start
+        endpoint = request.endpoint or 'unknown'
+        registry.observe('notes_http_request_duration_seconds', 'Duration of HTTP requests.',
+                         DURATION_BUCKETS, {'endpoint': endpoint, 'status': str(response.status_code)}, duration)
+
+        timings = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in g.trace]
+        timings.append(f"total;dur={duration * 1000:.1f}")
+        response.headers['Server-Timing'] = ", ".join(timings)
+
+        if g.sampler is not None:
+            g.sampler.stop()
+            if duration * 1000 >= PROFILE_SLOW_MS:
+                path = os.path.join(PROFILE_DIR, f"{int(time.time())}-{endpoint}-{int(duration * 1000)}ms.folded")
+                g.sampler.dump(path)
+        return response
+
+    @app.teardown_request
+    def reset_trace(exc=None):
+        _trace.set(None)
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
@@ -1,3 +1,6 @@
+from utils.metrics import stage
+
+
 def generate_mindmap(text):
     """
     Generate a simple mindmap-style representation from text.
@@ -8,15 +11,16 @@ def generate_mindmap(text):
     Returns:
         A string representing the mindmap
     """
-    sentences = text.split('. ')
-    if not sentences:
-        return "No content to generate mindmap."
+    with stage('mindmap.generate', chars=len(text)):
+        sentences = text.split('. ')
+        if not sentences:
+            return "No content to generate mindmap."
     
-    central_node = sentences[0]
-    branches = sentences[1:] if len(sentences) > 1 else ["No additional points."]
+        central_node = sentences[0]
+        branches = sentences[1:] if len(sentences) > 1 else ["No additional points."]
     
-    mindmap = f"Central Idea: {central_node}\n"
-    for i, branch in enumerate(branches, 1):
-        mindmap += f"Branch {i}: {branch}\n"
+        mindmap = f"Central Idea: {central_node}\n"
+        for i, branch in enumerate(branches, 1):
+            mindmap += f"Branch {i}: {branch}\n"
     
-    return mindmap
+        return mindmap
@@ -0,0 +1,44 @@
+import os
+
+import nltk
+
+# NLTK data shipped with the app and searched before nltk's default locations; nothing is
+# ever downloaded at runtime. Populate it at build time with:
+#   python -m nltk.downloader -d nltk_data punkt stopwords averaged_perceptron_tagger
+NLTK_DATA_DIR = os.environ.get('NLTK_DATA_DIR', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'nltk_data'))
+
+# Resource name -> path nltk.data.find resolves it under
+RESOURCES = {
+    'punkt': 'tokenizers/punkt',
+    'stopwords': 'corpora/stopwords',
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',
+}
+
+if NLTK_DATA_DIR not in nltk.data.path:
+    nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+_found = set()
+
+
+def missing(*names):
+    """Names of the given resources (default: all of RESOURCES) not found locally."""
+    absent = []
+    for name in names or RESOURCES:
+        if name in _found:
+            continue
+        try:
+            nltk.data.find(RESOURCES[name])
+            _found.add(name)
+        except LookupError:
+            absent.append(name)
+    return absent
+
+
+def require(*names):
+    """Raise LookupError naming every resource that is not available locally."""
+    absent = missing(*names)
+    if absent:
+        raise LookupError(
+            f"NLTK data not found: {', '.join(absent)}. Bundle it with "
+            f"'python -m nltk.downloader -d {NLTK_DATA_DIR} {' '.join(absent)}' or set NLTK_DATA_DIR")
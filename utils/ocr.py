@@ -1,68 +1,482 @@
-try:
-    import pytesseract
-    from PIL import Image
-    import fitz  # PyMuPDF
-    import cv2
-    import numpy as np
-    import os
-except ImportError:
-    pytesseract = None
-    Image = None
-    fitz = None
+import collections
+import importlib.util
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from utils.cache import extraction_cache, extraction_key, source_bytes
+from utils.executors import THREAD_BUDGETS
+from utils.lazy import LazyModule
+from utils.metrics import stage
+
+
+# OpenCV, PyMuPDF and Tesseract bindings load on first use, so processes that never run
+# OCR do not pay their import time; OpenCV runs single-threaded, one core per OCR worker
+cv2 = LazyModule('cv2', on_load=lambda module: module.setNumThreads(1))
+fitz = LazyModule('fitz')  # PyMuPDF
+Image = LazyModule('PIL.Image')
+pytesseract = LazyModule('pytesseract')
+# Keeps Tesseract and its language data loaded in-process between calls
+tesserocr = LazyModule('tesserocr')
+HAS_TESSEROCR = importlib.util.find_spec('tesserocr') is not None
+
+# Pages with less text than this in their text layer are treated as scanned and OCR'd
+MIN_PAGE_TEXT_CHARS = 50
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', THREAD_BUDGETS['ocr']))
+# One core per OCR worker: keep tesseract's OpenMP single-threaded
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+# Recognition requests waiting for a worker before submitters block
+OCR_QUEUE_SIZE = int(os.environ.get('OCR_QUEUE_SIZE', 4 * OCR_WORKERS))
+# Images wider than a letter-size page at this resolution are downsampled first
+OCR_TARGET_DPI = int(os.environ.get('OCR_TARGET_DPI', 300))
+PAGE_WIDTH_INCHES = 8.5
+# Recognize only detected text regions instead of the whole image. Off by default without
+# tesserocr: pytesseract starts a tesseract process per call, so per-region calls cost more
+# than one whole-image call.
+OCR_ROI = os.environ.get('OCR_ROI', '1' if HAS_TESSEROCR else '0').lower() in ('1', 'true', 'yes')
+# Regions whose mean word confidence (0-100) falls below this get a second OCR pass
+OCR_MIN_CONFIDENCE = float(os.environ.get('OCR_MIN_CONFIDENCE', 60))
+
+# Tesseract page segmentation modes
+PSM_AUTO = 3
+PSM_BLOCK = 6
+PSM_SPARSE = 11
+
+
+class TesseractPool:
+    """
+    Long-lived OCR worker threads fed from a bounded queue.
+
+    With tesserocr installed each worker keeps one initialized Tesseract
+    engine per language, so language data is loaded once per worker rather
+    than once per image. Without it, workers fall back to pytesseract, which
+    starts a tesseract process per call. Submitting blocks while the queue is
+    full.
+    """
+
+    def __init__(self, workers=OCR_WORKERS, queue_size=OCR_QUEUE_SIZE):
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._threads = [threading.Thread(target=self._run, name=f'ocr-worker-{i}', daemon=True)
+                         for i in range(max(1, workers))]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, image, lang='eng', psm=PSM_AUTO, words=False):
+        """
+        Queue an image array for recognition and return a future for its text.
+
+        With words, the future instead resolves to a list of
+        (text, confidence, (x, y, w, h), line) tuples, one per word.
+        """
+        future = Future()
+        self._queue.put((image, lang, psm, words, future))
+        return future
+
+    def recognize(self, image, lang='eng', psm=PSM_AUTO, words=False):
+        return self.submit(image, lang, psm, words).result()
+
+    def queue_depth(self):
+        """Number of images waiting for a worker."""
+        return self._queue.qsize()
+
+    def _run(self):
+        engines = {}
+        while True:
+            image, lang, psm, words, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self._recognize(engines, image, lang, psm, words))
+            except Exception as e:
+                future.set_exception(e)
+
+    @staticmethod
+    def _recognize(engines, image, lang, psm, words):
+        if not HAS_TESSEROCR:
+            config = f'--psm {psm}'
+            if not words:
+                return pytesseract.image_to_string(image, lang=lang, config=config)
+            data = pytesseract.image_to_data(image, lang=lang, config=config,
+                                             output_type=pytesseract.Output.DICT)
+            return [(text, float(conf), (left, top, width, height), (block, par, line))
+                    for text, conf, left, top, width, height, block, par, line in zip(
+                        data['text'], data['conf'], data['left'], data['top'], data['width'],
+                        data['height'], data['block_num'], data['par_num'], data['line_num'])
+                    if text.strip()]
+
+        if lang not in engines:
+            engines[lang] = tesserocr.PyTessBaseAPI(lang=lang)
+        engine = engines[lang]
+        engine.SetPageSegMode(psm)
+        engine.SetImage(Image.fromarray(image))
+        if not words:
+            return engine.GetUTF8Text()
+        engine.Recognize()
+        iterator = engine.GetIterator()
+        if iterator is None:
+            return []
+        result = []
+        line = 0
+        level = tesserocr.RIL.WORD
+        for word in tesserocr.iterate_level(iterator, level):
+            if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                line += 1
+            text = word.GetUTF8Text(level)
+            if text and text.strip():
+                x1, y1, x2, y2 = word.BoundingBox(level)
+                result.append((text, word.Confidence(level), (x1, y1, x2 - x1, y2 - y1), line))
+        return result
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Process-wide Tesseract worker pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TesseractPool()
+        return _pool
+
+
+def warm_up():
+    """Import the OCR libraries and start the worker pool ahead of the first request."""
+    modules = [cv2, fitz, Image, pytesseract] + ([tesserocr] if HAS_TESSEROCR else [])
+    for module in modules:
+        module.load()
+    get_pool()
+
+
+def is_warm():
+    """True once the OCR libraries are imported and the worker pool is running."""
+    return _pool is not None and cv2.loaded and fitz.loaded
+
+
+def load_image(source):
+    """Load an image from a path, encoded bytes, a file object or an existing array."""
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, str):
+        return cv2.imread(source)
+    data = np.frombuffer(source_bytes(source), dtype=np.uint8)
+    return cv2.imdecode(data, cv2.IMREAD_COLOR)
+
+
+def open_pdf(source):
+    """Open a PDF from a path, bytes or a file object without writing it to disk."""
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=source_bytes(source), filetype='pdf')
 
 
 def preprocess_image(image_path):
     """Preprocess image for better OCR accuracy."""
-    img = cv2.imread(image_path)
-    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    img = load_image(image_path)
+    if img is None:
+        raise ValueError("Could not decode image")
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
     processed = cv2.adaptiveThreshold(gray, 255,
                                       cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
                                       cv2.THRESH_BINARY, 11, 2)
     return processed
 
 
+def downsample(gray, dpi=OCR_TARGET_DPI):
+    """Shrink images wider than a letter-size page at dpi; smaller images are returned as is."""
+    max_width = int(PAGE_WIDTH_INCHES * dpi)
+    height, width = gray.shape[:2]
+    if width <= max_width:
+        return gray
+    scale = max_width / width
+    return cv2.resize(gray, (max_width, max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+
+def deskew(gray, min_angle=0.5):
+    """Rotate a grayscale page so its text lines are horizontal."""
+    ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+    coords = cv2.findNonZero(ink)
+    if coords is None:
+        return gray
+    angle = cv2.minAreaRect(coords)[-1]
+    # minAreaRect reports angles in [0, 90) (OpenCV >= 4.5) or [-90, 0); map to [-45, 45)
+    if angle >= 45:
+        angle -= 90
+    elif angle < -45:
+        angle += 90
+    if abs(angle) < min_angle:
+        return gray
+    height, width = gray.shape
+    rotation = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(gray, rotation, (width, height), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+def text_regions(gray, min_area=400, max_coverage=0.6):
+    """
+    Bounding boxes (x, y, w, h) of text blocks in reading order.
+
+    Ink is dilated so characters and lines merge into blocks, whose outer
+    contours become regions. Returns an empty list when the regions cover
+    most of the image, since recognizing it whole is then cheaper.
+    """
+    ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)[1]
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (25, 15))
+    blocks = cv2.dilate(ink, kernel)
+    contours, _ = cv2.findContours(blocks, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    regions = [cv2.boundingRect(contour) for contour in contours]
+    regions = [region for region in regions if region[2] * region[3] >= min_area]
+    covered = sum(w * h for _, _, w, h in regions)
+    if not regions or covered > max_coverage * gray.shape[0] * gray.shape[1]:
+        return []
+    return sorted(regions, key=lambda region: (region[1], region[0]))
+
+
+def normalize_image(source):
+    """Decode an image to grayscale, downsampled and deskewed."""
+    img = load_image(source)
+    if img is None:
+        raise ValueError("Could not decode image")
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    return deskew(downsample(gray))
+
+
+def prepare_image(source, roi=OCR_ROI):
+    """
+    Downsample, deskew and binarize an image for OCR.
+
+    Returns the binarized image and the text regions to recognize (empty
+    for the whole image).
+    """
+    gray = normalize_image(source)
+    regions = text_regions(gray) if roi else []
+    return preprocess_image(gray), regions
+
+
+def _crop(image, region):
+    x, y, w, h = region
+    return image[y:y + h, x:x + w]
+
+
+def _upscale(gray, factor=2):
+    return cv2.resize(gray, None, fx=factor, fy=factor, interpolation=cv2.INTER_CUBIC)
+
+
+def words_to_text(words):
+    """Join recognized words into lines, breaking wherever the line id changes."""
+    lines = []
+    current = None
+    for text, _, _, line in words:
+        if line != current:
+            lines.append([])
+            current = line
+        lines[-1].append(text.strip())
+    return "\n".join(" ".join(line) for line in lines)
+
+
+def _region_result(words):
+    confidences = [conf for _, conf, _, _ in words if conf >= 0]
+    return {
+        'text': words_to_text(words),
+        'confidence': sum(confidences) / len(confidences) if confidences else 0.0,
+        'words': len(words),
+    }
+
+
+def _mean_confidence(results):
+    """Word-weighted mean confidence of region results."""
+    words = sum(result['words'] for result in results)
+    if not words:
+        return 0.0
+    return sum(result['confidence'] * result['words'] for result in results) / words
+
+
+def ocr_cascade(source, lang='eng', min_confidence=OCR_MIN_CONFIDENCE):
+    """
+    OCR an image in a confidence-driven cascade.
+
+    The first pass recognizes each text region of the binarized image with
+    word confidences. Only regions below min_confidence get a second pass,
+    with a strategy picked from the first result: 'sparse' (PSM 11 on the
+    binarized region) when no words were found, as for scattered or faint
+    text, and 'grayscale' (PSM 6 on the unbinarized region, upscaled) when
+    words were found with low confidence, as for handwriting. Each region
+    keeps whichever pass was more confident. Without tesserocr, where each
+    pass starts a tesseract process, several low-confidence regions are
+    retried as one whole-image pass instead.
+
+    Returns {'text', 'confidence', 'stages'} with one stage per pass: its
+    regions, mean word confidence and seconds.
+    """
+    with stage('ocr.preprocess') as info:
+        gray = normalize_image(source)
+        processed = preprocess_image(gray)
+        regions = text_regions(gray) if OCR_ROI else []
+        info['regions'] = len(regions)
+    psm = PSM_BLOCK if regions else PSM_AUTO
+    regions = regions or [(0, 0, gray.shape[1], gray.shape[0])]
+    pool = get_pool()
+    stages = []
+
+    start = time.perf_counter()
+    with stage('ocr.recognize', regions=len(regions)):
+        futures = [pool.submit(_crop(processed, region), lang, psm, words=True) for region in regions]
+        results = [_region_result(future.result()) for future in futures]
+    stages.append({'name': 'primary', 'regions': len(regions), 'confidence': _mean_confidence(results),
+                   'seconds': time.perf_counter() - start})
+
+    retry = [i for i, result in enumerate(results) if result['confidence'] < min_confidence]
+    if len(retry) > 1 and not HAS_TESSEROCR:
+        # pytesseract starts a process per call: retry the whole image once instead of per region
+        whole = (0, 0, gray.shape[1], gray.shape[0])
+        merged = {'text': "\n".join(result['text'] for result in results if result['text']),
+                  'confidence': _mean_confidence(results), 'words': sum(result['words'] for result in results)}
+        regions, results, retry = [whole], [merged], [0]
+    if retry:
+        start = time.perf_counter()
+        with stage('ocr.retry', regions=len(retry)):
+            pending = []
+            for i in retry:
+                if results[i]['words'] == 0:
+                    strategy, image, retry_psm = 'sparse', _crop(processed, regions[i]), PSM_SPARSE
+                else:
+                    strategy, image, retry_psm = 'grayscale', _upscale(_crop(gray, regions[i])), PSM_BLOCK
+                pending.append((i, strategy, pool.submit(image, lang, retry_psm, words=True)))
+            strategies = {}
+            retried = []
+            improved = 0
+            for i, strategy, future in pending:
+                result = _region_result(future.result())
+                retried.append(result)
+                strategies[strategy] = strategies.get(strategy, 0) + 1
+                if result['confidence'] > results[i]['confidence']:
+                    results[i] = result
+                    improved += 1
+        stages.append({'name': 'retry', 'regions': len(retry), 'strategies': strategies, 'improved': improved,
+                       'confidence': _mean_confidence(retried), 'seconds': time.perf_counter() - start})
+
+    return {
+        'text': "\n".join(result['text'] for result in results if result['text']) + "\n",
+        'confidence': _mean_confidence(results),
+        'stages': stages,
+    }
+
+
+def recognize_regions(processed, regions, lang='eng'):
+    """Queue a prepared image, or its regions, for OCR; returns a callable that joins their text."""
+    pool = get_pool()
+    if not regions:
+        return pool.submit(processed, lang, PSM_AUTO).result
+    futures = [pool.submit(processed[y:y + h, x:x + w], lang, PSM_BLOCK) for x, y, w, h in regions]
+    return lambda: "\n".join(future.result().strip() for future in futures) + "\n"
+
+
+def submit_image(image, lang='eng'):
+    """Prepare an image and queue it for OCR; returns a callable that waits for the text."""
+    processed, regions = prepare_image(image)
+    return recognize_regions(processed, regions, lang)
+
+
+def image_details(image_path, lang='eng'):
+    """Like process_image_details, but raises when the image cannot be read or recognized."""
+    data = source_bytes(image_path)
+    key = extraction_key(data, 'image-cascade', lang, OCR_TARGET_DPI, OCR_ROI, OCR_MIN_CONFIDENCE)
+    result = extraction_cache.get(key)
+    if result is None:
+        result = ocr_cascade(data, lang)
+        extraction_cache.set(key, result)
+    return result
+
+
+def process_image_details(image_path, lang='eng'):
+    """Extract text from an image with the OCR cascade; returns {'text', 'confidence', 'stages'}."""
+    if not pytesseract.available or not Image.available:
+        return {'text': "OCR libraries not installed.", 'confidence': 0.0, 'stages': []}
+
+    try:
+        return image_details(image_path, lang)
+    except Exception as e:
+        return {'text': f"Error processing image: {str(e)}", 'confidence': 0.0, 'stages': []}
+
+
 def process_image(image_path, lang='eng'):
     """Extract text from an image using OCR."""
-    if not pytesseract or not Image:
+    return process_image_details(image_path, lang)['text']
+
+
+def ocr_array(image, lang='eng'):
+    """Run OCR on an in-memory image array."""
+    return submit_image(image, lang)()
+
+
+def _pixmap_to_array(pix):
+    """View a grayscale PyMuPDF pixmap as a NumPy array without encoding it."""
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width)
+
+
+def iter_pdf_pages(doc, lang='eng', window=2 * OCR_WORKERS):
+    """
+    Yield the text of each page of an open PDF document, in page order.
+
+    Each page uses its text layer when it has one; pages without usable text
+    are rasterized straight to NumPy arrays and OCR'd on the shared
+    Tesseract pool. At most window pages are in flight at once, so memory
+    is bounded by the window rather than the page count.
+    """
+    pending = collections.deque()
+    for page_num in range(len(doc)):
+        page = doc.load_page(page_num)
+        text = page.get_text()
+        if len(text.strip()) < MIN_PAGE_TEXT_CHARS:
+            pix = page.get_pixmap(colorspace=fitz.csGRAY)
+            pending.append(submit_image(_pixmap_to_array(pix), lang))
+        else:
+            pending.append(lambda text=text: text)
+        while len(pending) > window:
+            yield pending.popleft()()
+    while pending:
+        yield pending.popleft()()
+
+
+def extract_pdf_pages(doc, lang='eng', parallel=True):
+    """Extract text page by page from an open PDF document (see iter_pdf_pages)."""
+    with stage('ocr.pdf_pages', pages=len(doc)):
+        return list(iter_pdf_pages(doc, lang, window=2 * OCR_WORKERS if parallel else 0))
+
+
+def detect_handwriting(image_path, lang='eng'):
+    """OCR a whole image as one block of handwriting: unbinarized, upscaled, PSM 6."""
+    if not pytesseract.available or not Image.available:
         return "OCR libraries not installed."
 
     try:
-        processed = preprocess_image(image_path)
-        text = pytesseract.image_to_string(processed, lang=lang)
-        return text
+        return get_pool().recognize(_upscale(normalize_image(source_bytes(image_path))), lang, PSM_BLOCK)
     except Exception as e:
         return f"Error processing image: {str(e)}"
 
 
-def detect_handwriting(image_path):
-    """Detect handwriting in an image (currently same as process_image)."""
-    return process_image(image_path)
-
-
 def process_pdf(pdf_path, lang='eng'):
-    """Extract text from a PDF using PyMuPDF and OCR fallback."""
-    if not fitz:
+    """Extract text from a PDF using PyMuPDF, with OCR for scanned pages."""
+    if not fitz.available:
         return "PyMuPDF not installed."
 
     try:
-        doc = fitz.open(pdf_path)
-        text = ""
-
-        # Try extracting regular text
-        for page_num in range(len(doc)):
-            page = doc.load_page(page_num)
-            text += page.get_text()
-
-        # Fallback to OCR if text is too little
-        if len(text.strip()) < 50:
-            text = ""
-            for page_num in range(len(doc)):
-                pix = doc[page_num].get_pixmap()
-                img_path = f"temp_page_{page_num}.png"
-                pix.save(img_path)
-                text += process_image(img_path, lang=lang)
-                os.remove(img_path)
+        data = source_bytes(pdf_path)
+        key = extraction_key(data, 'pdf', lang, OCR_TARGET_DPI, OCR_ROI)
+        text = extraction_cache.get(key)
+        if text is not None:
+            return text
+
+        with stage('ocr.pdf', bytes=len(data)) as info, open_pdf(data) as doc:
+            info['pages'] = len(doc)
+            text = "".join(extract_pdf_pages(doc, lang=lang))
 
+        extraction_cache.set(key, text)
         return text
     except Exception as e:
         return f"Error reading PDF: {str(e)}"
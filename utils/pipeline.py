@@ -0,0 +1,235 @@
+import itertools
+import os
+from collections import defaultdict
+
+import utils.summarizer as summarizer
+import utils.mindmap as mindmap_generator
+from models.summarizer import Summarizer, overview_in_process, summarize_in_process
+import utils.executors as executors
+from utils.cache import get_or_compute, hash_file, summary_cache, summary_key
+from utils.extractors import iter_blocks
+from utils.metrics import stage
+
+# Condense long inputs to their top-ranked sentences before abstractive summarization
+PRECOMPRESS = os.environ.get('SUMMARIZER_PRECOMPRESS', '').lower() in ('1', 'true', 'yes')
+PRECOMPRESS_TOKENS = int(os.environ.get('SUMMARIZER_PRECOMPRESS_TOKENS', summarizer.CHUNK_TOKENS))
+# Streamed uploads return at most this much of their original text
+ORIGINAL_TEXT_CHARS = int(os.environ.get('ORIGINAL_TEXT_CHARS', 200000))
+
+
+def extract_text(source, file_ext, wait=False):
+    """Extract the whole text of an uploaded file (path, bytes or file object) based on its extension."""
+    with stage('extract.document') as info:
+        text = "".join(iter_blocks(source, file_ext, wait))
+        info['chars'] = len(text)
+    return text
+
+
+_extractive = None
+
+
+def get_extractive_summarizer():
+    """Shared TextRank summarizer, created on first use."""
+    global _extractive
+    if _extractive is None:
+        _extractive = Summarizer()
+    return _extractive
+
+
+def extractive_summary(text, length='medium', output_format='paragraph', document_id=None, wait=False):
+    """
+    TextRank summary on the extractive pool.
+
+    Runs in a worker process when the pool uses processes; incremental
+    (document_id) summaries need the ranking state of this process and run
+    in it, under the same concurrency limit.
+    """
+    if document_id is None:
+        return executors.run('extractive', summarize_in_process, text, length, output_format, wait=wait)
+    with executors.slot('extractive', wait):
+        return get_extractive_summarizer().summarize(text, length, output_format, document_id)
+
+
+def overview(text, length='medium', max_concepts=7, wait=False):
+    """
+    Extractive summary, bullets and concept mind map of text, tokenized once.
+
+    Runs on the extractive pool and is cached like any other summary.
+    """
+    key = summary_key(text, length, f"overview:{max_concepts}", 'textrank+concepts')
+    return get_or_compute(summary_cache, key, lambda: executors.run(
+        'extractive', overview_in_process, text, length, max_concepts, wait=wait))
+
+
+def _item_result(index, fn):
+    try:
+        return {'index': index, **fn()}
+    except Exception as e:
+        return {'index': index, 'error': str(e)}
+
+
+def _mindmap_result(text):
+    # Mind maps are extractive work; the batch route only holds an abstractive slot
+    with executors.slot('extractive', wait=True):
+        return {'summary': mindmap_generator.generate_mindmap(text)}
+
+
+def summarize_items(items):
+    """
+    Summarize a list of {text, length, format, engine, document_id} items.
+
+    Abstractive items that fit one input window are grouped by length
+    setting and format, sorted by token length and generated in padded
+    batches; longer ones go through map-reduce one by one. Extractive
+    ("engine": "extractive", re-ranked incrementally when a document_id of
+    an earlier version is given) and mindmap items run individually on the
+    extractive pool. Each
+    failure is reported on its own item. Yields lists of results, with
+    their input index, as each batch finishes.
+    """
+    groups = defaultdict(list)
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('text'), str) or not item['text'].strip():
+            yield [{'index': index, 'error': 'No text provided'}]
+            continue
+        text = item['text']
+        length = item.get('length', 'medium')
+        output_format = item.get('format', 'paragraph')
+        if output_format == 'mindmap':
+            yield [_item_result(index, lambda: _mindmap_result(text))]
+        elif item.get('engine') == 'extractive':
+            # extractive_summary takes its own extractive pool slot
+            yield [_item_result(index, lambda: {
+                'summary': extractive_summary(text, length, output_format, item.get('document_id'), wait=True)})]
+        elif summarizer.token_count(text) > summarizer.MAX_INPUT_TOKENS:
+            yield [_item_result(index, lambda: summarizer.summarize_document(text, length, output_format))]
+        else:
+            groups[(length, output_format)].append(index)
+
+    for (length, output_format), indices in groups.items():
+        texts = [items[i]['text'] for i in indices]
+        done = set()
+        try:
+            for batch in summarizer.summarize_many(texts, length, output_format):
+                done.update(i for i, _ in batch)
+                yield [{'index': indices[i], 'summary': summary} for i, summary in batch]
+        except Exception as e:
+            yield [{'index': indices[i], 'error': str(e)} for i in range(len(indices)) if i not in done]
+
+
+def condense_text(text, token_budget=PRECOMPRESS_TOKENS, document_id=None):
+    """
+    Reduce text to its highest-ranked TextRank sentences, in original order, within token_budget.
+
+    Returns (condensed text, {'sentences', 'kept'}).
+    """
+    with stage('summarize.precompress') as info:
+        condensed, kept, total = get_extractive_summarizer().condense(
+            text, token_budget, summarizer.sentence_token_counts, document_id)
+        info['sentences'] = total
+    return condensed, {'sentences': total, 'kept': kept}
+
+
+def cached_summary(text, length, output_format, deadline_ms=None, precompress=None, document_id=None):
+    """
+    Summarize text (or build its mindmap), reusing cached results for identical requests.
+
+    With deadline_ms, a decoding strategy is picked to fit the latency
+    budget (see utils.summarizer.plan_decoding). When even capped greedy
+    decoding would miss it, the extractive TextRank summarizer is used. The
+    result reports the strategy used.
+
+    With precompress (default SUMMARIZER_PRECOMPRESS), inputs longer than
+    PRECOMPRESS_TOKENS are condensed with condense_text first, so BART sees
+    the whole document in one window instead of map-reducing it. A
+    document_id lets re-submitted edits reuse the previous version's ranking.
+    """
+    if output_format == 'mindmap':
+        key = summary_key(text, length, output_format, 'mindmap')
+        return get_or_compute(summary_cache, key,
+                              lambda: {'summary': mindmap_generator.generate_mindmap(text)})
+
+    if precompress is None:
+        precompress = PRECOMPRESS
+    model_id = f"{summarizer.MODEL_ID}+precompress" if precompress else summarizer.MODEL_ID
+    key = summary_key(text, length, output_format, model_id)
+    # A cached full-quality summary meets any deadline
+    result = summary_cache.get(key)
+    if result is not None:
+        return {'strategy': 'beam4', **result}
+
+    source = text
+    precompressed = None
+    input_tokens = summarizer.token_count(text)
+    if precompress and input_tokens > PRECOMPRESS_TOKENS:
+        source, precompressed = condense_text(text, document_id=document_id)
+        input_tokens = summarizer.token_count(source)
+
+    plan = summarizer.plan_decoding(input_tokens, length, deadline_ms) \
+        if deadline_ms is not None else ('beam4', None)
+    if plan is None:
+        with stage('summarize.extractive_fallback'):
+            summary = extractive_summary(text, length, output_format, document_id, wait=True)
+        return {'summary': summary, 'chunks': 1, 'levels': 1, 'strategy': 'extractive'}
+
+    name, decoding = plan
+    if name != 'beam4':
+        key = summary_key(text, length, output_format, f"{model_id}#{name}")
+
+    def compute():
+        result = summarizer.summarize_document(source, length, output_format, decoding)
+        if precompressed is not None:
+            result['precompressed'] = precompressed
+        return result
+
+    result = get_or_compute(summary_cache, key, compute)
+    return {**result, 'strategy': name}
+
+
+def summarize_upload(source, file_ext, length, output_format, deadline_ms=None, precompress=None, document_id=None):
+    """
+    Extract and summarize an uploaded file (path or seekable file object), streaming blocks from
+    the extractor into the summarizer.
+
+    Peak memory is bounded by the block size rather than the file size; the
+    response carries the first ORIGINAL_TEXT_CHARS of the original text.
+    Mindmaps, deadlines and precompression need the whole text up front and
+    go through extract_text and cached_summary instead. Returns None when no
+    text could be extracted.
+    """
+    if precompress is None:
+        precompress = PRECOMPRESS
+    if output_format == 'mindmap' or deadline_ms is not None or precompress:
+        text = extract_text(source, file_ext)
+        if not text.strip():
+            return None
+        return {'original_text': text,
+                **cached_summary(text, length, output_format, deadline_ms, precompress, document_id)}
+
+    key = summary_key(f"file:{hash_file(source)}.{file_ext}", length, output_format,
+                      f"{summarizer.MODEL_ID}#blocks")
+    result = summary_cache.get(key)
+    if result is not None:
+        return {'strategy': 'beam4', **result}
+
+    blocks = iter_blocks(source, file_ext)
+    first = next(blocks, None)
+    if first is None:
+        return None
+
+    original = []
+    original_chars = 0
+
+    def tee():
+        nonlocal original_chars
+        for block in itertools.chain([first], blocks):
+            if original_chars < ORIGINAL_TEXT_CHARS:
+                original.append(block[:ORIGINAL_TEXT_CHARS - original_chars])
+                original_chars += len(original[-1])
+            yield block
+
+    with stage('summarize.blocks'):
+        result = summarizer.summarize_blocks(tee(), length, output_format)
+    result = {'original_text': ''.join(original), **result}
+    summary_cache.set(key, result)
+    return {**result, 'strategy': 'beam4'}
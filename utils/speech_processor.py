@@ -1,16 +1,102 @@
-import speech_recognition as sr
+from models.speech_to_text import SAMPLE_RATE, STT_BACKEND, SpeechToText, sr
+from utils.cache import extraction_cache, extraction_key, source_bytes
+from utils.metrics import stage
 
-def process_audio(audio_path):
+def process_audio(audio_path, file_ext='wav', stats=None):
     """
     Convert speech in audio file to text.
-    Supports formats compatible with SpeechRecognition library.
+    Accepts a path, raw bytes or a file object in any format ffmpeg can
+    decode. Audio is decoded block by block and only its voiced parts are
+    sent to the recognizer; stats, when given, is filled with the decode and
+    silence-trimming numbers (see SpeechToText.iter_voiced).
     """
     recognizer = sr.Recognizer()
     
     try:
-        with sr.AudioFile(audio_path) as source:
-            audio_data = recognizer.record(source)
-            text = recognizer.recognize_google(audio_data)
-            return text
+        data = source_bytes(audio_path)
+        key = extraction_key(data, 'audio', 'google', file_ext)
+        result = extraction_cache.get(key)
+        if result is None:
+            result = {'text': '', 'stats': {}}
+            with stage('stt.decode', bytes=len(data)) as info:
+                audio = SpeechToText().voiced_audio(data, file_ext, result['stats'])
+                info['audio_seconds'] = result['stats']['audio_seconds']
+            if len(audio):
+                with stage('stt.recognize', audio_seconds=result['stats']['speech_seconds']):
+                    result['text'] = recognizer.recognize_google(sr.AudioData(audio.tobytes(), SAMPLE_RATE, 2))
+            extraction_cache.set(key, result)
+        if stats is not None:
+            stats.update(result['stats'])
+        return result['text']
     except Exception as e:
         return f"Error processing audio: {str(e)}"
+
+
+def process_audio_details(audio_path, file_ext='wav'):
+    """
+    Transcribe audio in silence-delimited segments recognized concurrently.
+
+    Returns {'text', 'segments', 'stats'}: the stitched transcript, its
+    timestamped segments and the decode and silence-trimming numbers.
+    """
+    data = source_bytes(audio_path)
+    key = extraction_key(data, 'audio-chunked', STT_BACKEND, file_ext)
+    result = extraction_cache.get(key)
+    if result is None:
+        with stage('stt.chunked', bytes=len(data)) as info:
+            result = SpeechToText().process_audio_chunked(data, file_ext)
+            info['segments'] = len(result['segments'])
+            info['audio_seconds'] = result['stats']['audio_seconds']
+            info['speech_seconds'] = result['stats']['speech_seconds']
+        # Segments the service failed on are retried on the next request instead of cached as gaps
+        if not any('error' in segment for segment in result['segments']):
+            extraction_cache.set(key, result)
+    return result
+
+
+def process_audio_chunked(audio_path, file_ext='wav'):
+    """
+    Transcribe audio in silence-delimited segments recognized concurrently.
+
+    Returns the stitched transcript; long recordings no longer have to fit
+    into a single recognition request.
+    """
+    try:
+        return process_audio_details(audio_path, file_ext)['text']
+    except Exception as e:
+        return f"Error processing audio: {str(e)}"
+
+
+def iter_transcript(audio_path, file_ext='wav'):
+    """
+    Yield transcript segments in order, from the cache or as they are recognized.
+
+    Shares its cache entry with process_audio_details, which is filled once
+    the whole recording has been transcribed.
+    """
+    data = source_bytes(audio_path)
+    key = extraction_key(data, 'audio-chunked', STT_BACKEND, file_ext)
+    result = extraction_cache.get(key)
+    if result is not None:
+        yield from result['segments']
+        return
+
+    stats = {}
+    segments = []
+    for segment in SpeechToText().transcribe_chunked(data, file_ext, stats=stats):
+        segments.append(segment)
+        yield segment
+    if any('error' in segment for segment in segments):
+        return
+    text = " ".join(segment['text'] for segment in segments if segment['text'])
+    extraction_cache.set(key, {'text': text, 'segments': segments, 'stats': stats})
+
+
+def stream_audio(audio_path, file_ext='wav', stats=None):
+    """
+    Yield timestamped transcript segments as soon as they are recognized; stats is filled once decoded.
+
+    Accepts a path, raw bytes or a file object, which is decoded as it is
+    read without being buffered first.
+    """
+    return SpeechToText().transcribe_chunked(audio_path, file_ext, stats=stats)
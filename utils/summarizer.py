@@ -1,28 +1,481 @@
 # utils/summarizer.py
 
-from transformers import BartTokenizer, BartForConditionalGeneration
-import torch
+from nltk.tokenize import sent_tokenize
+import math
+import os
+import queue
+import threading
+import time
 
-tokenizer = BartTokenizer.from_pretrained("facebook/bart-large-cnn")
-model = BartForConditionalGeneration.from_pretrained("facebook/bart-large-cnn")
+from utils import nltk_data
+from utils.batching import BatchScheduler
+from utils.executors import THREAD_BUDGETS
+from utils.metrics import stage
 
-def summarize(text, length='medium', output_format='paragraph'):
-    if length == 'short':
-        max_length = 60
-        min_length = 15
-    elif length == 'large':
-        max_length = 200
-        min_length = 100
-    else:
-        max_length = 120
-        min_length = 40
+# A hub name or a local checkpoint directory
+MODEL_NAME = os.environ.get('SUMMARIZER_MODEL', "facebook/bart-large-cnn")
+# Local directory of a distilled BART checkpoint, e.g. a downloaded distilbart-cnn-12-6
+DISTILLED_MODEL_PATH = os.environ.get('SUMMARIZER_DISTILLED_PATH', '')
+# fp32 | int8 | distilled | distilled-int8
+PROFILE = os.environ.get('SUMMARIZER_PROFILE', 'fp32')
+# torch intra-op threads per worker process; defaults to the abstractive share of CPU_BUDGET
+NUM_THREADS = int(os.environ.get('SUMMARIZER_NUM_THREADS', THREAD_BUDGETS['abstractive']))
+
+PROFILES = {
+    'fp32': {'distilled': False, 'quantize': False},
+    'int8': {'distilled': False, 'quantize': True},
+    'distilled': {'distilled': True, 'quantize': False},
+    'distilled-int8': {'distilled': True, 'quantize': True},
+}
+
+
+def checkpoint(profile=PROFILE):
+    """Return (checkpoint name, model_id) of an inference profile without loading anything."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown summarizer profile: {profile}")
+    settings = PROFILES[profile]
+    if settings['distilled'] and not DISTILLED_MODEL_PATH:
+        raise ValueError("SUMMARIZER_DISTILLED_PATH must point to a local checkpoint for distilled profiles")
+    name = DISTILLED_MODEL_PATH if settings['distilled'] else MODEL_NAME
+    return name, name if profile == 'fp32' else f"{name}#{profile}"
+
+
+def load_model(profile=PROFILE):
+    """
+    Load the tokenizer and model for an inference profile.
+
+    Quantized profiles replace every nn.Linear with a dynamically quantized
+    int8 version, which shrinks the weights about 4x and speeds up CPU
+    matrix multiplies. Distilled profiles load DISTILLED_MODEL_PATH.
+
+    Returns:
+        (tokenizer, model, model_id) where model_id identifies the profile in cache keys
+    """
+    import torch
+    from transformers import BartForConditionalGeneration
+
+    name, model_id = checkpoint(profile)
+    if NUM_THREADS:
+        torch.set_num_threads(NUM_THREADS)
+    loaded_tokenizer = load_tokenizer(profile)
+    loaded_model = BartForConditionalGeneration.from_pretrained(name)
+    loaded_model.eval()
+    if PROFILES[profile]['quantize']:
+        loaded_model = torch.quantization.quantize_dynamic(loaded_model, {torch.nn.Linear}, dtype=torch.qint8)
+    return loaded_tokenizer, loaded_model, model_id
+
+
+def load_tokenizer(profile=PROFILE):
+    """Load only the tokenizer of an inference profile; enough for token counts and chunking."""
+    from transformers import BartTokenizer
+    return BartTokenizer.from_pretrained(checkpoint(profile)[0])
+
+
+# Identifies the profile in cache keys; known without loading the model
+MODEL_ID = checkpoint()[1]
+
+# torch, transformers and the weights load on first use or in warm_up, not at import
+_tokenizer = None
+_model = None
+_load_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """Tokenizer of the configured profile, loaded on first use."""
+    global _tokenizer
+    if _tokenizer is None:
+        with _load_lock:
+            if _tokenizer is None:
+                with stage('summarize.load_tokenizer'):
+                    _tokenizer = load_tokenizer()
+    return _tokenizer
+
+
+def get_model():
+    """Model of the configured profile, loaded on first use."""
+    global _tokenizer, _model
+    if _model is None:
+        with _load_lock:
+            if _model is None:
+                with stage('summarize.load_model'):
+                    loaded_tokenizer, _model, _ = load_model()
+                if _tokenizer is None:
+                    _tokenizer = loaded_tokenizer
+    return _model
+
+
+def is_loaded():
+    """True once the model weights are in memory."""
+    return _model is not None
+
+
+def warm_up():
+    """Load the tokenizer and model and run one short generate so the first request pays neither."""
+    import torch
 
-    inputs = tokenizer([text], max_length=1024, return_tensors="pt", truncation=True)
-    summary_ids = model.generate(inputs["input_ids"], max_length=max_length, min_length=min_length, length_penalty=2.0, num_beams=4, early_stopping=True)
-    summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+    nltk_data.require('punkt')
+    model = get_model()
+    inputs = get_tokenizer()(["Warm-up request."], return_tensors="pt")
+    with torch.inference_mode():
+        model.generate(inputs["input_ids"], attention_mask=inputs["attention_mask"], max_length=8, num_beams=1)
 
+MAX_INPUT_TOKENS = 1024
+# Room left for the <s> and </s> tokens the tokenizer adds around each chunk
+CHUNK_TOKENS = MAX_INPUT_TOKENS - 2
+# Upper bound on map-reduce rounds; each round shrinks the text at least fivefold
+MAX_REDUCE_LEVELS = 5
+# Inputs are grouped into token-length buckets of this size so a batch pads little
+TOKEN_BUCKET_SIZE = 128
+
+LENGTH_SETTINGS = {
+    'short': (60, 15),
+    'medium': (120, 40),
+    'large': (200, 100),
+}
+
+
+# Cheapest output length worth generating before falling back to extractive summaries
+MIN_CAPPED_LENGTH = 20
+
+
+def _length_params(length):
+    """Return (max_length, min_length) for a length setting."""
+    return LENGTH_SETTINGS.get(length, LENGTH_SETTINGS['medium'])
+
+
+def decoding_params(length='medium', num_beams=4, max_length=None):
+    """Generate arguments for a length setting, optionally with fewer beams or a capped max_length."""
+    default_max, min_length = _length_params(length)
+    max_length = default_max if max_length is None else min(max_length, default_max)
+    return {
+        'max_length': max_length,
+        'min_length': min(min_length, max_length // 2),
+        'num_beams': num_beams,
+        'length_penalty': 2.0 if num_beams > 1 else 1.0,
+        'early_stopping': num_beams > 1,
+    }
+
+
+class CostModel:
+    """
+    Estimate generate latency from input tokens, output length and beam width.
+
+    Starts from SUMMARIZER_ENCODE_MS_PER_TOKEN and SUMMARIZER_STEP_MS and
+    rescales itself with an exponential moving average of observed/estimated
+    time for every batch that runs.
+    """
+
+    # Extra cost of each beam beyond the first, relative to a greedy step
+    BEAM_COST = 0.5
+
+    def __init__(self):
+        self.encode_seconds_per_token = float(os.environ.get('SUMMARIZER_ENCODE_MS_PER_TOKEN', 0.5)) / 1000
+        self.step_seconds = float(os.environ.get('SUMMARIZER_STEP_MS', 30)) / 1000
+        self.scale = 1.0
+        self._lock = threading.Lock()
+
+    def _raw(self, input_tokens, steps, num_beams, batch_size=1):
+        batch_factor = 1 + 0.25 * (batch_size - 1)
+        step = self.step_seconds * (1 + self.BEAM_COST * (num_beams - 1))
+        return (self.encode_seconds_per_token * input_tokens + steps * step) * batch_factor
+
+    def estimate(self, input_tokens, steps, num_beams, batch_size=1):
+        return self._raw(input_tokens, steps, num_beams, batch_size) * self.scale
+
+    def observe(self, input_tokens, steps, num_beams, batch_size, seconds):
+        raw = self._raw(input_tokens, steps, num_beams, batch_size)
+        if raw > 0:
+            with self._lock:
+                self.scale = 0.8 * self.scale + 0.2 * (seconds / raw)
+
+
+cost_model = CostModel()
+
+
+def _format_summary(summary, output_format):
     if output_format == 'bullets':
         bullets = summary.split('. ')
         return '\n'.join(f'• {b.strip()}' for b in bullets if b.strip())
     else:
         return summary
+
+
+def generate_batch(input_ids_list, length='medium', decoding=None):
+    """Run one padded, batched generate call and return the decoded summaries."""
+    import torch
+
+    decoding = decoding or decoding_params(length)
+    model = get_model()
+    inputs = get_tokenizer().pad({'input_ids': input_ids_list}, return_tensors="pt")
+    input_tokens = int(inputs["attention_mask"].sum())
+    start = time.perf_counter()
+    with stage('summarize.generate', batch=len(input_ids_list), tokens=input_tokens), \
+            torch.inference_mode():
+        summary_ids = model.generate(inputs["input_ids"], attention_mask=inputs["attention_mask"], **decoding)
+    cost_model.observe(input_tokens / len(input_ids_list), summary_ids.shape[1], decoding['num_beams'],
+                       len(input_ids_list), time.perf_counter() - start)
+    return get_tokenizer().batch_decode(summary_ids, skip_special_tokens=True)
+
+
+def _run_batch(key, payloads):
+    decoding, _ = key
+    return generate_batch(payloads, decoding=dict(decoding))
+
+
+MAX_BATCH_SIZE = int(os.environ.get('SUMMARIZER_MAX_BATCH_SIZE', 8))
+# Streamed summaries give up when no new text arrives for this long (queueing included)
+STREAM_TIMEOUT = float(os.environ.get('SUMMARIZER_STREAM_TIMEOUT', 120))
+
+scheduler = BatchScheduler(_run_batch,
+                           max_batch_size=MAX_BATCH_SIZE,
+                           max_wait_ms=float(os.environ.get('SUMMARIZER_MAX_WAIT_MS', 20)))
+
+
+def submit(text, length='medium', decoding=None):
+    """Queue text for batched generation and return a future for the raw summary."""
+    with stage('summarize.tokenize') as info:
+        input_ids = get_tokenizer()(text, max_length=MAX_INPUT_TOKENS, truncation=True)["input_ids"]
+        info['tokens'] = len(input_ids)
+    bucket = (len(input_ids) - 1) // TOKEN_BUCKET_SIZE
+    # Requests batch together only when they decode with identical settings
+    decoding = decoding or decoding_params(length)
+    return scheduler.submit((tuple(sorted(decoding.items())), bucket), input_ids)
+
+
+def plan_decoding(input_tokens, length='medium', deadline_ms=None):
+    """
+    Pick the most thorough decoding strategy expected to finish within deadline_ms.
+
+    The estimate covers queued work ahead of this request and, for inputs
+    longer than one window, the map-reduce passes. Beam width is reduced
+    from 4 to 2 to greedy, then greedy output is capped to the length that
+    fits. Returns (strategy name, generate arguments), or None when even
+    capped greedy decoding would miss the deadline.
+    """
+    if deadline_ms is None:
+        return 'beam4', decoding_params(length)
+    budget = deadline_ms / 1000.0
+    window_tokens = min(input_tokens, MAX_INPUT_TOKENS)
+    chunks = max(1, math.ceil(input_tokens / CHUNK_TOKENS))
+    # Sequential generate rounds: map batches (if any), the final pass, plus queued batches ahead of us
+    rounds = (math.ceil(chunks / MAX_BATCH_SIZE) if chunks > 1 else 0) + 1
+    rounds += scheduler.queue_depth() / MAX_BATCH_SIZE
+    max_length, _ = _length_params(length)
+
+    for num_beams in (4, 2, 1):
+        if rounds * cost_model.estimate(window_tokens, max_length, num_beams) <= budget:
+            return f'beam{num_beams}' if num_beams > 1 else 'greedy', decoding_params(length, num_beams)
+
+    # Largest greedy output length that still fits the budget
+    per_step = cost_model.estimate(window_tokens, 1, 1) - cost_model.estimate(window_tokens, 0, 1)
+    fixed = cost_model.estimate(window_tokens, 0, 1)
+    capped = int((budget / rounds - fixed) / per_step) if per_step > 0 else 0
+    if capped >= MIN_CAPPED_LENGTH:
+        return f'greedy-capped-{capped}', decoding_params(length, 1, capped)
+    return None
+
+
+def summarize_many(texts, length='medium', output_format='paragraph', batch_size=MAX_BATCH_SIZE):
+    """
+    Summarize many texts that each fit one input window, sorted by token length.
+
+    Sorting keeps padding within each batch small. Each batch runs on the
+    batch scheduler's worker, one at a time, so it never shares the model
+    with scheduled batches or streams. Yields one list of (index, summary)
+    pairs per batch as soon as that batch is generated.
+    """
+    with stage('summarize.tokenize', texts=len(texts)):
+        encoded = get_tokenizer()(texts, max_length=MAX_INPUT_TOKENS, truncation=True)["input_ids"]
+    order = sorted(range(len(texts)), key=lambda i: len(encoded[i]))
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        summaries = scheduler.call(generate_batch, [encoded[i] for i in batch], length).result()
+        yield [(i, _format_summary(summary, output_format)) for i, summary in zip(batch, summaries)]
+
+
+def token_count(text):
+    """Number of input tokens text would use, without truncation."""
+    return len(get_tokenizer()(text, add_special_tokens=True)["input_ids"])
+
+
+def sentence_token_counts(sentences):
+    """Number of tokens each sentence uses inside a longer input."""
+    if not sentences:
+        return []
+    return [len(ids) for ids in get_tokenizer()(list(sentences), add_special_tokens=False)["input_ids"]]
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS):
+    """
+    Split text into sentence-aligned chunks of at most max_tokens tokens.
+
+    A single sentence longer than max_tokens becomes its own chunk and is
+    truncated when it is summarized.
+    """
+    sentences = sent_tokenize(text)
+    if not sentences:
+        return []
+    token_counts = sentence_token_counts(sentences)
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    for sentence, count in zip(sentences, token_counts):
+        if current and current_tokens + count > max_tokens:
+            chunks.append(' '.join(current))
+            current = []
+            current_tokens = 0
+        current.append(sentence)
+        current_tokens += count
+    chunks.append(' '.join(current))
+    return chunks
+
+
+def summarize_document(text, length='medium', output_format='paragraph', decoding=None):
+    """
+    Summarize text of any length with map-reduce over BART-sized chunks.
+
+    Chunks are all queued at once so the batch scheduler runs them in padded
+    batches; their summaries are joined and re-chunked until the result fits
+    in one input window, which is then summarized in the requested format.
+
+    decoding overrides the generate arguments, e.g. with a plan from
+    plan_decoding.
+
+    Returns:
+        dict with the summary, the number of first-level chunks and the
+        number of summarization levels used
+    """
+    text, chunk_count, levels = _reduce(text, length, decoding)
+    with stage('summarize.final'):
+        summary = submit(text, length, decoding).result()
+    with stage('summarize.format'):
+        summary = _format_summary(summary, output_format)
+    return {
+        'summary': summary,
+        'chunks': chunk_count,
+        'levels': levels + 1,
+    }
+
+
+def summarize_blocks(blocks, length='medium', output_format='paragraph', decoding=None):
+    """
+    Summarize text that arrives as blocks (see utils.extractors), as summarize_document does.
+
+    Every complete chunk is queued for its first-level summary as soon as
+    its block arrives, so generation overlaps extraction, and only the
+    current block and the chunk summaries are held in memory. A chunk may
+    continue into the next block, so the last chunk of each block is carried
+    over.
+    """
+    futures = []
+    carry = ''
+    for block in blocks:
+        chunks = chunk_text(f"{carry} {block}" if carry else block)
+        carry = chunks.pop() if chunks else ''
+        futures.extend(submit(chunk, length, decoding) for chunk in chunks)
+
+    if not futures:
+        return summarize_document(carry, length, output_format, decoding)
+
+    with stage('summarize.map', chunks=len(futures) + 1):
+        futures.append(submit(carry, length, decoding))
+        text = ' '.join(future.result() for future in futures)
+    text, _, levels = _reduce(text, length, decoding)
+    with stage('summarize.final'):
+        summary = submit(text, length, decoding).result()
+    with stage('summarize.format'):
+        summary = _format_summary(summary, output_format)
+    return {
+        'summary': summary,
+        'chunks': len(futures),
+        'levels': levels + 2,
+    }
+
+
+def _reduce(text, length, decoding=None):
+    """Map-reduce text until it fits one input window; return (text, chunk_count, levels)."""
+    chunks = chunk_text(text)
+    chunk_count = max(1, len(chunks))
+    levels = 0
+    while len(chunks) > 1 and levels < MAX_REDUCE_LEVELS:
+        with stage('summarize.map', chunks=len(chunks)):
+            futures = [submit(chunk, length, decoding) for chunk in chunks]
+            text = ' '.join(future.result() for future in futures)
+        levels += 1
+        chunks = chunk_text(text)
+    return text, chunk_count, levels
+
+
+def stream_summary(text, length='medium', output_format='paragraph'):
+    """
+    Summarize text, yielding pieces of the final summary as they are generated.
+
+    Long inputs are first reduced to one window as in summarize_document. The
+    final pass decodes incrementally through a TextIteratorStreamer; streamers
+    do not support beam search, so it decodes greedily. Generation runs on the
+    batch scheduler's worker, so it never shares the model with a batch.
+    Yields ('token', text) pieces, or ('bullet', text) sentences for the
+    bullets format, then ('done', result) with the same fields as
+    summarize_document, or ('error', {'error': message}) if generation fails
+    or produces nothing for STREAM_TIMEOUT seconds.
+    """
+    import torch
+    from transformers import TextIteratorStreamer
+
+    try:
+        text, chunk_count, levels = _reduce(text, length)
+        max_length, min_length = _length_params(length)
+        tokenizer = get_tokenizer()
+        inputs = tokenizer([text], max_length=MAX_INPUT_TOKENS, return_tensors="pt", truncation=True)
+    except Exception as e:
+        yield 'error', {'error': str(e)}
+        return
+    streamer = TextIteratorStreamer(tokenizer, skip_special_tokens=True, timeout=STREAM_TIMEOUT)
+
+    def generate():
+        try:
+            with torch.inference_mode():
+                get_model().generate(inputs["input_ids"], attention_mask=inputs["attention_mask"],
+                                     max_length=max_length, min_length=min_length, num_beams=1,
+                                     streamer=streamer)
+        except Exception:
+            # Unblock the reader; the error reaches it through the future
+            streamer.end()
+            raise
+
+    future = scheduler.call(generate)
+
+    summary = ""
+    pending = ""
+    try:
+        for piece in streamer:
+            summary += piece
+            if output_format != 'bullets':
+                yield 'token', piece
+                continue
+            # Emit a bullet for every complete sentence, keeping the unfinished tail
+            pending += piece
+            *sentences, pending = pending.split('. ')
+            for sentence in sentences:
+                if sentence.strip():
+                    yield 'bullet', sentence.strip()
+    except queue.Empty:
+        yield 'error', {'error': f'No summary output for {STREAM_TIMEOUT:g} seconds'}
+        return
+    error = future.exception()
+    if error is not None:
+        yield 'error', {'error': str(error)}
+        return
+    if output_format == 'bullets' and pending.strip():
+        yield 'bullet', pending.strip()
+
+    yield 'done', {
+        'summary': _format_summary(summary, output_format),
+        'chunks': chunk_count,
+        'levels': levels + 1,
+    }
+
+
+def summarize(text, length='medium', output_format='paragraph'):
+    return summarize_document(text, length, output_format)['summary']
@@ -0,0 +1,131 @@
+import os
+import sys
+import threading
+import time
+
+from utils import nltk_data
+from utils.metrics import registry, stage
+
+# Components loaded in the background at startup, comma-separated ('all' for every one).
+# Anything not listed loads on the first request that needs it.
+WARM_UP = os.environ.get('WARM_UP', '')
+
+# Long enough (more than three sentences) to run the full extractive ranking path
+WARM_UP_TEXT = ("Warm-up requests load every model ahead of real traffic. "
+                "The first sentence introduces the topic. "
+                "The second sentence repeats the topic of warm-up requests. "
+                "The last sentence closes the warm-up text.")
+
+
+def _warm_nltk():
+    nltk_data.require()
+
+
+def _warm_extractive():
+    from models.summarizer import summarize_in_process
+    from utils import executors
+    from utils.pipeline import get_extractive_summarizer
+
+    get_extractive_summarizer()
+    # Starts an extractive worker process (when the pool uses processes) and imports the models there
+    executors.run('extractive', summarize_in_process, WARM_UP_TEXT, wait=True)
+
+
+def _warm_abstractive():
+    from utils import summarizer
+    summarizer.warm_up()
+
+
+def _warm_ocr():
+    from utils import ocr
+    ocr.warm_up()
+
+
+def _abstractive_loaded():
+    module = sys.modules.get('utils.summarizer')
+    return module is not None and module.is_loaded()
+
+
+def _ocr_loaded():
+    module = sys.modules.get('utils.ocr')
+    return module is not None and module.is_warm()
+
+
+# name -> (warm-up function, probe telling whether a request already loaded it, or None)
+COMPONENTS = {
+    'nltk': (_warm_nltk, lambda: not nltk_data.missing()),
+    'extractive': (_warm_extractive, None),
+    'abstractive': (_warm_abstractive, _abstractive_loaded),
+    'ocr': (_warm_ocr, _ocr_loaded),
+}
+
+_state = {name: {'status': 'cold'} for name in COMPONENTS}
+_state_lock = threading.Lock()
+
+
+def components(setting=WARM_UP):
+    """Component names listed in a WARM_UP setting; raises ValueError on unknown names."""
+    if setting.strip().lower() == 'all':
+        return list(COMPONENTS)
+    names = [name.strip() for name in setting.split(',') if name.strip()]
+    unknown = set(names) - set(COMPONENTS)
+    if unknown:
+        raise ValueError(f"Unknown WARM_UP components: {', '.join(sorted(unknown))}")
+    return names
+
+
+def warm_up(names):
+    """Load each named component in turn, recording its status and load time."""
+    for name in names:
+        with _state_lock:
+            _state[name] = {'status': 'loading'}
+        start = time.perf_counter()
+        try:
+            with stage(f'warmup.{name}'):
+                COMPONENTS[name][0]()
+            result = {'status': 'ready'}
+        except Exception as e:
+            result = {'status': 'failed', 'error': str(e)}
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        with _state_lock:
+            _state[name] = result
+
+
+def status():
+    """Status of every component; ones never warmed up report ready once a request has loaded them."""
+    with _state_lock:
+        report = {name: dict(state) for name, state in _state.items()}
+    for name, state in report.items():
+        probe = COMPONENTS[name][1]
+        if state['status'] == 'cold' and probe is not None and probe():
+            state['status'] = 'ready'
+    return report
+
+
+def readiness(required):
+    """Return (ready, status()); ready when NLTK data is present and every required component is loaded."""
+    report = status()
+    ready = all(report[name]['status'] == 'ready' for name in {'nltk', *required})
+    return ready, report
+
+
+def init_app(app, setting=WARM_UP):
+    """Start the background warm-up and register /health/live and /health/ready."""
+    from flask import jsonify
+
+    required = components(setting)
+    if required:
+        threading.Thread(target=warm_up, args=(required,), name='warm-up', daemon=True).start()
+
+    registry.gauge('notes_component_ready', 'Whether a lazily loaded component is ready (1) or not (0).',
+                   lambda: {(('component', name),): int(state['status'] == 'ready')
+                            for name, state in status().items()})
+
+    @app.route('/health/live')
+    def health_live():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/health/ready')
+    def health_ready():
+        ready, report = readiness(required)
+        return jsonify({'ready': ready, 'warm_up': required, 'components': report}), 200 if ready else 503